@@ -0,0 +1,264 @@
+"""
+Adoption Index
+Per-store AI adoption over rolling windows, maintained incrementally on every
+staffing decision and answering top-k / bottom-k / percentile queries for any
+contiguous range of stores (a hierarchy node)
+"""
+
+from datetime import date
+
+import numpy as np
+
+# ============================================================================
+# INDEX SETTINGS
+# ============================================================================
+WINDOWS = {'today': 1, '3d': 3, '7d': 7, '30d': 30}
+HORIZON_DAYS = 30               # Longest window; older decisions fall off the index
+NO_DECISION = -1                # Cell value for days without a recorded decision
+TARGET_ADOPTION = 80.0          # Target AI adoption rate (%)
+
+
+class AdoptionIndex:
+    """
+    Decision matrix (stores × days back) with per-window counters
+
+    Column 0 is today, column d is d days ago. Recording a decision touches
+    one cell and adjusts the AI-day / tracked-day counters of every window
+    containing that day, so the index never re-walks the history. When the
+    date changes the columns shift once (vectorized) and counters are rebuilt.
+    """
+
+    def __init__(self, stores, today, horizon=HORIZON_DAYS):
+        """
+        Args:
+            stores: Store names in hierarchy order (nodes are contiguous ranges)
+            today: Current date
+            horizon: Days kept (at least the longest window)
+        """
+        self.stores = list(stores)
+        self.store_index = {store: i for i, store in enumerate(self.stores)}
+        self.today = today
+        self.horizon = horizon
+        self.version = 0  # Bumped on every change (used in cache keys)
+
+        self._decisions = np.full((len(self.stores), horizon), NO_DECISION, dtype=np.int8)
+        self._ai_days = {}
+        self._tracked_days = {}
+        self._rebuild_counters()
+
+    @classmethod
+    def from_history(cls, stores, history, today, horizon=HORIZON_DAYS):
+        """
+        Build from an implementation history dictionary
+
+        Args:
+            stores: Store names in hierarchy order
+            history: {store: {'YYYY-MM-DD': {'decision': 1/0}}}
+            today: Current date
+        """
+        index = cls(stores, today, horizon)
+        dates = {(today.toordinal() - d): d for d in range(horizon)}
+        for store, days in history.items():
+            i = index.store_index.get(store)
+            if i is None:
+                continue
+            for date_str, implementation in days.items():
+                days_back = dates.get(date.fromisoformat(date_str).toordinal())
+                if days_back is not None:
+                    index._decisions[i, days_back] = implementation['decision']
+        index._rebuild_counters()
+        return index
+
+    def _rebuild_counters(self):
+        """Recompute every window counter from the decision matrix"""
+        for window, days in WINDOWS.items():
+            block = self._decisions[:, :days]
+            self._ai_days[window] = np.count_nonzero(block == 1, axis=1).astype(np.int32)
+            self._tracked_days[window] = np.count_nonzero(block != NO_DECISION, axis=1).astype(np.int32)
+        self.version += 1
+
+    def advance(self, today):
+        """Shift the day columns when the date changes"""
+        shift = today.toordinal() - self.today.toordinal()
+        if shift == 0:
+            return
+        if 0 < shift < self.horizon:
+            self._decisions[:, shift:] = self._decisions[:, :-shift]
+            self._decisions[:, :shift] = NO_DECISION
+        else:
+            self._decisions[:] = NO_DECISION
+        self.today = today
+        self._rebuild_counters()
+
+    def record(self, store, decision, days_back=0):
+        """
+        Record (or overwrite) one store's decision, updating counters in O(windows)
+
+        Args:
+            store: Store name
+            decision: 1 = following AI, 0 = legacy, NO_DECISION = clear
+            days_back: 0 for today
+        """
+        i = self.store_index[store]
+        previous = int(self._decisions[i, days_back])
+        if previous == decision:
+            return
+        self._decisions[i, days_back] = decision
+
+        for window, days in WINDOWS.items():
+            if days_back < days:
+                self._ai_days[window][i] += (decision == 1) - (previous == 1)
+                self._tracked_days[window][i] += (decision != NO_DECISION) - (previous != NO_DECISION)
+        self.version += 1
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+    def ai_days(self, window):
+        """AI-following days per store within a window"""
+        return self._ai_days[window]
+
+    def tracked_days(self, window):
+        """Days with a recorded decision per store within a window"""
+        return self._tracked_days[window]
+
+    def decision(self, store, days_back=0):
+        """Recorded decision of one store (1, 0 or NO_DECISION)"""
+        return int(self._decisions[self.store_index[store], days_back])
+
+    def with_overlay(self, history):
+        """Read-only view of this index with a session's own decisions on top (see AdoptionOverlay)"""
+        return AdoptionOverlay(self, history)
+
+    def rates(self, window, span=None):
+        """
+        Adoption rate (%) per store, NaN for stores without decisions
+
+        Args:
+            window: 'today', '3d', '7d' or '30d'
+            span: Optional (start, end) store range, e.g. StoreHierarchy.span[node]
+        """
+        start, end = span if span is not None else (0, len(self.stores))
+        tracked = self.tracked_days(window)[start:end]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(tracked > 0, self.ai_days(window)[start:end] / tracked * 100, np.nan)
+
+    def _select(self, window, k, span, largest):
+        start = span[0] if span is not None else 0
+        rates = self.rates(window, span)
+        valid = np.flatnonzero(np.isfinite(rates))
+        if len(valid) == 0:
+            return []
+
+        # Partial selection (O(n)), then sort only the k selected stores
+        keys = -rates[valid] if largest else rates[valid]
+        k = min(k, len(valid))
+        chosen = valid[np.argpartition(keys, k - 1)[:k]] if k < len(valid) else valid
+        chosen = chosen[np.argsort(-rates[chosen] if largest else rates[chosen], kind='stable')]
+
+        tracked = self.tracked_days(window)
+        return [(self.stores[start + j], float(rates[j]), int(tracked[start + j])) for j in chosen]
+
+    def top_k(self, window, k, span=None):
+        """Leaders: list of (store, adoption %, tracked days), highest first"""
+        return self._select(window, k, span, largest=True)
+
+    def bottom_k(self, window, k, span=None):
+        """Laggards: list of (store, adoption %, tracked days), lowest first"""
+        return self._select(window, k, span, largest=False)
+
+    def percentile(self, window, q, span=None):
+        """Adoption rate (%) at percentile(s) q across the stores of a span"""
+        rates = self.rates(window, span)
+        if not np.isfinite(rates).any():
+            return np.nan
+        return np.nanpercentile(rates, q)
+
+    def summary(self, window, span=None, target=TARGET_ADOPTION):
+        """
+        Aggregate adoption for a span
+
+        Returns:
+            Dictionary with 'mean' (mean of store rates), 'stores' (with
+            decisions) and 'below_target' (number of stores under target)
+        """
+        rates = self.rates(window, span)
+        valid = rates[np.isfinite(rates)]
+        return {
+            'mean': float(valid.mean()) if len(valid) else np.nan,
+            'stores': len(valid),
+            'below_target': int(np.count_nonzero(valid < target))
+        }
+
+
+class AdoptionOverlay(AdoptionIndex):
+    """
+    Shared index plus one session's decisions, without copying the index
+
+    The base index (matrix and counters) is built once per process and shared
+    by every session; an overlay only keeps the session's own cells and the
+    counter deltas they cause, and patches them into copies of the affected
+    counters at query time. The base is never written.
+    """
+
+    def __init__(self, base, history):
+        """
+        Args:
+            base: Shared AdoptionIndex
+            history: Session decisions, {store: {'YYYY-MM-DD': {'decision': 1/0}}}
+                     (days outside the base horizon are ignored)
+        """
+        self.base = base
+        self.stores = base.stores
+        self.store_index = base.store_index
+        self.today = base.today
+        self.horizon = base.horizon
+        self.version = base.version
+
+        self._cells = {}                                # (row, days back) → decision
+        self._deltas = {window: {} for window in WINDOWS}  # window → {row: [AI days, tracked days]}
+        for store, days in history.items():
+            i = self.store_index.get(store)
+            if i is None:
+                continue
+            for date_str, implementation in days.items():
+                days_back = self.today.toordinal() - date.fromisoformat(date_str).toordinal()
+                if 0 <= days_back < self.horizon:
+                    self._set(i, days_back, implementation['decision'])
+
+    def _set(self, i, days_back, decision):
+        previous = self.decision(self.stores[i], days_back)
+        if previous == decision:
+            return
+        self._cells[(i, days_back)] = decision
+        for window, days in WINDOWS.items():
+            if days_back < days:
+                delta = self._deltas[window].setdefault(i, [0, 0])
+                delta[0] += (decision == 1) - (previous == 1)
+                delta[1] += (decision != NO_DECISION) - (previous != NO_DECISION)
+        self.version += 1
+
+    def _patched(self, counters, window, part):
+        deltas = self._deltas[window]
+        if not deltas:
+            return counters
+        patched = counters.copy()
+        for i, delta in deltas.items():
+            patched[i] += delta[part]
+        return patched
+
+    def advance(self, today):
+        raise TypeError("AdoptionOverlay is read-only: advance the base index or build a new overlay")
+
+    def record(self, store, decision, days_back=0):
+        raise TypeError("AdoptionOverlay is read-only: record into the session history and rebuild the overlay")
+
+    def ai_days(self, window):
+        return self._patched(self.base.ai_days(window), window, 0)
+
+    def tracked_days(self, window):
+        return self._patched(self.base.tracked_days(window), window, 1)
+
+    def decision(self, store, days_back=0):
+        i = self.store_index[store]
+        return self._cells.get((i, days_back), self.base.decision(store, days_back))
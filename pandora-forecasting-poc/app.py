@@ -5,11 +5,67 @@ A premium Streamlit application for demonstrating AI-driven forecasting
 
 import streamlit as st
 import pandas as pd
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-from datetime import datetime, timedelta, date
+from datetime import datetime, timedelta
+from functools import partial
 import numpy as np
 
+import forecast_data
+from forecast_data import (
+    HourlyTensor,
+    adjustments_for_date,
+    generate_decision_history,
+    group_adjustments_by_date,
+    apply_traffic_adjustments,
+    calculate_forecast_accuracy,
+    calculate_kpis,
+    calculate_store_accuracy,
+    generate_implementation_calendar,
+    week_dates,
+)
+from staffing_model import calculate_dynamic_revenue
+from scenario_engine import simulate_revenue_impact
+from adoption_index import HORIZON_DAYS as ADOPTION_HORIZON_DAYS, NO_DECISION, TARGET_ADOPTION, AdoptionIndex
+from backtesting import ForecastCache, rolling_origins, run_backtest
+from cache_versions import CACHE_VERSIONS, VersionedBuilds, intraday_bucket
+from data_loader import load_all
+from data_quality import HORIZON_DAYS as FEED_HORIZON_DAYS, STALE_FEED_HOURS, DataQualityMonitor, expected_slots_today
+from event_calendar import EVENT_CALENDAR
+from export_service import (
+    FORMATS as EXPORT_FORMATS,
+    available_formats,
+    export_bytes,
+    export_file_name,
+    horizon_dates,
+    iter_export_chunks,
+)
+from intraday import ActualsQueue, IntradayCorrector
+from model_drift import DriftMonitor
+from prediction_intervals import ResidualIntervalModel
+from profiling import PROFILER
+from reconciliation import HierarchyReconciler
+from session_memory import SESSION_MEMORY_CAP_BYTES, measure_session, trim_adjustments
+from staff_sharing import optimize_floaters
+from warmup import TensorSnapshots, prepare_inputs
+from whatif import WhatIfBaseline, evaluate_adjustment
+from store_hierarchy import FLEET_NODE, HierarchyRollup, StoreHierarchy
+from ui_templates import (
+    ADJUSTMENT_PREVIEW,
+    APP_STYLE,
+    BULK_PREVIEW,
+    CONVERSION_KPI_CARD,
+    DECISION_PROMPT,
+    METRIC_CARD,
+    PAGE_HEADER,
+    RECOMMENDATION_BOX,
+    RECOMMENDATION_HEADER,
+    REVENUE_KPI_CARD,
+    SECTION_HEADER,
+    STATUS_BADGE,
+    TRAFFIC_KPI_CARD,
+    WHATIF_DELTAS,
+    render_stats,
+)
+
 # ============================================================================
 # PAGE CONFIGURATION
 # ============================================================================
@@ -20,719 +76,776 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Per-stage rerun timings (no-op unless PANDORA_PROFILING=1)
+PROFILER.start_rerun()
+
 # ============================================================================
 # CUSTOM STYLING - Minimalist Design
 # ============================================================================
-st.markdown("""
-<style>
-    @import url('https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700&display=swap');
-
-    * {
-        font-family: 'Inter', sans-serif;
-    }
-
-    .main {
-        background: linear-gradient(135deg, #FAFAFA 0%, #F5F5F5 100%);
-        padding: 1.5rem;
-    }
-
-    .stApp {
-        background: linear-gradient(135deg, #FAFAFA 0%, #F5F5F5 100%);
-    }
-
-    h1, h2, h3, h4 {
-        color: #1A1A1A;
-        font-weight: 600;
-    }
-
-    /* Grid Container */
-    .grid-container {
-        background-color: #FFFFFF;
-        border-radius: 16px;
-        padding: 24px;
-        box-shadow: 0 2px 12px rgba(0, 0, 0, 0.04);
-        margin-bottom: 20px;
-    }
-
-    /* KPI Cards - Minimalist */
-    .kpi-card {
-        background: #FFFFFF;
-        border: 1px solid #E8E8E8;
-        border-radius: 12px;
-        padding: 20px;
-        text-align: center;
-        box-shadow: 0 1px 4px rgba(0, 0, 0, 0.02);
-        min-height: 140px;
-        display: flex;
-        flex-direction: column;
-        justify-content: center;
-        transition: all 0.2s ease;
-    }
-
-    .kpi-card:hover {
-        box-shadow: 0 4px 12px rgba(242, 184, 198, 0.1);
-        border-color: #F2B8C6;
-    }
-
-    .kpi-card[title] {
-        cursor: help;
-    }
-
-    /* Tooltip styling */
-    .kpi-card-with-tooltip {
-        position: relative;
-    }
-
-    .kpi-card-with-tooltip .tooltip-text {
-        visibility: hidden;
-        width: 320px;
-        background-color: #2C2C2C;
-        color: #FFFFFF;
-        text-align: left;
-        border-radius: 8px;
-        padding: 12px 16px;
-        position: absolute;
-        z-index: 1000;
-        top: 125%;
-        left: 50%;
-        margin-left: -160px;
-        opacity: 0;
-        transition: opacity 0.3s;
-        font-size: 12px;
-        line-height: 1.5;
-        box-shadow: 0 4px 12px rgba(0, 0, 0, 0.3);
-    }
-
-    .kpi-card-with-tooltip .tooltip-text::after {
-        content: "";
-        position: absolute;
-        bottom: 100%;
-        left: 50%;
-        margin-left: -8px;
-        border-width: 8px;
-        border-style: solid;
-        border-color: transparent transparent #2C2C2C transparent;
-    }
-
-    .kpi-card-with-tooltip:hover .tooltip-text {
-        visibility: visible;
-        opacity: 1;
-    }
-
-    .kpi-title {
-        color: #6B6B6B;
-        font-size: 11px;
-        font-weight: 600;
-        text-transform: uppercase;
-        letter-spacing: 1.2px;
-        margin-bottom: 10px;
-    }
-
-    .kpi-value {
-        color: #F2B8C6;
-        font-size: 32px;
-        font-weight: 700;
-        line-height: 1;
-        margin-bottom: 6px;
-    }
-
-    .kpi-subtitle {
-        color: #999999;
-        font-size: 10px;
-        font-weight: 400;
-        line-height: 1.4;
-    }
-
-    /* Status Badges */
-    .status-badge {
-        background-color: #FAFAFA;
-        border: 1px solid #E8E8E8;
-        border-radius: 8px;
-        padding: 14px;
-        text-align: center;
-        height: 85px;
-        display: flex;
-        flex-direction: column;
-        justify-content: center;
-    }
-
-    .status-title {
-        color: #6B6B6B;
-        font-size: 10px;
-        font-weight: 600;
-        text-transform: uppercase;
-        letter-spacing: 0.8px;
-        margin-bottom: 6px;
-    }
-
-    .status-value {
-        color: #1A1A1A;
-        font-size: 14px;
-        font-weight: 600;
-    }
-
-    /* Buttons */
-    .stButton > button {
-        background-color: #F2B8C6;
-        color: #1A1A1A;
-        border: none;
-        border-radius: 8px;
-        padding: 10px 16px;
-        font-weight: 600;
-        font-size: 13px;
-        transition: all 0.2s ease;
-        box-shadow: 0 2px 6px rgba(242, 184, 198, 0.2);
-        white-space: nowrap;
-    }
-
-    .stButton > button:hover {
-        background-color: #E8A5B5;
-        transform: translateY(-1px);
-        box-shadow: 0 4px 12px rgba(242, 184, 198, 0.3);
-    }
-
-    /* Section Headers */
-    .section-header {
-        background: #FFFFFF;
-        padding: 16px 20px;
-        border-radius: 10px;
-        border-left: 4px solid #F2B8C6;
-        margin-bottom: 16px;
-        box-shadow: 0 1px 4px rgba(0, 0, 0, 0.02);
-    }
-
-    /* Remove extra padding */
-    .block-container {
-        padding-top: 1.5rem;
-        padding-bottom: 1rem;
-        max-width: 1400px;
-    }
-
-    /* Metric styling - ensure text is dark */
-    [data-testid="stMetricLabel"] {
-        color: #1A1A1A !important;
-        font-weight: 600;
-    }
-
-    [data-testid="stMetricValue"] {
-        color: #1A1A1A !important;
-        font-weight: 700;
-    }
-
-    [data-testid="stMetricDelta"] {
-        color: #1A1A1A !important;
-    }
-
-    /* Adjustment preview container */
-    .adjustment-preview {
-        background: #FFFFFF;
-        border: 1px solid #E8E8E8;
-        border-radius: 8px;
-        padding: 16px;
-        margin: 12px 0;
-        box-shadow: 0 1px 4px rgba(0, 0, 0, 0.05);
-    }
-
-    .adjustment-preview [data-testid="stMetricLabel"],
-    .adjustment-preview [data-testid="stMetricValue"],
-    .adjustment-preview [data-testid="stMetricDelta"] {
-        color: #1A1A1A !important;
-    }
-</style>
-""", unsafe_allow_html=True)
+with PROFILER.stage("styling"):
+    st.markdown(APP_STYLE, unsafe_allow_html=True)
 
 # ============================================================================
 # DATA GENERATION FUNCTIONS
 # ============================================================================
-
+INTERVAL_WINDOW_WEEKS = 8  # Residual history per store × weekday × hour for prediction bands
+LEADERBOARD_K = 5          # Leaders and laggards shown in the regional adoption chart
+ADOPTION_WINDOWS = {"3 Days": '3d', "7 Days": '7d', "30 Days": '30d'}
+BACKTEST_WINDOW_DAYS = 7  # Day-ahead backtest days behind the 3-day / weekly accuracy
+EXPORT_HORIZONS = {'day': "Selected day", 'week': "Selected week", 'quarter': "Quarter (13 weeks)"}
+MAX_FLOATERS_PER_STORE = 3 # Upper bound of the floater pool per store of a city cluster
+MOVES_SHOWN = 8            # Floater moves listed under the sharing plan
+FALLBACK_RETRY_SECONDS = 60  # A week tensor holding fallback data is fetched again after this long
+
+def generate_store_hourly_data(store_name, date):
+    """Cached hourly forecast for one store (see forecast_data.generate_store_hourly_data)"""
+    return cached_store_hourly_data(store_name, date, CACHE_VERSIONS.store(store_name), intraday_bucket((date,)))
+
+@PROFILER.cache_calls("cached_store_hourly_data")
 @st.cache_data(hash_funcs={"builtins.datetime": lambda x: x.isoformat()})
-def generate_store_hourly_data(store_name, date, _cache_version="v2_scaled"):
+@PROFILER.cache_misses("cached_store_hourly_data")
+def cached_store_hourly_data(store_name, date, version, intraday):
     """
-    Generate hourly synthetic data for a specific store
+    Hourly forecast cache keyed on the store's version (see cache_versions.py)
 
     Args:
-        store_name: Name of the store
-        date: Date for the forecast
-
-    Returns:
-        DataFrame with hourly traffic and staffing data
+        version: CACHE_VERSIONS.store(store_name)
+        intraday: TTL bucket for today (None for other dates), so today's
+                  actuals refresh as they arrive
     """
-    np.random.seed(hash(store_name) % 10000)
+    return forecast_data.generate_store_hourly_data(store_name, date)
 
-    # Operating hours: 9 AM to 9 PM
-    hours = [f"{h:02d}:00" for h in range(9, 21)]
 
-    # Store-specific parameters - Scaled for small luxury jewelry store (visitors/hr)
-    # Typical range: 5-20 visitors/hr
-    store_params = {
-        "London": {"base": 12, "peak_boost": 8, "peak_hours": [12, 13, 17, 18, 19]},
-        "Copenhagen": {"base": 8, "peak_boost": 6, "peak_hours": [11, 14, 16, 18]},
-        "Paris": {"base": 10, "peak_boost": 7, "peak_hours": [13, 15, 17, 18]}
-    }
+@st.cache_resource
+def get_week_builds():
+    """Last week tensor per week with the store versions it holds (shared across sessions)"""
+    return VersionedBuilds(max_entries=16)
 
-    params = store_params.get(store_name, {"base": 10, "peak_boost": 7, "peak_hours": [12, 18]})
+@st.cache_resource
+def get_tensor_snapshots():
+    """On-disk week tensors written by warmup.py and by earlier processes (data/forecast_snapshots)"""
+    return TensorSnapshots()
 
-    # Check if selected date is today or in the past
-    today = datetime.now().date()
-    selected_date_obj = date.date() if isinstance(date, datetime) else date
-    is_today = selected_date_obj == today
-    is_past = selected_date_obj < today
-    current_hour = datetime.now().hour
-
-    # Generate hourly data
-    data = []
-    for i, hour in enumerate(hours):
-        hour_num = int(hour.split(':')[0])
-
-        # Base traffic with random variation
-        traffic = params["base"] + np.random.randint(-2, 3)
-
-        # Peak hour boost
-        if hour_num in params["peak_hours"]:
-            traffic += params["peak_boost"]
-
-        # Gradual increase throughout the day (opening hours ramp up)
-        if i < 4:  # First few hours - lower traffic
-            traffic = int(traffic * 0.6)
-        elif i > 8:  # Evening - moderate decline
-            traffic = int(traffic * 0.85)
-
-        # Ensure minimum of 3 visitors/hr (never empty store)
-        traffic = max(3, traffic)
-
-        # Generate actual traffic (with slight variance from predicted)
-        actual_traffic = None
-        if is_past:
-            # Past date: show actual traffic for all hours
-            variance = np.random.uniform(-0.08, 0.08)
-            actual_traffic = int(traffic * (1 + variance))
-        elif is_today and hour_num < current_hour:
-            # Today: show actual traffic only for hours that have passed
-            variance = np.random.uniform(-0.08, 0.08)
-            actual_traffic = int(traffic * (1 + variance))
-        # Future dates or future hours: actual_traffic remains None
-
-        # AI-recommended staffing (optimal for small luxury store)
-        # Aims for 4-5:1 shopper-to-staff ratio
-        if traffic <= 6:
-            ai_staff = 1  # Very quiet, 1 staff sufficient
-        elif traffic <= 12:
-            ai_staff = 2  # ~6:1 ratio
-        elif traffic <= 16:
-            ai_staff = 3  # ~5:1 ratio
-        else:
-            # Peak periods - aim for 4-5:1
-            ai_staff = min(4, max(3, int(traffic / 5)))  # Cap at 4 staff
-
-        # Baseline staffing (legacy - understaffed)
-        # Runs at 8-12:1 ratio (always fewer than AI)
-        if traffic <= 10:
-            baseline_staff = 1  # Understaffed
-        elif traffic <= 20:
-            baseline_staff = 2  # Still understaffed
-        else:
-            baseline_staff = 2  # Significantly understaffed at peak
+@st.cache_resource
+def warm_process():
+    """
+    Once per process, before the first cache version is taken: compile the
+    feature array and this year's event matrix (see warmup.prepare_inputs)
+    """
+    prepare_inputs()
 
-        data.append({
-            'Hour': hour,
-            'Predicted_Traffic': traffic,
-            'Actual_Traffic': actual_traffic,
-            'Baseline_Staffing': baseline_staff,
-            'AI_Recommended_Staffing': ai_staff
-        })
+@PROFILER.cache_calls("get_week_tensor")
+@st.cache_resource(max_entries=16)
+@PROFILER.cache_misses("get_week_tensor")
+def get_week_tensor(week_start, today, version):
+    """
+    Hourly store × date × hour tensor of one week (Monday-Sunday)
 
-    return pd.DataFrame(data)
+    Stores are fetched concurrently (one source per store); a store whose
+    fetch fails or times out falls back to its cached hourly forecasts. The
+    tensor is shared read-only; both views read from it (hourly: one date's
+    slice, daily: the reduction over hours).
 
-@st.cache_data(hash_funcs={"builtins.datetime": lambda x: x.isoformat()})
-def generate_store_daily_data(store_name, date, _cache_version="v2_scaled"):
-    """
-    Generate daily synthetic data for a specific store (7 days)
+    Keyed on the week's forecast version (see forecast_version). When it
+    changes, only stores whose own version changed, or whose last fetch fell
+    back, are fetched again; the others are copied from the week's previous
+    tensor. A process without a previous tensor first looks for a snapshot of
+    this version on disk (written by warmup.py or an earlier process), and
+    fetched tensors are snapshotted for the next cold start.
 
     Args:
-        store_name: Name of the store
-        date: Starting date for the forecast
-
-    Returns:
-        DataFrame with daily traffic and staffing data
+        week_start: Monday of the week
+        today: Current date (days before it have daily actuals)
+        version: forecast_version of the week (week version, fallback retry bucket)
     """
-    np.random.seed(hash(store_name) % 10000)
+    dates = week_dates(week_start)
+    bucket = intraday_bucket(dates)
+    versions = {store: (CACHE_VERSIONS.store(store), bucket) for store in STORES}
+    builds = get_week_builds()
+    previous, stale = builds.stale((week_start, today), versions)
+    week_version, _ = version
+    if previous is None:
+        snapshot = get_tensor_snapshots().load(week_start, today, week_version)
+        if snapshot is not None and snapshot.stores == STORES:
+            builds.record((week_start, today), versions, snapshot)
+            return snapshot
+
+    forecasts = {}
+    if stale:
+        forecasts, report = load_all(
+            {store: partial(fetch_store_hourly, store, dates) for store in stale},
+            fallback=lambda store: {day: generate_store_hourly_data(store, day) for day in dates}
+        )
+        record_load_report('forecasts', report)
+        for store in set(report['timed_out']) | set(report['failed']):
+            versions[store] = None  # Fallback data: fetch again next time
 
-    # Days of the week
-    days = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+    def forecast_for(store, day):
+        return forecasts[store][day] if store in forecasts else previous.forecast(store, day)
 
-    # Store-specific parameters - Scaled daily traffic for small luxury store
-    # Based on 12-hour operating day (9 AM - 9 PM)
-    store_params = {
-        "London": {"base": 140, "weekend_boost": 50, "peak_days": [4, 5, 6]},  # Fri, Sat, Sun (~110-190/day)
-        "Copenhagen": {"base": 100, "weekend_boost": 40, "peak_days": [3, 5, 6]},  # Thu, Sat, Sun (~80-140/day)
-        "Paris": {"base": 120, "weekend_boost": 45, "peak_days": [4, 5, 6]}   # Fri, Sat, Sun (~95-165/day)
-    }
+    tensor = HourlyTensor.from_forecasts(STORES, dates, forecast_for, today)
+    builds.record((week_start, today), versions, tensor)
+    if stale and all(versions.values()):  # Not with fallback data
+        get_tensor_snapshots().save(tensor, week_start, today, week_version)
+    return tensor
 
-    params = store_params.get(store_name, {"base": 120, "weekend_boost": 45, "peak_days": [5, 6]})
+def fetch_store_hourly(store_name, dates):
+    """Hourly forecasts and actuals of one store for several dates (one I/O source per store)"""
+    return {day: forecast_data.generate_store_hourly_data(store_name, day) for day in dates}
 
-    # Determine which days should show actual traffic based on selected date
-    today = datetime.now().date()
-    selected_date_obj = date.date() if isinstance(date, datetime) else date
-
-    # For weekly view, we show the current week starting from Monday
-    # Calculate which day of the week today is (0=Monday, 6=Sunday)
-    today_day_index = datetime.now().weekday()
-
-    # Check if selected date is past, present, or future
-    is_past_week = selected_date_obj < today
-    is_current_week = selected_date_obj == today
-    is_future_week = selected_date_obj > today
-
-    # Generate daily data
-    data = []
-    for i, day in enumerate(days):
-        # Base traffic with random variation
-        traffic = params["base"] + np.random.randint(-10, 15)
-
-        # Weekend/peak day boost
-        if i in params["peak_days"]:
-            traffic += params["weekend_boost"]
-
-        # Ensure realistic minimum
-        traffic = max(60, traffic)  # At least 60 visitors per day
-
-        # Generate actual traffic (with slight variance from predicted)
-        actual_traffic = None
-        if is_past_week:
-            # Past week: show actual for all days
-            variance = np.random.uniform(-0.08, 0.08)
-            actual_traffic = int(traffic * (1 + variance))
-        elif is_current_week:
-            # Current week: show actual only up to today
-            if i < today_day_index:  # Days before today
-                variance = np.random.uniform(-0.08, 0.08)
-                actual_traffic = int(traffic * (1 + variance))
-            elif i == today_day_index:  # Today
-                variance = np.random.uniform(-0.08, 0.08)
-                actual_traffic = int(traffic * (1 + variance))
-        # Future week: actual_traffic remains None
-
-        # Calculate average hourly traffic for staffing estimation
-        avg_hourly = traffic / 12  # 12-hour operating day
-
-        # AI-recommended staffing (total staff-hours per day, aiming for ~5:1 ratio)
-        # More realistic for small luxury store
-        ai_staff = max(int(traffic / 5), 18)  # Minimum 18 staff-hours per day (~1.5 per hour)
-
-        # Baseline staffing (understaffed at ~10:1 ratio)
-        # Always significantly understaffed to demonstrate impact
-        baseline_staff = max(int(traffic / 10), 12)  # Minimum 12 staff-hours per day (1 per hour)
-
-        data.append({
-            'Day': day,
-            'Predicted_Traffic': traffic,
-            'Actual_Traffic': actual_traffic,
-            'Baseline_Staffing': baseline_staff,
-            'AI_Recommended_Staffing': ai_staff
-        })
-
-    return pd.DataFrame(data)
-
-@st.cache_data
-def generate_all_stores_data(date, view_mode='hourly', _cache_version="v2_scaled"):
-    """Generate data for all stores"""
-    stores = ["London", "Copenhagen", "Paris"]
-    stores_data = {}
+@st.cache_resource
+def get_load_reports():
+    """Latest concurrent load report per source type and when it was recorded (shared across sessions)"""
+    return {}
 
-    for store in stores:
-        if view_mode == 'hourly':
-            stores_data[store] = generate_store_hourly_data(store, date, _cache_version)
-        else:  # daily
-            stores_data[store] = generate_store_daily_data(store, date, _cache_version)
+def record_load_report(name, report):
+    """Keep the latest load report of a source type for the health badges"""
+    get_load_reports()[name] = (datetime.now(), report)
 
-    return stores_data
+def recent_load_reports(now):
+    """
+    Load reports recorded in the last STALE_FEED_HOURS
 
-@st.cache_data
-def calculate_aggregate_data(stores_data, view_mode='hourly'):
-    """Calculate aggregate data across all stores"""
-    # Determine the time column name based on view mode
-    time_col = 'Hour' if view_mode == 'hourly' else 'Day'
-    time_values = stores_data["London"][time_col].tolist()
+    A source type is only reloaded when its cache misses, so an older report
+    says nothing about the source now; its fallbacks no longer count.
+    """
+    cutoff = now - timedelta(hours=STALE_FEED_HOURS)
+    return [report for recorded, report in list(get_load_reports().values()) if recorded >= cutoff]
 
-    aggregate = pd.DataFrame({time_col: time_values})
+def forecast_version(date):
+    """
+    Version of the forecasts of the week containing a date
+
+    Hash of every store's version (parameters, staffing rules, code, data
+    watermark) plus the intraday TTL bucket while the week includes today,
+    and a retry bucket while the week's tensor holds fallback data (a store
+    whose fetch failed or timed out), so the fetch is retried every
+    FALLBACK_RETRY_SECONDS instead of serving the fallback until an input
+    changes.
+    """
+    dates = week_dates(date)
+    retry = None
+    if get_week_builds().incomplete((dates[0], datetime.now().date())):
+        retry = int(datetime.now().timestamp() // FALLBACK_RETRY_SECONDS)
+    return CACHE_VERSIONS.week(STORES, dates), retry
 
-    # Sum traffic across stores
-    for store_name, df in stores_data.items():
-        aggregate[store_name] = df['Predicted_Traffic'].values
+def week_tensor_for(date):
+    """Week tensor containing a date"""
+    return get_week_tensor(week_dates(date)[0], datetime.now().date(), forecast_version(date))
 
-    aggregate['Total_Traffic'] = aggregate[["London", "Copenhagen", "Paris"]].sum(axis=1)
+def generate_store_daily_data(store_name, date):
+    """7-day forecast for one store, reduced from the week tensor"""
+    return week_tensor_for(date).daily_forecast(store_name)
 
-    return aggregate
+def hourly_forecasts(date):
+    """Hourly StoreForecast of every store for one date (views into the week tensor)"""
+    tensor = week_tensor_for(date)
+    return {store: tensor.forecast(store, date) for store in STORES}
 
-def calculate_kpis(scope, stores_data, aggregate_data):
-    """Calculate KPIs based on selected scope"""
-    view_mode = st.session_state.view_mode
 
-    if scope == "All Stores (Aggregate)":
-        total_traffic = int(aggregate_data['Total_Traffic'].sum())
+@st.cache_resource
+def get_interval_model(view_mode='hourly'):
+    """
+    Process-wide residual interval model for prediction bands
 
-        # Calculate total baseline and AI staffing across all stores
-        total_baseline_staffing = 0
-        total_ai_staffing = 0
+    Backfilled once with the last 8 weeks of actuals and shared across
+    sessions; record_current_actuals adds new actuals incrementally.
 
-        for store_name, df in stores_data.items():
-            total_baseline_staffing += df['Baseline_Staffing'].sum()
-            total_ai_staffing += df['AI_Recommended_Staffing'].sum()
+    Args:
+        view_mode: 'hourly' (store × weekday × hour) or 'daily' (store × weekday)
 
-        # Calculate dynamic revenue with baseline staffing
-        baseline_revenue_data = calculate_dynamic_revenue(total_traffic, total_baseline_staffing)
-        baseline_revenue = baseline_revenue_data['revenue']
-        baseline_cr = baseline_revenue_data['conversion_rate']
+    Returns:
+        ResidualIntervalModel
+    """
+    stores = STORES
+    today = datetime.now().date()
 
-        # Calculate dynamic revenue with AI staffing
-        ai_revenue_data = calculate_dynamic_revenue(total_traffic, total_ai_staffing)
-        ai_revenue = ai_revenue_data['revenue']
-        ai_cr = ai_revenue_data['conversion_rate']
+    if view_mode == 'hourly':
+        model = ResidualIntervalModel(stores, n_slots=12, window=INTERVAL_WINDOW_WEEKS)
+        for days_back in range(1, 7 * INTERVAL_WINDOW_WEEKS + 1):
+            day = today - timedelta(days=days_back)
+            for store, forecast in hourly_forecasts(day).items():
+                observe_store_actuals(model, store, day, forecast, view_mode)
+    else:
+        model = ResidualIntervalModel(stores, n_slots=1, window=INTERVAL_WINDOW_WEEKS)
+        for weeks_back in range(1, INTERVAL_WINDOW_WEEKS + 1):
+            week = today - timedelta(weeks=weeks_back)
+            tensor = week_tensor_for(week)
+            for store in stores:
+                observe_store_actuals(model, store, week, tensor.daily_forecast(store), view_mode)
+
+    return model
+
+def observe_store_actuals(model, store_name, date, forecast, view_mode='hourly'):
+    """Feed the actuals of one StoreForecast into the interval model"""
+    predicted = forecast.predicted
+    actual = forecast.actual
+
+    if view_mode == 'hourly':
+        model.observe(store_name, date.weekday(), predicted, actual, key=(store_name, date.toordinal()))
+    else:
+        # One row per weekday of the week containing `date`
+        monday = date.toordinal() - date.weekday()
+        for i in range(len(predicted)):
+            model.observe(store_name, i, predicted[i:i + 1], actual[i:i + 1], key=(store_name, monday + i))
 
-        # Calculate lost revenue (positive = lost opportunity, negative = savings)
-        lost_revenue = ai_revenue - baseline_revenue
+def record_current_actuals(view_mode='hourly'):
+    """
+    Add actuals that arrived since the last rerun to the interval model
 
-        # Return AI revenue as the primary metric
-        revenue = ai_revenue
+    Already recorded hours are skipped, so this is a no-op until a new hour
+    (or day, in the weekly view) of actuals becomes available.
 
-        # Calculate conversion efficiency (improvement from baseline to AI)
-        conversion_improvement = ((ai_cr - baseline_cr) / baseline_cr * 100) if baseline_cr > 0 else 0
+    Returns:
+        Interval model version (changes only when new residuals were recorded)
+    """
+    model = get_interval_model(view_mode)
+    today = datetime.now().date()
 
-        # Store baseline and AI revenue for returning
-        return total_traffic, revenue, conversion_improvement, baseline_revenue, ai_revenue, lost_revenue, baseline_cr, ai_cr
+    if view_mode == 'hourly':
+        forecasts = hourly_forecasts(today)
     else:
-        df = stores_data[scope]
-        total_traffic = int(df['Predicted_Traffic'].sum())
+        tensor = week_tensor_for(today)
+        forecasts = {store: tensor.daily_forecast(store) for store in STORES}
+    for store, forecast in forecasts.items():
+        observe_store_actuals(model, store, today, forecast, view_mode)
 
-        # Calculate total baseline and AI staffing for the store
-        total_baseline_staffing = df['Baseline_Staffing'].sum()
-        total_ai_staffing = df['AI_Recommended_Staffing'].sum()
+    return model.version
 
-        # Calculate dynamic revenue with baseline staffing
-        baseline_revenue_data = calculate_dynamic_revenue(total_traffic, total_baseline_staffing)
-        baseline_revenue = baseline_revenue_data['revenue']
-        baseline_cr = baseline_revenue_data['conversion_rate']
+def feed_records(store_name, date, forecast):
+    """Hourly records received for one store-day: (store, date, hour slots with actuals)"""
+    return store_name, date, np.flatnonzero(np.isfinite(forecast.actual))
 
-        # Calculate dynamic revenue with AI staffing
-        ai_revenue_data = calculate_dynamic_revenue(total_traffic, total_ai_staffing)
-        ai_revenue = ai_revenue_data['revenue']
-        ai_cr = ai_revenue_data['conversion_rate']
+@st.cache_resource
+def get_data_quality_monitor():
+    """
+    Process-wide data-quality monitor for the hourly traffic feeds
 
-        # Calculate lost revenue (positive = lost opportunity, negative = savings)
-        lost_revenue = ai_revenue - baseline_revenue
+    Backfilled once with the previous days of the week and shared across
+    sessions; poll_data_feeds adds today's records as they arrive.
 
-        # Return AI revenue as the primary metric
-        revenue = ai_revenue
+    Returns:
+        DataQualityMonitor
+    """
+    monitor = DataQualityMonitor(STORE_HIERARCHY)
+    today = datetime.now().date()
+    monitor.ingest(
+        feed_records(store, day, forecast)
+        for day in (today - timedelta(days=d) for d in range(FEED_HORIZON_DAYS - 1, 0, -1))
+        for store, forecast in hourly_forecasts(day).items()
+    )
+    return monitor
+
+def observe_drift(monitor, date, forecasts):
+    """Feed one day of hourly forecasts ({store: StoreForecast}) into the drift monitor"""
+    predicted = np.zeros((len(STORES), len(forecast_data.HOURS)))
+    actual = np.full(predicted.shape, np.nan)
+    for i, store in enumerate(STORES):
+        if store in forecasts:  # Stores without data this poll keep NaN (not observed)
+            predicted[i] = forecasts[store].predicted
+            actual[i] = forecasts[store].actual
+    monitor.observe_day(date, predicted, actual)
+
+@st.cache_resource
+def get_drift_monitor():
+    """
+    Process-wide model-drift monitor over hourly forecast residuals
+
+    Backfilled once, oldest day first, with the same weeks of actuals as the
+    interval model and shared across sessions; poll_data_feeds adds new
+    hours as they arrive.
 
-        # Calculate conversion efficiency (improvement from baseline to AI)
-        conversion_improvement = ((ai_cr - baseline_cr) / baseline_cr * 100) if baseline_cr > 0 else 0
+    Returns:
+        DriftMonitor
+    """
+    monitor = DriftMonitor(STORES)
+    today = datetime.now().date()
+    for days_back in range(7 * INTERVAL_WINDOW_WEEKS, 0, -1):
+        day = today - timedelta(days=days_back)
+        observe_drift(monitor, day, hourly_forecasts(day))
+    return monitor
+
+@st.cache_resource
+def get_actuals_queue():
+    """Queue of hourly actuals feeding the intraday re-forecast (data/actuals_queue)"""
+    return ActualsQueue()
+
+@st.cache_resource
+def get_intraday_corrector():
+    """Process-wide intraday corrector for today's hourly forecasts"""
+    return IntradayCorrector(STORES, datetime.now().date())
+
+def poll_data_feeds():
+    """
+    Ingest feed records that arrived since the last poll
 
-        # Store baseline and AI revenue for returning
-        return total_traffic, revenue, conversion_improvement, baseline_revenue, ai_revenue, lost_revenue, baseline_cr, ai_cr
+    Feeds deliver one record per store per hour, so the feeds are polled at
+    most once per hour (shared by all sessions) and each new record updates
+    the data-quality counters and drift detectors; reruns in between only
+    read the monitors. Today's new hours are also published to the actuals
+    queue consumed by the intraday re-forecast.
 
-def calculate_forecast_accuracy(scope, stores_data, aggregate_data, selected_date):
+    Returns:
+        Tuple of (DataQualityMonitor, DriftMonitor)
+    """
+    monitor = get_data_quality_monitor()
+    drift = get_drift_monitor()
+    now = datetime.now()
+    poll_key = (now.date(), now.hour)
+    if monitor.polled != poll_key:
+        today = now.date()
+        days = [today] if monitor.polled is None or monitor.polled[0] == today else [monitor.polled[0], today]
+        # Today's records are still arriving, so bypass the forecast cache. Feeds
+        # are fetched concurrently; a feed that fails or times out has simply not
+        # delivered this poll (its records count as missing until the next one).
+        fetched, report = load_all({store: partial(fetch_store_hourly, store, days) for store in STORES})
+        record_load_report('feeds', report)
+        for day in days:
+            forecasts = {store: store_days[day] for store, store_days in fetched.items()}
+            monitor.ingest(feed_records(store, day, forecast) for store, forecast in forecasts.items())
+            observe_drift(drift, day, forecasts)
+
+        # Stand-in producer: publish today's elapsed hours after each store's last
+        # queued one (a new process or another replica re-publishes nothing), and
+        # drop the queues of earlier days (the intraday re-forecast reads today's only)
+        queue = get_actuals_queue()
+        queue.prune(today)
+        queue.publish((
+            {'store': store, 'date': today, 'hour': forecast_data.HOURS[slot], 'actual': forecast.actual[slot]}
+            for store, forecast in forecasts.items()
+            for slot in range(expected_slots_today(now))
+            if np.isfinite(forecast.actual[slot])
+        ), new_only=True)
+        monitor.polled = poll_key
+    return monitor, drift
+
+def consume_intraday_actuals():
     """
-    Calculate forecast accuracy by comparing actual vs predicted traffic
-    Returns accuracy for today, 3-day average, and weekly average
+    Apply hourly actuals queued since the last rerun to the intraday corrector
 
-    Uses current stores_data to calculate accuracy efficiently
+    Only stores with new hours change state; reading an unchanged queue is a
+    single file size check.
+
+    Returns:
+        Intraday corrector version (changes only when a correction changed)
     """
+    corrector = get_intraday_corrector()
     today = datetime.now().date()
+    corrector.consume(get_actuals_queue(), lambda store: generate_store_hourly_data(store, today).predicted, today)
+    return corrector.version
 
-    # Convert selected_date to date object if needed
-    # Check datetime first since it's a subclass of date
-    if hasattr(selected_date, 'date') and callable(selected_date.date):
-        selected_date_obj = selected_date.date()
-    else:
-        selected_date_obj = selected_date
-
-    # Check if we have actual data (past dates only)
-    has_actual_data = selected_date_obj <= today
-
-    if not has_actual_data:
-        # Future dates - no actual data, return N/A or default values
-        return 0.0, 0.0, 0.0
-
-    # Calculate accuracy from current data (has actual traffic where available)
-    accuracy_values = []
-
-    if scope == "All Stores (Aggregate)":
-        # Calculate across all stores
-        for store_name, df in stores_data.items():
-            for _, row in df.iterrows():
-                if row['Actual_Traffic'] is not None and row['Actual_Traffic'] > 0:
-                    predicted = row['Predicted_Traffic']
-                    actual = row['Actual_Traffic']
-                    # Accuracy = 1 - (absolute error / predicted)
-                    accuracy = max(0, 1 - abs(predicted - actual) / predicted)
-                    accuracy_values.append(accuracy * 100)
-    else:
-        # Individual store
-        df = stores_data[scope]
-        for _, row in df.iterrows():
-            if row['Actual_Traffic'] is not None and row['Actual_Traffic'] > 0:
-                predicted = row['Predicted_Traffic']
-                actual = row['Actual_Traffic']
-                accuracy = max(0, 1 - abs(predicted - actual) / predicted)
-                accuracy_values.append(accuracy * 100)
+@PROFILER.cache_calls("apply_intraday_corrections")
+@st.cache_resource(max_entries=8)
+@PROFILER.cache_misses("apply_intraday_corrections")
+def apply_intraday_corrections(_base_stores_data, date, view_mode, intervals_version, intraday_version):
+    """
+    Today's hourly forecasts with the remaining hours re-forecast from intraday actuals
 
-    # Base accuracy from current data
-    base_accuracy = np.mean(accuracy_values) if accuracy_values else 92.0
+    Only corrected stores get new StoreForecast objects; the rest of the
+    fleet is shared with the cached forecast, which is never regenerated.
+    """
+    if view_mode != 'hourly' or date != datetime.now().date():
+        return _base_stores_data
+    corrector = get_intraday_corrector()
+    return {store: corrector.apply(forecast) for store, forecast in _base_stores_data.items()}
+
+@PROFILER.cache_calls("generate_all_stores_data")
+@st.cache_resource(max_entries=32)
+@PROFILER.cache_misses("generate_all_stores_data")
+def generate_all_stores_data(date, view_mode='hourly', data_version=None, intervals_version=0):
+    """
+    Generate data for all stores, with prediction interval columns
+
+    Shared read-only between reruns and sessions (no per-rerun copy);
+    StoreForecast instances are never modified in place.
+
+    Args:
+        date: Forecast date
+        view_mode: 'hourly' or 'daily'
+        data_version: forecast_version of the date, so stores are regenerated when their inputs change
+        intervals_version: Interval model version, so bands refresh when new actuals arrive
 
-    # Create a unique seed based on selected_date AND scope
-    # This ensures different dates and different stores have different accuracy values
-    seed_value = selected_date_obj.toordinal() + hash(scope) % 1000
-    np.random.seed(seed_value)
+    Returns:
+        Dictionary of StoreForecast per store, with prediction interval bands
+    """
+    stores_data = {}
+    interval_model = get_interval_model(view_mode)
+    tensor = week_tensor_for(date)
 
-    # Add slight variations for different time periods
-    # Today: Base accuracy with small random variance
-    accuracy_today = base_accuracy + np.random.uniform(-0.5, 0.5)
+    for store in STORES:
+        if view_mode == 'hourly':
+            forecast = tensor.forecast(store, date)
+            weekdays = np.full(len(forecast.predicted), date.weekday())
+            slots = np.arange(len(forecast.predicted))
+        else:  # daily: reduction of the same hourly tensor
+            forecast = tensor.daily_forecast(store)
+            weekdays = np.arange(len(forecast.predicted))
+            slots = np.zeros(len(forecast.predicted), dtype=int)
 
-    # 3 Days: Slightly smoother (less variance)
-    accuracy_3days = base_accuracy + np.random.uniform(-0.3, 0.3)
+        # Empirical prediction interval from rolling residuals
+        stores_data[store] = forecast.with_bands(*interval_model.band(store, weekdays, slots, forecast.predicted))
 
-    # Week: Even smoother (rolling average effect)
-    accuracy_week = base_accuracy + np.random.uniform(-0.2, 0.2)
+    return stores_data
 
-    # Ensure values are within reasonable bounds
-    accuracy_today = np.clip(accuracy_today, 88.0, 98.0)
-    accuracy_3days = np.clip(accuracy_3days, 88.0, 98.0)
-    accuracy_week = np.clip(accuracy_week, 88.0, 98.0)
+@PROFILER.cache_calls("adjust_stores_data")
+@st.cache_resource(max_entries=32)
+@PROFILER.cache_misses("adjust_stores_data")
+def adjust_stores_data(_base_stores_data, _adjustments, view_mode, date, data_key):
+    """
+    Forecast with the manual adjustments applied
 
-    return accuracy_today, accuracy_3days, accuracy_week
+    Adjustments are hourly and dated ({store: {(date, hour): %}}). The hourly
+    view applies the selected date's hours; the daily view takes its totals
+    from the adjusted week tensor, so hourly changes carry into the week.
 
-def apply_traffic_adjustments(stores_data, adjustments_dict, view_mode='hourly'):
+    Keyed on the data fingerprint (see get_data_key); frames and adjustments
+    are not hashed. Shared read-only like generate_all_stores_data.
     """
-    Apply manual traffic adjustments and recalculate AI staffing recommendations
+    if view_mode == 'hourly':
+        return apply_traffic_adjustments(_base_stores_data, adjustments_for_date(_adjustments, date), view_mode)
+
+    # Daily: only stores with adjustments in this week get new totals
+    tensor = adjust_week_tensor(week_tensor_for(date), _adjustments, date, data_key)
+    totals = tensor.daily_totals()
+    week = {day.isoformat() for day in tensor.dates}
+    adjusted_data = dict(_base_stores_data)
+    for store, adjustments in _adjustments.items():
+        if any(day in week for day, _ in adjustments):
+            s = tensor.store_index[store]
+            adjusted_data[store] = _base_stores_data[store].with_traffic(totals['predicted'][s], totals['ai_staffing'][s])
+    return adjusted_data
 
-    Args:
-        stores_data: Dictionary of store dataframes
-        adjustments_dict: Dictionary of adjustments per store
-        view_mode: 'hourly' or 'daily'
+@st.cache_resource(max_entries=16)
+def adjust_week_tensor(_tensor, _adjustments, date, data_key):
+    """Week tensor with the dated hourly adjustments applied (keyed on the data fingerprint)"""
+    return _tensor.with_adjustments(_adjustments)
 
-    Returns:
-        Updated stores_data with adjusted predictions
+@st.cache_resource
+def get_reconciler():
+    """Sparse summing / MinT matrices of the store hierarchy (built once, shared across sessions)"""
+    return HierarchyReconciler(STORE_HIERARCHY)
+
+@PROFILER.cache_calls("calculate_aggregate_data")
+@st.cache_data(max_entries=32)
+@PROFILER.cache_misses("calculate_aggregate_data")
+def calculate_aggregate_data(_stores_data, view_mode, data_key):
+    """
+    Store traffic per time period and coherent totals for every hierarchy node (keyed on the data fingerprint)
+
+    Node totals come from the reconciler: bottom-up while only store-level
+    forecasts exist. Independent region / country / city forecasts would be
+    stacked on top of the store rows and passed through reconcile(base, 'mint').
     """
-    adjusted_data = {}
+    # Determine the time column name based on view mode
     time_col = 'Hour' if view_mode == 'hourly' else 'Day'
+    time_values = list(next(iter(_stores_data.values())).labels)
 
-    for store_name, df in stores_data.items():
-        df_copy = df.copy()
+    store_traffic = np.vstack([_stores_data[store].predicted for store in STORES])
+    node_traffic = get_reconciler().aggregate(store_traffic)
 
-        # Apply adjustments if any exist for this store
-        if store_name in adjustments_dict and adjustments_dict[store_name]:
-            for time_value, adjustment in adjustments_dict[store_name].items():
-                # Find the row for this time period
-                mask = df_copy[time_col] == time_value
-                if mask.any():
-                    # Apply percentage adjustment
-                    original_value = df_copy.loc[mask, 'Predicted_Traffic'].values[0]
-                    adjusted_value = int(original_value * (1 + adjustment / 100))
-                    df_copy.loc[mask, 'Predicted_Traffic'] = adjusted_value
-
-                    # Recalculate AI recommended staffing based on new traffic using proper logic
-                    if view_mode == 'hourly':
-                        # Hourly staffing logic (optimal 4-5:1 STA ratio)
-                        if adjusted_value <= 6:
-                            ai_staff = 1
-                        elif adjusted_value <= 12:
-                            ai_staff = 2
-                        elif adjusted_value <= 16:
-                            ai_staff = 3
-                        else:
-                            ai_staff = min(4, max(3, int(adjusted_value / 5)))  # Cap at 4 staff
-                    else:
-                        # Daily staffing logic (total staff-hours per day, ~5:1 ratio)
-                        ai_staff = max(int(adjusted_value / 5), 18)  # Minimum 18 staff-hours per day
+    columns = {time_col: time_values}
+    columns.update({store: _stores_data[store].predicted for store in STORES})
+    columns.update({node: node_traffic[row] for node, row in STORE_HIERARCHY.row.items()
+                    if not STORE_HIERARCHY.is_store(node)})
+    aggregate = pd.DataFrame(columns)
+    aggregate['Total_Traffic'] = aggregate[FLEET_NODE]
 
-                    df_copy.loc[mask, 'AI_Recommended_Staffing'] = ai_staff
+    return aggregate
 
-        adjusted_data[store_name] = df_copy
+@PROFILER.cache_calls("calculate_revenue_scenarios")
+@st.cache_data(max_entries=64)
+@PROFILER.cache_misses("calculate_revenue_scenarios")
+def calculate_revenue_scenarios(_stores_data, scope, data_key):
+    """
+    Monte Carlo P10/P50/P90 revenue ranges for the selected scope
 
-    return adjusted_data
+    Args:
+        _stores_data: Dictionary of StoreForecast per store (not hashed)
+        scope: Hierarchy node
+        data_key: Data fingerprint (see get_data_key)
 
-def calculate_adjusted_conversion_rate(sta_ratio):
+    Returns:
+        Dictionary of percentile summaries (see scenario_engine.simulate_revenue_impact)
     """
-    Calculate the adjusted conversion rate based on Shopper-to-Associate (STA) ratio
-    Calibrated for realistic Pandora jewelry store operations
+    return simulate_revenue_impact(*get_scope_arrays(STORE_HIERARCHY.stores_in(scope), _stores_data))
 
-    Logic:
-    - Baseline CR: 20% at 4:1 ratio (4 shoppers per 1 staff member)
-    - For every 1 additional shopper per staff, CR drops by 1.5% absolute
-    - For every 1 fewer shopper per staff, CR increases by 2.0% absolute
-    - Maximum CR: 30% (ceiling), Minimum CR: 5% (floor)
-    - At 15:1+ ratio, enters "survival mode" with accelerated CR decline
+def get_scope_arrays(scope_stores, stores_data):
+    """Stack traffic and staffing columns (stores × time periods) for the selected scope"""
+    scope_forecasts = [stores_data[store] for store in scope_stores]
 
-    Args:
-        sta_ratio: Shopper-to-Associate ratio (traffic / staff_count)
+    predicted_traffic = np.vstack([f.predicted for f in scope_forecasts]).astype(float)
+    baseline_staffing = np.vstack([f.baseline_staffing for f in scope_forecasts]).astype(float)
+    ai_staffing = np.vstack([f.ai_staffing for f in scope_forecasts]).astype(float)
+
+    return predicted_traffic, baseline_staffing, ai_staffing
+
+def get_adjustments_key(adjustments_dict):
+    """Small hashable fingerprint of the manual adjustments (stores without adjustments left out)"""
+    return tuple(sorted((store, tuple(sorted(adj.items()))) for store, adj in adjustments_dict.items() if adj))
+
+def commit_adjustments():
+    """Refresh the adjustment fingerprint after st.session_state.traffic_adjustments changed"""
+    adjustments = st.session_state.traffic_adjustments
+    for store in [store for store, store_adjustments in adjustments.items() if not store_adjustments]:
+        del adjustments[store]  # Keep the overlay sparse
+    st.session_state.adjustments_key = get_adjustments_key(st.session_state.traffic_adjustments)
+
+def slot_keys(time_value, selected_date, view_mode):
+    """Dated hourly adjustment keys behind an hour ('14:00') or day ('Friday') of the current view"""
+    if view_mode == 'hourly':
+        return [(selected_date.isoformat(), time_value)]
+    day = week_dates(selected_date)[forecast_data.DAYS.index(time_value)].isoformat()
+    return [(day, hour) for hour in forecast_data.HOURS]
+
+def view_adjustments(store_adjustments, selected_date, view_mode):
+    """
+    One store's dated hourly adjustments as shown in the current view
 
     Returns:
-        Adjusted conversion rate as decimal (0.20 = 20%)
+        {hour or day label: percentage}; a day whose hours carry different
+        adjustments (or only some hours) maps to None
     """
-    baseline_ratio = 4.0  # 4 shoppers per 1 staff (optimal)
-    baseline_cr = 0.20    # 20% baseline conversion
-
-    # Calculate difference from baseline
-    ratio_difference = sta_ratio - baseline_ratio
-
-    if ratio_difference > 0:
-        # Higher ratio (understaffed) - CR drops
-        # Accelerated decline if ratio exceeds 15:1 (survival mode)
-        if sta_ratio > 15:
-            # Survival mode: staff only process transactions, stop selling
-            # Base decline + accelerated penalty
-            base_decline = 11 * 0.015  # First 11 points of decline (from 4:1 to 15:1)
-            survival_penalty = (sta_ratio - 15) * 0.025  # 2.5% per point above 15:1
-            adjusted_cr = baseline_cr - base_decline - survival_penalty
-        else:
-            # Normal decline: 1.5% per additional shopper per staff
-            adjusted_cr = baseline_cr - (ratio_difference * 0.015)
-    else:
-        # Lower ratio (better staffed) - CR increases by 2.0% per fewer shopper per staff
-        adjusted_cr = baseline_cr + (abs(ratio_difference) * 0.020)
+    by_date = group_adjustments_by_date(store_adjustments)
+    if view_mode == 'hourly':
+        return by_date.get(selected_date.isoformat(), {})
+
+    shown = {}
+    for label, day in zip(forecast_data.DAYS, week_dates(selected_date)):
+        hours = by_date.get(day.isoformat())
+        if hours:
+            values = set(hours.values())
+            uniform = len(hours) == len(forecast_data.HOURS) and len(values) == 1
+            shown[label] = values.pop() if uniform else None
+    return shown
+
+def get_data_key(selected_date, view_mode, data_version, intervals_version, intraday_version=0):
+    """
+    Small immutable fingerprint of the displayed forecast state
 
-    # Apply ceiling of 30% and floor of 5% (minimum viable conversion)
-    adjusted_cr = min(max(adjusted_cr, 0.05), 0.30)
+    Cached stages take their store data with a leading underscore (not hashed)
+    plus this key, so a cache lookup costs the same for 3 or 600 stores.
+    Everything in it is precomputed: the forecast version (store set and
+    inputs, see forecast_version) once per rerun, and the adjustment
+    fingerprint only when adjustments change (commit_adjustments).
+    """
+    return (data_version, selected_date.isoformat(), view_mode, intervals_version, intraday_version,
+            st.session_state.adjustments_key)
+
+@PROFILER.cache_calls("build_whatif_baseline")
+@st.cache_data(max_entries=32)
+@PROFILER.cache_misses("build_whatif_baseline")
+def build_whatif_baseline(_original_data, _adjusted_data, _adjustments, view_mode, date, data_key):
+    """
+    Baseline aggregates for what-if evaluation
 
-    return adjusted_cr
+    Slots are (date, hour) pairs in both views, so evaluated candidates come
+    back as dated hourly adjustments.
 
-def calculate_dynamic_revenue(traffic, staffing, atv_dkk=931.25):
+    The DataFrame arguments are not hashed (leading underscore); the cache is
+    keyed on the data fingerprint instead.
     """
-    Calculate potential revenue based on dynamic conversion rate
+    if view_mode == 'daily':
+        # Day-level candidates are evaluated hour by hour over the week
+        week_tensor = week_tensor_for(date)
+        return WhatIfBaseline.from_tensors(week_tensor, adjust_week_tensor(week_tensor, _adjustments, date, data_key))
+
+    day = date.isoformat()
+    return WhatIfBaseline.from_forecasts(_original_data, _adjusted_data, view_mode,
+                                         time_values=[(day, hour) for hour in forecast_data.HOURS])
+
+@PROFILER.cache_calls("plan_staff_sharing")
+@st.cache_resource(max_entries=16)
+@PROFILER.cache_misses("plan_staff_sharing")
+def plan_staff_sharing(_stores_data, city, n_floaters, data_key):
+    """
+    Floater plan of a city cluster over the displayed hourly forecast
 
-    Args:
-        traffic: Total customer visits
-        staffing: Total staff count (number of employees)
-        atv_dkk: Average ticket value in DKK (default: 931.25 = $125 × 7.45)
+    Floaters come on top of the AI-recommended staffing of each store (see
+    staff_sharing.optimize_floaters). Keyed on the data fingerprint; the
+    forecasts are not hashed.
+    """
+    stores = STORE_HIERARCHY.stores_in(city)
+    traffic = np.array([_stores_data[store].predicted for store in stores])
+    staff = np.array([_stores_data[store].ai_staffing for store in stores])
+    return optimize_floaters(stores, traffic, staff, n_floaters)
+
+def format_whatif_deltas(result):
+    """HTML row with the KPI deltas of a what-if evaluation"""
+    delta = result['delta']
+
+    def delta_color(value):
+        return "#34C759" if value > 0 else "#E74C3C" if value < 0 else "#6B6B6B"
+
+    return WHATIF_DELTAS.render(
+        ai_revenue=delta['ai_revenue'], ai_revenue_color=delta_color(delta['ai_revenue']),
+        lost_revenue=delta['lost_revenue'], lost_revenue_color=delta_color(delta['lost_revenue']),
+        ai_staffing=delta['ai_staffing'], ai_staffing_color=delta_color(delta['ai_staffing'])
+    )
+
+@PROFILER.cache_calls("build_forecast_rollup")
+@st.cache_resource(max_entries=32)
+@PROFILER.cache_misses("build_forecast_rollup")
+def build_forecast_rollup(_stores_data, _whatif_baseline, data_key):
+    """
+    Traffic, staffing and accuracy totals for every hierarchy node
+
+    Built once per forecast/adjustment state (read-only, shared); switching
+    scope is then a single row lookup.
+    """
+    accuracy = [calculate_store_accuracy(_stores_data[store]) for store in STORES]
+    idx = [_whatif_baseline.store_index[store] for store in STORES]
+
+    return HierarchyRollup(STORE_HIERARCHY, {
+        'traffic': _whatif_baseline.store_traffic[idx],
+        'baseline_staffing': _whatif_baseline.store_baseline_staffing[idx],
+        'ai_staffing': _whatif_baseline.store_ai_staffing[idx],
+        'accuracy_sum': [a[0] for a in accuracy],
+        'accuracy_count': [a[1] for a in accuracy],
+        'store_count': np.ones(len(STORES))
+    })
+
+@PROFILER.cache_calls("build_backtest_rollup")
+@st.cache_resource(max_entries=8)
+@PROFILER.cache_misses("build_backtest_rollup")
+def build_backtest_rollup(selected_date, fleet_version):
+    """
+    Day-ahead backtest error sums over the 3 and 7 days up to the selected date, for every hierarchy node
+
+    Origins run in this process (no pool inside the app server) and come
+    from the on-disk backtest cache after the first run, so only new days
+    are forecast. Days without a full day of actuals (today onwards) are
+    left out. Keyed on the fleet's cache version, so changed inputs re-run
+    the backtest (for the affected stores only, see ForecastCache).
+    """
+    last_target = min(selected_date, datetime.now().date() - timedelta(days=1))
+    origins = rolling_origins(last_target, BACKTEST_WINDOW_DAYS, horizon=1)
+    targets, abs_error, actual = run_backtest(STORES, origins, horizon=1, workers=1,
+                                              cache=get_backtest_cache()).error_sums(horizon=1)
+    metrics = {}
+    for window, days in (('3d', 3), ('7d', 7)):
+        metrics[f'abs_error_{window}'] = abs_error[:, -days:].sum(axis=1)
+        metrics[f'actual_{window}'] = actual[:, -days:].sum(axis=1)
+    return HierarchyRollup(STORE_HIERARCHY, metrics)
+
+@st.cache_resource
+def get_backtest_cache():
+    """On-disk cache of backtest forecasts (shared across sessions)"""
+    return ForecastCache()
+
+@PROFILER.cache_calls("get_shared_decision_history")
+@st.cache_resource(max_entries=2)
+@PROFILER.cache_misses("get_shared_decision_history")
+def get_shared_decision_history(today):
+    """
+    Decision history before today and its adoption index (shared across sessions, read-only)
+
+    Each session records its own decisions in st.session_state.decision_overlay;
+    the shared history and index are never written.
 
     Returns:
-        Dictionary with revenue details:
-        - 'revenue': Total potential revenue
-        - 'conversion_rate': Applied conversion rate
-        - 'sta_ratio': Calculated shopper-to-associate ratio
+        Tuple of (history {store: {date_str: {'decision': 1/0}}}, AdoptionIndex)
+    """
+    # Mock historical implementation data per store (last 29 days, excluding today), one source per store
+    history, report = load_all(
+        {store: partial(generate_decision_history, store, today) for store in STORES},
+        fallback=lambda store: {}  # Unavailable history: no recorded decisions
+    )
+    record_load_report('decision_history', report)
+    return history, AdoptionIndex.from_history(STORES, history, today)
+
+def get_adoption_index():
+    """Adoption index of this session: the shared index with the session's decisions on top"""
+    _, index = get_shared_decision_history(datetime.now().date())
+    return index.with_overlay(st.session_state.decision_overlay)
+
+def get_store_history(store):
+    """Implementation history of one store: shared history merged with the session's decisions"""
+    history, _ = get_shared_decision_history(datetime.now().date())
+    return {store: {**history.get(store, {}), **st.session_state.decision_overlay.get(store, {})}}
+
+def record_decision(store, decision):
+    """Record today's staffing decision for a store (1 = Following AI, 0 = Legacy) in the session overlay"""
+    today_str = datetime.now().strftime('%Y-%m-%d')
+    st.session_state.decision_overlay.setdefault(store, {})[today_str] = {'decision': decision}
+
+@st.cache_resource(max_entries=32)
+def build_adoption_rollup(today, overlay_key):
     """
-    if staffing <= 0:
-        staffing = 1  # Avoid division by zero
+    AI-following days (today, last 3 days, last week) per hierarchy node
 
-    # Calculate STA ratio (shoppers per staff member)
-    sta_ratio = traffic / staffing
+    Keyed on the date and the session's decisions, so sessions without
+    decisions of their own share one rollup.
+    """
+    overlay = {}
+    for store, date_str, decision in overlay_key:
+        overlay.setdefault(store, {})[date_str] = {'decision': decision}
+    _, index = get_shared_decision_history(today)
+    index = index.with_overlay(overlay)
+
+    idx = [index.store_index[store] for store in STORES]
+    return HierarchyRollup(STORE_HIERARCHY, {
+        'ai_days_today': index.ai_days('today')[idx],
+        'ai_days_3days': index.ai_days('3d')[idx],
+        'ai_days_week': index.ai_days('7d')[idx],
+        'store_count': np.ones(len(STORES))
+    })
 
-    # Get adjusted conversion rate based on STA ratio
-    adjusted_cr = calculate_adjusted_conversion_rate(sta_ratio)
+def get_adoption_rollup():
+    """AI-following days per hierarchy node for this session (see build_adoption_rollup)"""
+    overlay_key = tuple(sorted(
+        (store, date_str, implementation['decision'])
+        for store, days in st.session_state.decision_overlay.items()
+        for date_str, implementation in days.items()
+    ))
+    return build_adoption_rollup(datetime.now().date(), overlay_key)
 
-    # Calculate revenue
-    revenue = int(traffic * adjusted_cr * atv_dkk)
+def enforce_session_memory_cap(selected_date):
+    """
+    Measure this session's state and trim its overlays when over the cap
 
-    return {
-        'revenue': revenue,
-        'conversion_rate': adjusted_cr,
-        'sta_ratio': sta_ratio
-    }
+    Adjustments for dates outside the week on screen are dropped oldest
+    first, and decisions older than the adoption horizon are forgotten.
+
+    Returns:
+        Tuple of (bytes per state key, ISO dates of adjustments dropped)
+    """
+    horizon_start = (datetime.now().date() - timedelta(days=ADOPTION_HORIZON_DAYS - 1)).isoformat()
+    for store in list(st.session_state.decision_overlay):
+        days = st.session_state.decision_overlay[store]
+        for date_str in [date_str for date_str in days if date_str < horizon_start]:
+            del days[date_str]
+        if not days:
+            del st.session_state.decision_overlay[store]
+
+    footprint = measure_session({key: st.session_state[key] for key in st.session_state})
+    removed = []
+    excess = sum(footprint.values()) - SESSION_MEMORY_CAP_BYTES
+    if excess > 0:
+        keep_dates = {day.isoformat() for day in week_dates(selected_date)}
+        budget = footprint.get('traffic_adjustments', 0) - excess
+        removed = trim_adjustments(st.session_state.traffic_adjustments, keep_dates, budget)
+        if removed:
+            commit_adjustments()
+            footprint = measure_session({key: st.session_state[key] for key in st.session_state})
+    return footprint, removed
 
 # ============================================================================
 # METRIC COLOR HELPERS
 # ============================================================================
 
+STORE_COLORS = {
+    "London": "#F2B8C6",
+    "Copenhagen": "#E5A0B1",
+    "Paris": "#D88D9C"
+}
+STORE_PALETTE = ["#F2B8C6", "#E5A0B1", "#D88D9C", "#C97B8B", "#F7CCD7", "#B8697A"]
+
+def get_store_color(store_name):
+    """Store color for charts (fixed for the pilot stores, palette by position otherwise)"""
+    if store_name in STORE_COLORS:
+        return STORE_COLORS[store_name]
+    return STORE_PALETTE[STORES.index(store_name) % len(STORE_PALETTE)]
+
 def get_adoption_color(value):
     """AI Adoption Rate: <60% red, 60-80% orange, >80% green"""
     if value < 60:
@@ -763,141 +876,500 @@ def get_accuracy_color(value):
         return "#34C759"  # Green
 
 # ============================================================================
-# SESSION STATE INITIALIZATION
+# INTERACTIVE FRAGMENTS
+# Widgets that rerun on their own (st.fragment) with the data they need passed
+# in from the full run; only actions that change shared state rerun the app
 # ============================================================================
-if 'traffic_adjustments' not in st.session_state:
-    st.session_state.traffic_adjustments = {
-        "London": {},
-        "Copenhagen": {},
-        "Paris": {}
-    }
-if 'view_mode' not in st.session_state:
-    st.session_state.view_mode = 'hourly'
-if 'scope' not in st.session_state:
-    st.session_state.scope = "All Stores (Aggregate)"
-if 'implementation_history' not in st.session_state:
-    # Generate mock historical implementation data per store (last 29 days, excluding today)
-    import random
-    np.random.seed(42)
-
-    stores = ["London", "Copenhagen", "Paris"]
-    history = {}
-
-    for store in stores:
-        history[store] = {}
-        # Generate 29 days of mock data (excluding today so user can make today's choice)
-        for i in range(1, 30):
-            date = (datetime.now() - timedelta(days=i)).strftime('%Y-%m-%d')
-            # Simulate historical implementation decisions - different adoption rates per store
-            # 1 = Following AI, 0 = Using Legacy
-            if store == "London":
-                # London has very high adoption (95%)
-                decision = 1 if random.random() < 0.95 else 0
-            elif store == "Copenhagen":
-                # Copenhagen has high adoption (85%)
-                decision = 1 if random.random() < 0.85 else 0
-            else:  # Paris
-                # Paris has very high adoption (95%)
-                decision = 1 if random.random() < 0.95 else 0
-
-            history[store][date] = {'decision': decision}
-
-        # Explicitly ensure today is NOT in the history (user must click button first)
-        today_str = datetime.now().strftime('%Y-%m-%d')
-        if today_str in history[store]:
-            del history[store][today_str]
-
-    st.session_state.implementation_history = history
-
-# Track which stores have today's decision made (persistent across reruns)
-if 'todays_decisions' not in st.session_state:
-    st.session_state.todays_decisions = set()  # Set of store names that have today's decision
-
-# Check if we need to reset todays_decisions for a new day
-if 'last_check_date' not in st.session_state:
-    st.session_state.last_check_date = datetime.now().strftime('%Y-%m-%d')
-
-current_date = datetime.now().strftime('%Y-%m-%d')
-if st.session_state.last_check_date != current_date:
-    # It's a new day, reset all decisions
-    st.session_state.todays_decisions = set()
-    st.session_state.last_check_date = current_date
-
-# Always clear today's data for stores that haven't made a decision yet
-today_str = datetime.now().strftime('%Y-%m-%d')
-for store in ["London", "Copenhagen", "Paris"]:
-    if store not in st.session_state.todays_decisions:
-        # User hasn't made decision for this store today, so clear any existing data
-        if store in st.session_state.implementation_history:
-            st.session_state.implementation_history[store].pop(today_str, None)
+def render_adoption_card(slot, scope):
+    """AI Adoption Rate card of a node into its placeholder (today, 3 days, week)"""
+    # Calculate actual AI adoption rates from implementation history (rolled up per node)
+    # Days without a recorded decision count as not following AI
+    adoption_rollup = get_adoption_rollup()
+    store_count = adoption_rollup.get(scope, 'store_count')
+    adoption_today = adoption_rollup.get(scope, 'ai_days_today') / store_count * 100
+    adoption_3days = adoption_rollup.get(scope, 'ai_days_3days') / (store_count * 3) * 100
+    adoption_week = adoption_rollup.get(scope, 'ai_days_week') / (store_count * 7) * 100
+
+    slot.markdown(METRIC_CARD.render(
+        title="🎯 AI Adoption Rate",
+        color_today=get_adoption_color(adoption_today), value_today=f"{adoption_today:.0f}%",
+        color_3days=get_adoption_color(adoption_3days), value_3days=f"{adoption_3days:.0f}%",
+        color_week=get_adoption_color(adoption_week), value_week=f"{adoption_week:.0f}%",
+        footer_background="#F0F9FF", footer="% of days following AI recommendations"
+    ), unsafe_allow_html=True)
+
+@st.fragment
+def adjustment_tool(scope, selected_date, time_options, time_label, base_stores_data, stores_data,
+                    whatif_baseline, scope_stores):
+    """
+    Single-store traffic adjustment with a live what-if preview
 
-# ============================================================================
-# HELPER FUNCTIONS FOR FEEDBACK
-# ============================================================================
+    Runs as a fragment: changing the hour or moving the slider reruns only
+    this panel against the what-if baseline handed over by the full run.
+    Apply and Reset change the forecast that the KPIs, charts, tables,
+    rollups and staff sharing all read, so they rerun the whole app; the
+    cached stages recompute only the adjusted store (see adjust_stores_data).
+    """
+    with PROFILER.fragment("adjustment_tool"):
+        st.caption("Fine-tune predictions based on your insights")
+
+        selected_time = st.selectbox(time_label, time_options, key="adj_time")
+
+        # Get original value for this time period
+        current_forecast = stores_data[scope]
+        original_value = int(base_stores_data[scope].predicted[current_forecast.slot(selected_time)])
+
+        # Get current adjustment if exists (days with differing hourly adjustments start at 0)
+        scope_adjustments = view_adjustments(st.session_state.traffic_adjustments.get(scope, {}), selected_date,
+                                             st.session_state.view_mode)
+        current_adjustment = scope_adjustments.get(selected_time) or 0
+
+        # Adjustment slider
+        adjustment = st.slider(
+            "Adjust Traffic (%)",
+            min_value=-50,
+            max_value=50,
+            value=current_adjustment,
+            step=5,
+            help="Adjust predicted traffic up or down by percentage"
+        )
 
-def generate_implementation_calendar(store_name):
-    """Generate a calendar heatmap of AI adoption for a specific store"""
-    # Get last 30 days including today
-    dates = []
-    decisions = []
+        # Show preview (adjustments are percentages of the original forecast)
+        adjusted_value = int(original_value * (1 + adjustment / 100))
 
-    for i in range(30):
-        date = datetime.now() - timedelta(days=29-i)
-        date_str = date.strftime('%Y-%m-%d')
+        # What-if: KPI deltas for this candidate, evaluated against cached baseline aggregates
+        selected_keys = slot_keys(selected_time, selected_date, st.session_state.view_mode)
+        whatif_result = evaluate_adjustment(whatif_baseline, [scope], selected_keys, adjustment, scope_stores)
 
-        if store_name in st.session_state.implementation_history and date_str in st.session_state.implementation_history[store_name]:
-            implementation = st.session_state.implementation_history[store_name][date_str]
-            decision = implementation['decision']  # 1 = AI, 0 = Legacy
+        # Display as custom HTML with white background
+        st.markdown(ADJUSTMENT_PREVIEW.render(
+            original_value=original_value, adjusted_value=adjusted_value, adjustment=adjustment,
+            adjustment_color='#34C759' if adjustment > 0 else '#E74C3C' if adjustment < 0 else '#6B6B6B',
+            deltas=format_whatif_deltas(whatif_result)
+        ), unsafe_allow_html=True)
+
+        # Apply button
+        col_a, col_b = st.columns(2)
+        with col_a:
+            if st.button("✓ Apply", use_container_width=True):
+                for key in selected_keys:
+                    if adjustment != 0:
+                        st.session_state.traffic_adjustments.setdefault(scope, {})[key] = adjustment
+                    else:
+                        # Remove adjustment if set to 0
+                        st.session_state.traffic_adjustments.get(scope, {}).pop(key, None)
+                commit_adjustments()
+                st.rerun()
+
+        with col_b:
+            if st.button("↺ Reset All", use_container_width=True):
+                st.session_state.traffic_adjustments.pop(scope, None)
+                commit_adjustments()
+                st.rerun()
+
+        # Show active adjustments
+        if scope_adjustments:
+            st.caption(f"**Active Adjustments ({len(scope_adjustments)}):**")
+            time_emoji = "🕐" if st.session_state.view_mode == 'hourly' else "📅"
+            for time_period, adj in scope_adjustments.items():
+                st.caption(f"{time_emoji} {time_period}: {'hourly adjustments' if adj is None else f'{adj:+d}%'}")
+
+@st.fragment
+def bulk_adjustment_tool(selected_date, time_options, whatif_baseline, scope_stores):
+    """Bulk what-if over many stores × time periods (fragment: previews rerun only this expander)"""
+    with PROFILER.fragment("bulk_adjustment_tool"):
+        with st.expander("📦 Bulk Adjustment (What-If)"):
+            bulk_stores = st.multiselect("Stores", whatif_baseline.stores, default=scope_stores, key="bulk_stores")
+            bulk_range = st.select_slider(
+                "Time Range", options=time_options, value=(time_options[0], time_options[-1]), key="bulk_range"
+            )
+            bulk_adjustment = st.slider("Adjust Traffic (%)", min_value=-50, max_value=50, value=0, step=5, key="bulk_adj")
+
+            bulk_times = time_options[time_options.index(bulk_range[0]):time_options.index(bulk_range[1]) + 1]
+            bulk_keys = [key for time_value in bulk_times
+                         for key in slot_keys(time_value, selected_date, st.session_state.view_mode)]
+
+            if bulk_stores:
+                bulk_result = evaluate_adjustment(whatif_baseline, bulk_stores, bulk_keys, bulk_adjustment, scope_stores)
+
+                st.markdown(BULK_PREVIEW.render(
+                    changed_slots=bulk_result['changed_slots'], adjustment=bulk_adjustment,
+                    deltas=format_whatif_deltas(bulk_result)
+                ), unsafe_allow_html=True)
+
+                if st.button(f"✓ Apply to {bulk_result['changed_slots']} slots", use_container_width=True, key="bulk_apply"):
+                    for store_name, store_adjustments in bulk_result['adjustments'].items():
+                        for time_value, value in store_adjustments.items():
+                            if value != 0:
+                                st.session_state.traffic_adjustments.setdefault(store_name, {})[time_value] = value
+                            else:
+                                # Remove adjustment if set to 0
+                                st.session_state.traffic_adjustments.get(store_name, {}).pop(time_value, None)
+                    commit_adjustments()
+                    st.rerun()
+            else:
+                st.caption("Select at least one store")
+
+@st.fragment
+def decision_panel(scope, stores_data, adoption_card_slot):
+    """
+    Store view of AI adoption: 30-day calendar, today's decision buttons and status
+
+    Runs as a fragment: recording a decision reruns only this panel, which
+    redraws the calendar and refreshes the AI Adoption card through the
+    placeholder handed over by the full run.
+    """
+    with PROFILER.fragment("decision_panel"):
+        render_adoption_card(adoption_card_slot, scope)
+
+        # STORE-SPECIFIC: Show 30-day calendar for this store
+        df_calendar = generate_implementation_calendar(scope, get_store_history(scope))
+
+        # Create calendar heatmap (Plotly is imported by the first chart that renders)
+        import plotly.graph_objects as go
+        fig_calendar = go.Figure()
+
+        # Group by week and day of week
+        weeks = sorted(df_calendar['Week'].unique())
+        days_order = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
+
+        # Prepare data for heatmap - calculate cumulative adoption rate for each day
+        heatmap_data = []
+        hover_text = []
+
+        # Sort calendar by date to calculate cumulative adoption
+        df_calendar_sorted = df_calendar.sort_values('Date')
+
+        for week in weeks:
+            week_data = []
+            week_hover = []
+            for day in days_order:
+                mask = (df_calendar['Week'] == week) & (df_calendar['Day'] == day)
+                if mask.any():
+                    row = df_calendar[mask].iloc[0]
+                    current_date = row['Date']
+
+                    # Calculate adoption rate up to and including this day
+                    up_to_mask = df_calendar_sorted['Date'] <= current_date
+                    decisions_up_to = df_calendar_sorted[up_to_mask]['Decision'].values
+
+                    ai_count = sum(1 for d in decisions_up_to if d == 1)
+                    total_count = sum(1 for d in decisions_up_to if d is not None)
+
+                    if total_count > 0:
+                        adoption_rate = (ai_count / total_count) * 100
+                        legacy_count = total_count - ai_count
+                        week_data.append(adoption_rate)
+                        date_str = row['Date'].strftime('%b %d, %Y')
+
+                        # Get today's specific decision for this cell
+                        today_date_str = datetime.now().strftime('%Y-%m-%d')
+                        is_today = row['Date'].strftime('%Y-%m-%d') == today_date_str
+                        today_marker = " 📍 TODAY" if is_today else ""
+
+                        week_hover.append(
+                            f"<b>{date_str}{today_marker}</b><br>"
+                            f"<b style='font-size:16px'>{adoption_rate:.1f}%</b> AI Adoption<br>"
+                            f"<br>"
+                            f"AI Clicks: <b>{ai_count}</b><br>"
+                            f"Legacy Clicks: <b>{legacy_count}</b><br>"
+                            f"Total Clicks: <b>{total_count}</b>"
+                        )
+                    else:
+                        week_data.append(None)  # No decision yet
+                        date_str = row['Date'].strftime('%b %d, %Y')
+
+                        # Check if this is today
+                        today_date_str = datetime.now().strftime('%Y-%m-%d')
+                        is_today = row['Date'].strftime('%Y-%m-%d') == today_date_str
+                        if is_today:
+                            week_hover.append(f"<b>{date_str} 📍 TODAY</b><br>⏳ Waiting for your decision...")
+                        else:
+                            week_hover.append(f"<b>{date_str}</b><br>No decision recorded")
+                else:
+                    week_data.append(None)
+                    week_hover.append("")
+            heatmap_data.append(week_data)
+            hover_text.append(week_hover)
+
+        # Transpose for correct orientation
+        heatmap_data = list(map(list, zip(*heatmap_data)))
+        hover_text = list(map(list, zip(*hover_text)))
+
+        fig_calendar.add_trace(go.Heatmap(
+            z=heatmap_data,
+            x=[f'Week {w+1}' for w in weeks],
+            y=days_order,
+            colorscale=[
+                [0, '#E74C3C'],      # Red (0% - all legacy)
+                [0.6, '#FF9500'],    # Orange (60% - threshold)
+                [0.8, '#FFC107'],    # Yellow (80% - warning)
+                [1, '#34C759']       # Green (100% - all AI)
+            ],
+            text=hover_text,
+            hovertemplate='%{text}<extra></extra>',
+            showscale=True,
+            colorbar=dict(
+                title="AI Adoption %",
+                tickvals=[0, 60, 80, 100],
+                ticktext=["0%", "60%", "80%", "100%"],
+                thickness=15,
+                len=0.7
+            ),
+            zmin=0,
+            zmax=100,
+            zmid=80  # Center the colorscale around 80% (target threshold)
+        ))
+
+        fig_calendar.update_layout(
+            plot_bgcolor='#FFFFFF',
+            paper_bgcolor='#FFFFFF',
+            font=dict(family='Inter', color='#1A1A1A', size=12),
+            xaxis=dict(
+                title='',
+                showgrid=False,
+                side='top',
+                tickfont=dict(size=12, color='#1A1A1A')
+            ),
+            yaxis=dict(
+                title='',
+                showgrid=False,
+                tickfont=dict(size=12, color='#1A1A1A')
+            ),
+            height=280,
+            margin=dict(l=60, r=40, t=60, b=30)
+        )
+
+        st.plotly_chart(fig_calendar, width='stretch')
+
+        # Get AI recommendation for display
+        if scope in stores_data:
+            store_forecast = stores_data[scope]
+            ai_fte_avg = store_forecast.ai_staffing.mean()
+            baseline_fte_avg = store_forecast.baseline_staffing.mean()
         else:
-            decision = None
+            ai_fte_avg = 0
+            baseline_fte_avg = 0
 
-        dates.append(date)
-        decisions.append(decision)
+        # Implementation decision buttons
+        st.markdown(DECISION_PROMPT.render(
+            scope=scope, ai_fte_avg=ai_fte_avg, baseline_fte_avg=baseline_fte_avg
+        ), unsafe_allow_html=True)
 
-    # Create calendar grid data
-    df_calendar = pd.DataFrame({
-        'Date': dates,
-        'Decision': decisions,  # 1 = Following AI, 0 = Using Legacy, None = No decision yet
-        'Day': [d.strftime('%a') for d in dates],
-        'Week': [(d - dates[0]).days // 7 for d in dates]
-    })
+        col_fb1, col_fb2 = st.columns(2)
 
-    return df_calendar
+        # Decisions are recorded in the click callbacks, which run before the panel
+        # redraws, so the calendar above and the status below already show them
+        with col_fb1:
+            st.button("✓ Following AI", use_container_width=True, key=f"ai_{scope}", type="primary",
+                      on_click=record_decision, args=(scope, 1))
 
-def get_store_adoption_summary():
-    """Get AI adoption rate for all stores (for regional manager view)"""
-    stores = ["London", "Copenhagen", "Paris"]
-    summary = []
+        with col_fb2:
+            st.button("⊗ Using Legacy", use_container_width=True, key=f"legacy_{scope}",
+                      on_click=record_decision, args=(scope, 0))
 
-    for store in stores:
-        if store in st.session_state.implementation_history:
-            total_days = 0
-            ai_days = 0
+        # Show today's decision status
+        decision = get_adoption_index().decision(scope)
+
+        if decision != NO_DECISION:
+            if decision == 1:
+                st.success("✅ **Today's Decision Recorded**: Following AI Recommendation - The heatmap has been updated!")
+            else:
+                st.warning("⚠️ **Today's Decision Recorded**: Using Legacy System - The heatmap has been updated!")
+        else:
+            st.info("⏳ **No decision recorded yet for today** - Click a button above to record your staffing decision")
+
+@st.fragment
+def adoption_leaderboard(scope):
+    """Regional view of AI adoption: leaders and laggards under a node (fragment: the window radio reruns only this chart)"""
+    with PROFILER.fragment("adoption_leaderboard"):
+        # REGIONAL MANAGER VIEW: Leaders and laggards among the stores under this node
+        adoption_index = get_adoption_index()
+        node_span = STORE_HIERARCHY.span[scope]
+        window_label = st.radio(
+            "Adoption Window", list(ADOPTION_WINDOWS), index=len(ADOPTION_WINDOWS) - 1,
+            horizontal=True, key="adoption_window"
+        )
+        window = ADOPTION_WINDOWS[window_label]
+
+        # Small nodes show every store; large ones only the top-k and bottom-k
+        n_node_stores = node_span[1] - node_span[0]
+        if n_node_stores <= 2 * LEADERBOARD_K:
+            leaderboard = adoption_index.top_k(window, n_node_stores, node_span)
+        else:
+            leaders = adoption_index.top_k(window, LEADERBOARD_K, node_span)
+            laggards = adoption_index.bottom_k(window, LEADERBOARD_K, node_span)
+            leaderboard = leaders + laggards[::-1]
+            st.caption(f"Top {LEADERBOARD_K} and bottom {LEADERBOARD_K} of {n_node_stores} stores")
 
-            for date_str, implementation in st.session_state.implementation_history[store].items():
-                total_days += 1
-                if implementation['decision'] == 1:  # Following AI
-                    ai_days += 1
+        board_stores = [store for store, _, _ in leaderboard]
+        board_rates = [rate for _, rate, _ in leaderboard]
 
-            if total_days > 0:
-                adoption_rate = (ai_days / total_days) * 100
+        # Create bar chart comparing stores
+        import plotly.graph_objects as go
+        fig_comparison = go.Figure()
+
+        fig_comparison.add_trace(go.Bar(
+            x=board_stores,
+            y=board_rates,
+            marker=dict(
+                color=[get_store_color(store) for store in board_stores],
+                line=dict(color='#2C2C2C', width=1)
+            ),
+            text=[f"{rate:.1f}%" for rate in board_rates],
+            textposition='outside',
+            hovertemplate='<b>%{x}</b><br>AI Adoption: %{y:.1f}%<br>Days Tracked: %{customdata}<extra></extra>',
+            customdata=[days for _, _, days in leaderboard]
+        ))
+
+        # Add threshold line at 80% (target adoption)
+        fig_comparison.add_hline(
+            y=TARGET_ADOPTION,
+            line_dash="dash",
+            line_color="#34C759",
+            annotation_text="Target (80%)",
+            annotation_position="right"
+        )
+
+
+        fig_comparison.update_layout(
+            plot_bgcolor='#FFFFFF',
+            paper_bgcolor='#FFFFFF',
+            font=dict(family='Inter', color='#1A1A1A', size=12),
+            xaxis=dict(
+                title='',
+                showgrid=False,
+                showline=True,
+                linewidth=2,
+                linecolor='#4A4A4A',
+                tickfont=dict(size=12, color='#1A1A1A')
+            ),
+            yaxis=dict(
+                title=dict(text='AI Adoption Rate (%)', font=dict(size=14, color='#1A1A1A', family='Inter')),
+                showgrid=True,
+                gridcolor='#F0F0F0',
+                range=[0, 100],
+                showline=True,
+                linewidth=2,
+                linecolor='#4A4A4A',
+                tickfont=dict(size=12, color='#1A1A1A')
+            ),
+            height=450,
+            margin=dict(l=60, r=100, t=60, b=60)
+        )
+
+        st.plotly_chart(fig_comparison, width='stretch')
+
+        # Regional summary
+        col_r1, col_r2, col_r3 = st.columns(3)
+        # Use 80% threshold to match the target line on the chart
+        node_adoption = adoption_index.summary(window, node_span)
+        best_store = board_stores[0] if board_stores else "—"
+        low_adoption = [store for store, rate, _ in adoption_index.bottom_k(window, LEADERBOARD_K, node_span)
+                        if rate < TARGET_ADOPTION]
+
+        with col_r1:
+            st.metric("Regional Avg", f"{node_adoption['mean']:.1f}%", delta="AI Adoption")
+        with col_r2:
+            st.metric("Top Adopter", best_store)
+        with col_r3:
+            if node_adoption['below_target'] > 0:
+                more = node_adoption['below_target'] - len(low_adoption)
+                stores_list = ", ".join(low_adoption) + (f" +{more} more" if more > 0 else "")
+                st.metric("Needs Support", node_adoption['below_target'], delta=stores_list, delta_color="off")
             else:
-                adoption_rate = 0
+                st.metric("Needs Support", "None ✓")
+
+@st.fragment
+def export_tool(scope, selected_date, scope_stores):
+    """
+    Download of the scope's forecast and staffing plan (CSV, plus Parquet / Excel when installed)
+
+    The file is only generated when the button is clicked (deferred
+    download data), chunk by chunk with the adjustments of this session.
+    """
+    with PROFILER.fragment("export_tool"):
+        st.markdown("### 📥 Export Forecast")
+        horizon = st.selectbox("Horizon", list(EXPORT_HORIZONS), format_func=EXPORT_HORIZONS.get, key="export_horizon")
+        granularity = st.radio("Rows", ['hourly', 'daily'], format_func=str.capitalize, horizontal=True,
+                               index=0 if st.session_state.view_mode == 'hourly' else 1, key="export_granularity")
+        fmt = st.selectbox("Format", available_formats(), format_func=lambda f: EXPORT_FORMATS[f]['label'],
+                           key="export_format")
+
+        dates = horizon_dates(selected_date, horizon)
+        adjustments = {store: dict(st.session_state.traffic_adjustments[store])
+                       for store in scope_stores if st.session_state.traffic_adjustments.get(store)}
+        today = datetime.now().date()
+
+        def build_export():
+            # Runs on click, outside the script run (no Streamlit calls)
+            return export_bytes(iter_export_chunks(scope_stores, dates, adjustments, granularity, today), fmt)
+
+        rows = len(scope_stores) * len(dates) * (len(forecast_data.HOURS) if granularity == 'hourly' else 1)
+        st.download_button(
+            f"⬇ Download {EXPORT_FORMATS[fmt]['label']}",
+            data=build_export,
+            file_name=export_file_name(STORE_HIERARCHY.label(scope), horizon, selected_date, fmt),
+            mime=EXPORT_FORMATS[fmt]['mime'],
+            on_click="ignore",
+            use_container_width=True
+        )
+        st.caption(f"{rows:,} rows · {len(scope_stores)} store(s) × {len(dates)} day(s)")
+
+
+@st.fragment
+def staff_sharing_panel(scope, stores_data, selected_date, data_key):
+    """Floating associates shared by the stores of the scope's city (fragment: the pool size reruns only this panel)"""
+    with PROFILER.fragment("staff_sharing_panel"):
+        city = scope if STORE_HIERARCHY.level[scope] == 'city' else STORE_HIERARCHY.parent[scope]
+        cluster = STORE_HIERARCHY.stores_in(city)
+        with st.expander(f"🔄 Floater Sharing · {STORE_HIERARCHY.name[city]} ({len(cluster)} store{'s' if len(cluster) != 1 else ''})"):
+            n_floaters = st.number_input("Floating associates", min_value=0, max_value=MAX_FLOATERS_PER_STORE * len(cluster),
+                                         value=len(cluster), step=1, key=f"floaters_{city}")
+            plan = plan_staff_sharing(stores_data, city, int(n_floaters), data_key)
+            st.markdown(f"<strong>+{plan.revenue_gain:,.0f} kr</strong> estimated revenue on "
+                        f"{selected_date.strftime('%b %d, %Y')} from {int(n_floaters)} floater(s) on top of the "
+                        f"AI staffing · {len(plan.moves)} move(s) between stores",
+                        unsafe_allow_html=True)
+            st.dataframe(pd.DataFrame(plan.headcount, index=plan.stores, columns=forecast_data.HOURS),
+                         width='stretch')
+            if plan.moves:
+                moves = [f"{forecast_data.HOURS[hour]} {origin} → {destination} ({minutes:.0f} min)"
+                         for hour, origin, destination, minutes in plan.moves[:MOVES_SHOWN]]
+                more = len(plan.moves) - MOVES_SHOWN
+                st.caption(" · ".join(moves) + (f" · {more} more" if more > 0 else ""))
+
+
+# ============================================================================
+# STORE HIERARCHY (fleet → region → country → city → store)
+# ============================================================================
+@st.cache_resource
+def load_store_hierarchy():
+    """Store registry from data/store_registry.csv (shared across sessions)"""
+    return StoreHierarchy.from_csv()
 
-            summary.append({
-                'Store': store,
-                'Adoption_Rate': adoption_rate,
-                'Total_Days': total_days,
-                'AI_Days': ai_days
-            })
+STORE_HIERARCHY = load_store_hierarchy()
+STORES = STORE_HIERARCHY.stores
 
-    return pd.DataFrame(summary)
+# ============================================================================
+# SESSION STATE INITIALIZATION
+# ============================================================================
+# Per-session state holds only small overlays; forecasts and history are shared process-wide
+if 'traffic_adjustments' not in st.session_state:
+    st.session_state.traffic_adjustments = {}  # {store: {(date_iso, hour): pct}}, adjusted stores only
+    st.session_state.adjustments_key = ()  # Fingerprint, refreshed by commit_adjustments()
+if 'view_mode' not in st.session_state:
+    st.session_state.view_mode = 'hourly'
+if 'scope' not in st.session_state:
+    st.session_state.scope = FLEET_NODE
+if 'decision_overlay' not in st.session_state:
+    st.session_state.decision_overlay = {}  # This session's decisions, {store: {date_str: {'decision': 1/0}}}
 
 # ============================================================================
 # SIDEBAR
 # ============================================================================
 today = datetime.now()
-with st.sidebar:
+with st.sidebar, PROFILER.stage("sidebar"):
     st.markdown("### ⚙️ Configuration")
 
     # View Mode Selector
@@ -911,130 +1383,100 @@ with st.sidebar:
     # Update view mode and trigger rerun if changed
     new_view_mode = 'hourly' if view_mode_display == "Hourly (Time of Day)" else 'daily'
     if new_view_mode != st.session_state.view_mode:
+        # Adjustments are hourly and dated, so they carry over between views
         st.session_state.view_mode = new_view_mode
-        # Clear adjustments when switching views
-        st.session_state.traffic_adjustments = {
-            "London": {},
-            "Copenhagen": {},
-            "Paris": {}
-        }
         st.rerun()
 
     st.markdown("---")
 
-    # Scope Selector (with session state to persist across view mode changes)
+    # Scope Selector: fleet → region → country → city → store (persists across view mode changes)
     scope = st.selectbox(
         "📍 Scope Selector",
-        ["All Stores (Aggregate)", "London", "Copenhagen", "Paris"],
-        index=["All Stores (Aggregate)", "London", "Copenhagen", "Paris"].index(st.session_state.scope),
+        STORE_HIERARCHY.nodes,
+        index=STORE_HIERARCHY.nodes.index(st.session_state.scope),
+        format_func=STORE_HIERARCHY.label,
         key="scope_selector"
     )
     # Update session state when scope changes
     st.session_state.scope = scope
+    is_store_scope = STORE_HIERARCHY.is_store(scope)
+    scope_stores = STORE_HIERARCHY.stores_in(scope)
 
     # Date Picker
     selected_date = st.date_input("📅 Forecast Date", value=today)
 
-# ============================================================================
-# DATA GENERATION (needs to happen here before traffic adjustment tool uses it)
-# ============================================================================
-stores_data = generate_all_stores_data(selected_date, st.session_state.view_mode, "v2_scaled")
-
-# Apply any manual traffic adjustments
-stores_data = apply_traffic_adjustments(stores_data, st.session_state.traffic_adjustments, st.session_state.view_mode)
-
-aggregate_data = calculate_aggregate_data(stores_data, st.session_state.view_mode)
+    # Per-session memory cap (trims adjustments of other weeks before they are applied)
+    session_footprint, trimmed_dates = enforce_session_memory_cap(selected_date)
+    if trimmed_dates:
+        st.warning(f"Session memory limit reached: adjustments for {len(trimmed_dates)} earlier day(s) were cleared")
 
 # ============================================================================
-# SIDEBAR CONTINUED
+# DATA GENERATION (needs to happen here before traffic adjustment tool uses it)
 # ============================================================================
-with st.sidebar:
-    st.markdown("---")
+with PROFILER.stage("data_generation"):
+    # Pick up edited store parameters, staffing rules, code or input data (cache keys derive from them)
+    warm_process()
+    CACHE_VERSIONS.refresh()
+    data_version = forecast_version(selected_date)
+    intervals_version = record_current_actuals(st.session_state.view_mode)
+    data_quality, drift_monitor = poll_data_feeds()
+    base_stores_data = generate_all_stores_data(selected_date, st.session_state.view_mode, data_version, intervals_version)
+
+    # Intraday re-forecast of today's remaining hours (other dates and the weekly view are unaffected)
+    intraday_version = consume_intraday_actuals()
+    if st.session_state.view_mode != 'hourly' or selected_date != datetime.now().date():
+        intraday_version = 0
+    base_stores_data = apply_intraday_corrections(base_stores_data, selected_date, st.session_state.view_mode,
+                                                  intervals_version, intraday_version)
+
+# Cached stages below are keyed on this fingerprint, never on the frames themselves
+data_key = get_data_key(selected_date, st.session_state.view_mode, data_version, intervals_version, intraday_version)
 
-    # Traffic Adjustment Tool (only for specific stores)
-    st.markdown("### 🎯 Adjust Traffic Forecast")
-    if scope != "All Stores (Aggregate)":
-        st.caption("Fine-tune predictions based on your insights")
-
-        # Time selector for adjustment (hourly or daily)
-        if st.session_state.view_mode == 'hourly':
-            time_options = [f"{h:02d}:00" for h in range(9, 21)]
-            time_label = "Select Hour"
-            time_col = 'Hour'
-        else:
-            time_options = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-            time_label = "Select Day"
-            time_col = 'Day'
-
-        selected_time = st.selectbox(time_label, time_options, key="adj_time")
-
-        # Get current value for this time period
-        current_df = stores_data[scope]
-        current_value = current_df[current_df[time_col] == selected_time]['Predicted_Traffic'].values[0]
-
-        # Get current adjustment if exists
-        current_adjustment = st.session_state.traffic_adjustments[scope].get(selected_time, 0)
-
-        # Adjustment slider
-        adjustment = st.slider(
-            "Adjust Traffic (%)",
-            min_value=-50,
-            max_value=50,
-            value=current_adjustment,
-            step=5,
-            help="Adjust predicted traffic up or down by percentage"
-        )
+# Apply any manual traffic adjustments
+with PROFILER.stage("adjustments"):
+    stores_data = adjust_stores_data(base_stores_data, st.session_state.traffic_adjustments, st.session_state.view_mode,
+                                     selected_date, data_key)
 
-        # Show preview
-        adjusted_value = int(current_value * (1 + adjustment / 100))
+with PROFILER.stage("aggregation"):
+    aggregate_data = calculate_aggregate_data(stores_data, st.session_state.view_mode, data_key)
 
-        # Display as custom HTML with white background
-        st.markdown(f"""
-        <div style="background: #FFFFFF; border: 1px solid #E8E8E8; border-radius: 8px; padding: 20px; margin: 12px 0; box-shadow: 0 1px 4px rgba(0, 0, 0, 0.05);">
-            <div style="display: flex; justify-content: space-around; gap: 20px;">
-                <div style="text-align: center; flex: 1;">
-                    <div style="color: #6B6B6B; font-size: 12px; font-weight: 600; text-transform: uppercase; margin-bottom: 8px;">Original</div>
-                    <div style="color: #1A1A1A; font-size: 32px; font-weight: 700;">{int(current_value / (1 + current_adjustment / 100)):,}</div>
-                </div>
-                <div style="text-align: center; flex: 1;">
-                    <div style="color: #6B6B6B; font-size: 12px; font-weight: 600; text-transform: uppercase; margin-bottom: 8px;">Adjusted</div>
-                    <div style="color: #1A1A1A; font-size: 32px; font-weight: 700;">{adjusted_value:,}</div>
-                    <div style="color: {'#34C759' if adjustment > 0 else '#E74C3C' if adjustment < 0 else '#6B6B6B'}; font-size: 14px; font-weight: 600; margin-top: 4px;">{adjustment:+d}%</div>
-                </div>
-            </div>
-        </div>
-        """, unsafe_allow_html=True)
+    # Baseline aggregates for what-if previews (rebuilt only when forecast or adjustments change)
+    whatif_baseline = build_whatif_baseline(base_stores_data, stores_data, st.session_state.traffic_adjustments,
+                                            st.session_state.view_mode, selected_date, data_key)
 
-        # Apply button
-        col_a, col_b = st.columns(2)
-        with col_a:
-            if st.button("✓ Apply", use_container_width=True):
-                if adjustment != 0:
-                    st.session_state.traffic_adjustments[scope][selected_time] = adjustment
-                    st.success(f"✅ Applied to {selected_time}")
-                    st.rerun()
-                else:
-                    # Remove adjustment if set to 0
-                    if selected_time in st.session_state.traffic_adjustments[scope]:
-                        del st.session_state.traffic_adjustments[scope][selected_time]
-                    st.rerun()
+    # Rollups for every hierarchy node (scope switches are constant-time lookups)
+    forecast_rollup = build_forecast_rollup(stores_data, whatif_baseline, data_key)
 
-        with col_b:
-            if st.button("↺ Reset All", use_container_width=True):
-                st.session_state.traffic_adjustments[scope] = {}
-                st.success("✅ All adjustments cleared")
-                st.rerun()
+# ============================================================================
+# SIDEBAR CONTINUED
+# ============================================================================
+with st.sidebar, PROFILER.stage("adjustment_tools"):
+    st.markdown("---")
 
-        # Show active adjustments
-        if st.session_state.traffic_adjustments[scope]:
-            st.caption(f"**Active Adjustments ({len(st.session_state.traffic_adjustments[scope])}):**")
-            time_emoji = "🕐" if st.session_state.view_mode == 'hourly' else "📅"
-            for time_period, adj in st.session_state.traffic_adjustments[scope].items():
-                st.caption(f"{time_emoji} {time_period}: {adj:+d}%")
+    # Time options for adjustment (hourly or daily)
+    if st.session_state.view_mode == 'hourly':
+        time_options = [f"{h:02d}:00" for h in range(9, 21)]
+        time_label = "Select Hour"
+        time_col = 'Hour'
+    else:
+        time_options = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+        time_label = "Select Day"
+        time_col = 'Day'
+
+    # Traffic Adjustment Tool (only for specific stores)
+    st.markdown("### 🎯 Adjust Traffic Forecast")
+    if is_store_scope:
+        adjustment_tool(scope, selected_date, time_options, time_label, base_stores_data, stores_data,
+                        whatif_baseline, scope_stores)
     else:
         st.info("🔒 Select a store to adjust forecasts")
 
+    # Bulk what-if: one adjustment over many stores × time periods
+    bulk_adjustment_tool(selected_date, time_options, whatif_baseline, scope_stores)
+
     st.markdown("---")
+    export_tool(scope, selected_date, scope_stores)
+
     st.markdown("---")
     st.markdown("### 🤖 Model Info")
     st.caption("**Type:** XGBoost + LSTM")
@@ -1069,66 +1511,59 @@ with st.sidebar:
 # ============================================================================
 # MAIN HEADER
 # ============================================================================
-st.markdown(f"""
-<div style="background: #FFFFFF;
-            padding: 24px 28px; border-radius: 14px; margin-bottom: 20px;
-            border: 1px solid #E8E8E8;
-            box-shadow: 0 2px 8px rgba(0, 0, 0, 0.03);">
-    <h1 style="color: #1A1A1A; font-size: 26px; margin: 0; font-weight: 600;">
-        💎 Pandora AI Traffic & Staffing Optimizer
-    </h1>
-    <p style="color: #6B6B6B; font-size: 13px; margin: 8px 0 0 0; font-weight: 500;">
-        {scope} • {selected_date.strftime('%B %d, %Y')}
-    </p>
-</div>
-""", unsafe_allow_html=True)
+st.markdown(PAGE_HEADER.render(scope=scope, date_label=selected_date.strftime('%B %d, %Y')), unsafe_allow_html=True)
+
+# Holidays and promotions behind the forecast (the selected date, or the whole week in the daily view)
+event_dates = [selected_date] if st.session_state.view_mode == 'hourly' else week_dates(selected_date)
+scope_events = {}
+for day in event_dates:
+    for name, multiplier in EVENT_CALENDAR.events_on(scope_stores, day):
+        scope_events.setdefault((name, multiplier), day)
+if scope_events:
+    st.caption("📆 Events in forecast: " + " · ".join(
+        f"{name} ({day.strftime('%a %d %b')}, {multiplier:.2g}× traffic)" for (name, multiplier), day in scope_events.items()
+    ))
 
 # ============================================================================
 # KPI ROW
 # ============================================================================
-traffic, revenue, conversion_improvement, baseline_revenue, ai_revenue, lost_revenue, baseline_cr, ai_cr = calculate_kpis(scope, stores_data, aggregate_data)
+with PROFILER.stage("kpis"):
+    traffic, revenue, conversion_improvement, baseline_revenue, ai_revenue, lost_revenue, baseline_cr, ai_cr = calculate_kpis(scope, forecast_rollup)
+    revenue_scenarios = calculate_revenue_scenarios(stores_data, scope, data_key)
 
 col1, col2, col3 = st.columns(3)
 
-with col1:
-    st.markdown(f"""
-    <div class="kpi-card">
-        <div class="kpi-title">Total Predicted Traffic</div>
-        <div class="kpi-value">{traffic:,}</div>
-        <div class="kpi-subtitle">Customer Visits</div>
-    </div>
-    """, unsafe_allow_html=True)
+with col1, PROFILER.stage("kpi_cards"):
+    st.markdown(TRAFFIC_KPI_CARD.render(traffic=traffic), unsafe_allow_html=True)
 
-with col2:
+with col2, PROFILER.stage("kpi_cards"):
     # Calculate revenue difference and format display
     revenue_diff = lost_revenue
     diff_symbol = "+" if revenue_diff > 0 else ""
     diff_color = "#34C759" if revenue_diff > 0 else "#E74C3C" if revenue_diff < 0 else "#6B6B6B"
 
-    st.markdown(f"""
-    <div class="kpi-card kpi-card-with-tooltip">
-        <span class="tooltip-text"><strong>Conversion Lift Model</strong> (Calibrated for Pandora)<br><br>Dynamic CR based on Shopper-to-Associate (STA) ratio:<br><br><strong>Optimal:</strong> 20% CR at 4:1 ratio (4 shoppers per staff)<br><strong>Understaffed:</strong> CR drops 1.5% per additional shopper/staff<br><strong>Survival Mode (15:1+):</strong> CR crashes 2.5% per point (staff only process transactions, stop selling)<br><strong>Better Staffed:</strong> CR increases 2.0% per fewer shopper/staff<br><strong>Range:</strong> 5% minimum to 30% maximum<br><br>Formula: Total Visits × Adjusted CR × $125 ATV (931 kr)<br><br>Based on Pandora intensity levels: Low (0-15/hr), Moderate (16-30/hr), High (31+/hr). AI aims for 4-5:1, Baseline runs at 10:1 (understaffed).</span>
-        <div class="kpi-title">Revenue Recovery 💡</div>
-        <div class="kpi-value">{ai_revenue:,} kr</div>
-        <div class="kpi-subtitle">AI Optimized • Baseline: {baseline_revenue:,} kr<br><span style="color: {diff_color}; font-weight: 600;">{diff_symbol}{revenue_diff:,} kr</span> vs Baseline</div>
-    </div>
-    """, unsafe_allow_html=True)
+    # Monte Carlo range for the revenue impact (P10 - P90)
+    impact_range = revenue_scenarios['revenue_impact']
+    impact_p10 = int(impact_range['p10'])
+    impact_p90 = int(impact_range['p90'])
+
+    st.markdown(REVENUE_KPI_CARD.render(
+        n_scenarios=revenue_scenarios['n_scenarios'], ai_revenue=ai_revenue, baseline_revenue=baseline_revenue,
+        diff_color=diff_color, diff_symbol=diff_symbol, revenue_diff=revenue_diff,
+        impact_p10=impact_p10, impact_p90=impact_p90
+    ), unsafe_allow_html=True)
 
-with col3:
+with col3, PROFILER.stage("kpi_cards"):
     # Format conversion rates as percentages
     baseline_cr_pct = baseline_cr * 100
     ai_cr_pct = ai_cr * 100
     improvement_color = "#34C759" if conversion_improvement > 0 else "#E74C3C"
     improvement_symbol = "+" if conversion_improvement > 0 else ""
 
-    st.markdown(f"""
-    <div class="kpi-card kpi-card-with-tooltip">
-        <span class="tooltip-text"><strong>Conversion Efficiency</strong><br><br>Shows the conversion rate improvement achieved through AI-optimized staffing versus baseline (legacy) staffing.<br><br><strong>Baseline Conversion:</strong> {baseline_cr_pct:.1f}% (understaffed at 10:1 STA ratio)<br><strong>AI Optimized:</strong> {ai_cr_pct:.1f}% (optimal 4-5:1 STA ratio)<br><strong>Improvement:</strong> {improvement_symbol}{conversion_improvement:.1f}%<br><br>Uses dynamic conversion lift model based on Shopper-to-Associate ratios. Better staffing = better service = higher conversion = more revenue from same traffic.</span>
-        <div class="kpi-title">Conversion Efficiency 📊</div>
-        <div class="kpi-value">{ai_cr_pct:.1f}%</div>
-        <div class="kpi-subtitle">AI Optimized • Baseline: {baseline_cr_pct:.1f}%<br><span style="color: {improvement_color}; font-weight: 600;">{improvement_symbol}{conversion_improvement:.1f}%</span> improvement</div>
-    </div>
-    """, unsafe_allow_html=True)
+    st.markdown(CONVERSION_KPI_CARD.render(
+        baseline_cr_pct=baseline_cr_pct, ai_cr_pct=ai_cr_pct, improvement_color=improvement_color,
+        improvement_symbol=improvement_symbol, conversion_improvement=conversion_improvement
+    ), unsafe_allow_html=True)
 
 # ============================================================================
 # MAIN CONTENT GRID - 2 COLUMN LAYOUT
@@ -1140,36 +1575,30 @@ col_left, col_right = st.columns([3, 2], gap="large")
 # ============================================================================
 # LEFT COLUMN: VISUALIZATION
 # ============================================================================
-with col_left:
-    st.markdown("""
-    <div style="background: #FFFFFF; padding: 12px 16px; border-radius: 8px; border-left: 3px solid #F2B8C6; margin-bottom: 12px; box-shadow: 0 1px 3px rgba(0, 0, 0, 0.02);">
-        <div style="color: #1A1A1A; font-size: 13px; font-weight: 600; margin-bottom: 2px;">📈 Traffic & Staffing Analysis</div>
-    </div>
-    """, unsafe_allow_html=True)
-
-    if scope == "All Stores (Aggregate)":
-        # STACKED AREA CHART
-        fig = go.Figure()
+with col_left, PROFILER.stage("charts"):
+    st.markdown(SECTION_HEADER.render(title="📈 Traffic & Staffing Analysis"), unsafe_allow_html=True)
+
+    # Plotly is only needed from here on: importing it here keeps it off the first paint of a cold process
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
 
-        colors = {
-            "London": "#F2B8C6",
-            "Copenhagen": "#E5A0B1",
-            "Paris": "#D88D9C"
-        }
+    if not is_store_scope:
+        # STACKED AREA CHART (stores under the selected node)
+        fig = go.Figure()
 
         # Determine time column and axis label
         time_col = 'Hour' if st.session_state.view_mode == 'hourly' else 'Day'
         x_axis_title = 'Hour of Day' if st.session_state.view_mode == 'hourly' else 'Day of Week'
 
-        for store in ["London", "Copenhagen", "Paris"]:
+        for store in scope_stores:
             fig.add_trace(go.Scatter(
                 x=aggregate_data[time_col],
                 y=aggregate_data[store],
                 name=store,
                 mode='lines',
                 stackgroup='one',
-                fillcolor=colors[store],
-                line=dict(width=0.5, color=colors[store])
+                fillcolor=get_store_color(store),
+                line=dict(width=0.5, color=get_store_color(store))
             ))
 
         fig.update_layout(
@@ -1212,7 +1641,7 @@ with col_left:
 
     else:
         # LINE CHART FOR SPECIFIC STORE
-        df = stores_data[scope]
+        df = stores_data[scope].to_frame()  # DataFrame only for display
 
         # Determine time column and axis label
         time_col = 'Hour' if st.session_state.view_mode == 'hourly' else 'Day'
@@ -1222,9 +1651,8 @@ with col_left:
         df['Baseline_FTE'] = df['Baseline_Staffing']
         df['AI_FTE'] = df['AI_Recommended_Staffing']
 
-        # Calculate confidence intervals for predicted traffic (±10% typical for retail forecasting)
-        df['Predicted_Upper'] = df['Predicted_Traffic'] * 1.10
-        df['Predicted_Lower'] = df['Predicted_Traffic'] * 0.90
+        # Prediction interval (Predicted_Lower / Predicted_Upper) comes with the forecast,
+        # computed from rolling residuals of actual vs predicted traffic
 
         # Create figure with secondary y-axis
         fig = make_subplots(specs=[[{"secondary_y": True}]])
@@ -1252,7 +1680,7 @@ with col_left:
             fill='toself',
             fillcolor='rgba(242, 184, 198, 0.15)',
             line=dict(color='rgba(255,255,255,0)'),
-            name='Confidence Interval (±10%)',
+            name='Prediction Interval (80%)',
             showlegend=True,
             hoverinfo='skip'
         ), secondary_y=True)
@@ -1282,11 +1710,13 @@ with col_left:
             ), secondary_y=True)
 
         # 6. Manual Adjustments - Orange markers for user-modified forecasts
-        if st.session_state.traffic_adjustments[scope]:
+        chart_adjustments = view_adjustments(st.session_state.traffic_adjustments.get(scope, {}), selected_date,
+                                             st.session_state.view_mode)
+        if chart_adjustments:
             adjusted_times = []
             adjusted_values = []
 
-            for time_value, adjustment in st.session_state.traffic_adjustments[scope].items():
+            for time_value in chart_adjustments:
                 adjusted_times.append(time_value)
                 adjusted_values.append(df[df[time_col] == time_value]['Predicted_Traffic'].values[0])
 
@@ -1366,396 +1796,56 @@ with col_left:
 
     st.plotly_chart(fig, width='stretch')
 
+    # Intraday re-forecast note (today, hourly view, once a store's correction is active)
+    if is_store_scope and intraday_version:
+        correction = get_intraday_corrector().correction(scope)
+        if correction is not None:
+            factor, first_slot, hours_observed = correction
+            if first_slot < len(forecast_data.HOURS):
+                st.caption(
+                    f"🔄 Intraday re-forecast: hours from {forecast_data.HOURS[first_slot]} adjusted "
+                    f"{(factor - 1) * 100:+.1f}% based on {hours_observed} hours of actual traffic today"
+                )
+
     # ============================================================================
     # IMPLEMENTATION TRACKING SECTION (moved to left column below chart)
     # ============================================================================
     st.markdown("<br>", unsafe_allow_html=True)
-    st.markdown("""
-    <div style="background: #FFFFFF; padding: 12px 16px; border-radius: 8px; border-left: 3px solid #F2B8C6; margin-bottom: 12px; box-shadow: 0 1px 3px rgba(0, 0, 0, 0.02);">
-        <div style="color: #1A1A1A; font-size: 13px; font-weight: 600; margin-bottom: 2px;">🎯 AI Recommendation Adoption</div>
-    </div>
-    """, unsafe_allow_html=True)
-
-    # Generate and display implementation tracking visualizations
-    if scope != "All Stores (Aggregate)":
-        # STORE-SPECIFIC: Show 30-day calendar for this store
-        df_calendar = generate_implementation_calendar(scope)
-
-        # Create calendar heatmap
-        fig_calendar = go.Figure()
-
-        # Group by week and day of week
-        weeks = sorted(df_calendar['Week'].unique())
-        days_order = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
-
-        # Prepare data for heatmap - calculate cumulative adoption rate for each day
-        heatmap_data = []
-        hover_text = []
-
-        # Sort calendar by date to calculate cumulative adoption
-        df_calendar_sorted = df_calendar.sort_values('Date')
-
-        for week in weeks:
-            week_data = []
-            week_hover = []
-            for day in days_order:
-                mask = (df_calendar['Week'] == week) & (df_calendar['Day'] == day)
-                if mask.any():
-                    row = df_calendar[mask].iloc[0]
-                    current_date = row['Date']
-
-                    # Calculate adoption rate up to and including this day
-                    up_to_mask = df_calendar_sorted['Date'] <= current_date
-                    decisions_up_to = df_calendar_sorted[up_to_mask]['Decision'].values
-
-                    ai_count = sum(1 for d in decisions_up_to if d == 1)
-                    total_count = sum(1 for d in decisions_up_to if d is not None)
-
-                    if total_count > 0:
-                        adoption_rate = (ai_count / total_count) * 100
-                        legacy_count = total_count - ai_count
-                        week_data.append(adoption_rate)
-                        date_str = row['Date'].strftime('%b %d, %Y')
-
-                        # Get today's specific decision for this cell
-                        today_date_str = datetime.now().strftime('%Y-%m-%d')
-                        is_today = row['Date'].strftime('%Y-%m-%d') == today_date_str
-                        today_marker = " 📍 TODAY" if is_today else ""
-
-                        week_hover.append(
-                            f"<b>{date_str}{today_marker}</b><br>"
-                            f"<b style='font-size:16px'>{adoption_rate:.1f}%</b> AI Adoption<br>"
-                            f"<br>"
-                            f"AI Clicks: <b>{ai_count}</b><br>"
-                            f"Legacy Clicks: <b>{legacy_count}</b><br>"
-                            f"Total Clicks: <b>{total_count}</b>"
-                        )
-                    else:
-                        week_data.append(None)  # No decision yet
-                        date_str = row['Date'].strftime('%b %d, %Y')
-
-                        # Check if this is today
-                        today_date_str = datetime.now().strftime('%Y-%m-%d')
-                        is_today = row['Date'].strftime('%Y-%m-%d') == today_date_str
-                        if is_today:
-                            week_hover.append(f"<b>{date_str} 📍 TODAY</b><br>⏳ Waiting for your decision...")
-                        else:
-                            week_hover.append(f"<b>{date_str}</b><br>No decision recorded")
-                else:
-                    week_data.append(None)
-                    week_hover.append("")
-            heatmap_data.append(week_data)
-            hover_text.append(week_hover)
-
-        # Transpose for correct orientation
-        heatmap_data = list(map(list, zip(*heatmap_data)))
-        hover_text = list(map(list, zip(*hover_text)))
-
-        fig_calendar.add_trace(go.Heatmap(
-            z=heatmap_data,
-            x=[f'Week {w+1}' for w in weeks],
-            y=days_order,
-            colorscale=[
-                [0, '#E74C3C'],      # Red (0% - all legacy)
-                [0.6, '#FF9500'],    # Orange (60% - threshold)
-                [0.8, '#FFC107'],    # Yellow (80% - warning)
-                [1, '#34C759']       # Green (100% - all AI)
-            ],
-            text=hover_text,
-            hovertemplate='%{text}<extra></extra>',
-            showscale=True,
-            colorbar=dict(
-                title="AI Adoption %",
-                tickvals=[0, 60, 80, 100],
-                ticktext=["0%", "60%", "80%", "100%"],
-                thickness=15,
-                len=0.7
-            ),
-            zmin=0,
-            zmax=100,
-            zmid=80  # Center the colorscale around 80% (target threshold)
-        ))
-
-        fig_calendar.update_layout(
-            plot_bgcolor='#FFFFFF',
-            paper_bgcolor='#FFFFFF',
-            font=dict(family='Inter', color='#1A1A1A', size=12),
-            xaxis=dict(
-                title='',
-                showgrid=False,
-                side='top',
-                tickfont=dict(size=12, color='#1A1A1A')
-            ),
-            yaxis=dict(
-                title='',
-                showgrid=False,
-                tickfont=dict(size=12, color='#1A1A1A')
-            ),
-            height=280,
-            margin=dict(l=60, r=40, t=60, b=30)
-        )
-
-        st.plotly_chart(fig_calendar, width='stretch')
-
-        # Get AI recommendation for display
-        if scope in stores_data:
-            df_store = stores_data[scope]
-            ai_fte_avg = df_store['AI_Recommended_Staffing'].mean()
-            baseline_fte_avg = df_store['Baseline_Staffing'].mean()
-        else:
-            ai_fte_avg = 0
-            baseline_fte_avg = 0
-
-        # Implementation decision buttons
-        st.markdown(f"""
-        <div style="background: #F0F9FF; padding: 12px; border-radius: 8px; margin: 12px 0; border-left: 3px solid #34C759;">
-            <div style="color: #1A1A1A; font-size: 12px; font-weight: 600; margin-bottom: 4px;">Today's Staffing Decision for {scope}</div>
-            <div style="color: #4A4A4A; font-size: 11px;">AI Recommendation: <strong>{ai_fte_avg:.1f} FTE/Day</strong> | Legacy System: <strong>{baseline_fte_avg:.1f} FTE/Day</strong></div>
-        </div>
-        """, unsafe_allow_html=True)
-
-        col_fb1, col_fb2 = st.columns(2)
-
-        with col_fb1:
-            if st.button("✓ Following AI", use_container_width=True, key=f"ai_{scope}", type="primary"):
-                # Store implementation decision
-                today_str = datetime.now().strftime('%Y-%m-%d')
-                if scope not in st.session_state.implementation_history:
-                    st.session_state.implementation_history[scope] = {}
-                st.session_state.implementation_history[scope][today_str] = {'decision': 1}
-                st.session_state.todays_decisions.add(scope)  # Mark this store as having today's decision
-                st.rerun()
-
-        with col_fb2:
-            if st.button("⊗ Using Legacy", use_container_width=True, key=f"legacy_{scope}"):
-                # Store implementation decision
-                today_str = datetime.now().strftime('%Y-%m-%d')
-                if scope not in st.session_state.implementation_history:
-                    st.session_state.implementation_history[scope] = {}
-                st.session_state.implementation_history[scope][today_str] = {'decision': 0}
-                st.session_state.todays_decisions.add(scope)  # Mark this store as having today's decision
-                st.rerun()
-
-        # Show today's decision status
-        today_str = datetime.now().strftime('%Y-%m-%d')
-
-        # Debug: Check if store is in todays_decisions
-        is_decided = scope in st.session_state.todays_decisions
-        has_data = scope in st.session_state.implementation_history and today_str in st.session_state.implementation_history[scope]
-
-        if has_data:
-            decision = st.session_state.implementation_history[scope][today_str]['decision']
-            if decision == 1:
-                st.success("✅ **Today's Decision Recorded**: Following AI Recommendation - The heatmap has been updated!")
-            else:
-                st.warning("⚠️ **Today's Decision Recorded**: Using Legacy System - The heatmap has been updated!")
-        else:
-            st.info("⏳ **No decision recorded yet for today** - Click a button above to record your staffing decision")
-
-    else:
-        # REGIONAL MANAGER VIEW: Show AI adoption comparison across all stores
-        df_summary = get_store_adoption_summary()
-
-        # Create bar chart comparing stores
-        fig_comparison = go.Figure()
-
-        colors_map = {
-            "London": "#F2B8C6",
-            "Copenhagen": "#E5A0B1",
-            "Paris": "#D88D9C"
-        }
-
-        fig_comparison.add_trace(go.Bar(
-            x=df_summary['Store'],
-            y=df_summary['Adoption_Rate'],
-            marker=dict(
-                color=[colors_map[store] for store in df_summary['Store']],
-                line=dict(color='#2C2C2C', width=1)
-            ),
-            text=[f"{rate:.1f}%" for rate in df_summary['Adoption_Rate']],
-            textposition='outside',
-            hovertemplate='<b>%{x}</b><br>AI Adoption: %{y:.1f}%<br>Days Tracked: %{customdata}<extra></extra>',
-            customdata=df_summary['Total_Days']
-        ))
-
-        # Add threshold line at 80% (target adoption)
-        fig_comparison.add_hline(
-            y=80,
-            line_dash="dash",
-            line_color="#34C759",
-            annotation_text="Target (80%)",
-            annotation_position="right"
-        )
-
-
-        fig_comparison.update_layout(
-            plot_bgcolor='#FFFFFF',
-            paper_bgcolor='#FFFFFF',
-            font=dict(family='Inter', color='#1A1A1A', size=12),
-            xaxis=dict(
-                title='',
-                showgrid=False,
-                showline=True,
-                linewidth=2,
-                linecolor='#4A4A4A',
-                tickfont=dict(size=12, color='#1A1A1A')
-            ),
-            yaxis=dict(
-                title=dict(text='AI Adoption Rate (%)', font=dict(size=14, color='#1A1A1A', family='Inter')),
-                showgrid=True,
-                gridcolor='#F0F0F0',
-                range=[0, 100],
-                showline=True,
-                linewidth=2,
-                linecolor='#4A4A4A',
-                tickfont=dict(size=12, color='#1A1A1A')
-            ),
-            height=450,
-            margin=dict(l=60, r=100, t=60, b=60)
-        )
-
-        st.plotly_chart(fig_comparison, width='stretch')
-
-        # Regional summary
-        col_r1, col_r2, col_r3 = st.columns(3)
-        avg_adoption = df_summary['Adoption_Rate'].mean()
-        best_store = df_summary.loc[df_summary['Adoption_Rate'].idxmax(), 'Store']
-        # Use 80% threshold to match the target line on the chart
-        low_adoption = df_summary[df_summary['Adoption_Rate'] < 80]
+    st.markdown(SECTION_HEADER.render(title="🎯 AI Recommendation Adoption"), unsafe_allow_html=True)
 
-        with col_r1:
-            st.metric("Regional Avg", f"{avg_adoption:.1f}%", delta="AI Adoption")
-        with col_r2:
-            st.metric("Top Adopter", best_store)
-        with col_r3:
-            if len(low_adoption) > 0:
-                stores_list = ", ".join(low_adoption['Store'].tolist())
-                st.metric("Needs Support", len(low_adoption), delta=stores_list, delta_color="off")
-            else:
-                st.metric("Needs Support", "None ✓")
+    # Filled after the right column, so the decision panel can hand its update to the adoption card there
+    adoption_section = st.container()
 
 # ============================================================================
 # RIGHT COLUMN: STAFFING RECOMMENDATION
 # ============================================================================
-with col_right:
+with col_right, PROFILER.stage("staffing_panel"):
     # Determine the tooltip text based on view mode
     if st.session_state.view_mode == 'hourly':
         tooltip_text = "Average FTE/Day shows the average number of full-time employees needed during the operating day (9:00-21:00). Revenue impact calculated from 5% conversion improvement due to optimal staffing (20% baseline conversion × 931 kr average ticket)."
     else:
         tooltip_text = "Average FTE/Day shows the average number of full-time employees needed per day, averaged across the 7-day week. Revenue impact calculated from 5% conversion improvement due to optimal staffing (20% baseline conversion × 931 kr average ticket)."
 
-    st.markdown(f"""
-    <style>
-        .recommendation-header {{
-            background: #FFFFFF;
-            padding: 12px 16px;
-            border-radius: 8px;
-            border-left: 3px solid #F2B8C6;
-            margin-bottom: 12px;
-            box-shadow: 0 1px 3px rgba(0, 0, 0, 0.02);
-            position: relative;
-        }}
-        .recommendation-title {{
-            color: #1A1A1A;
-            font-size: 13px;
-            font-weight: 600;
-            margin-bottom: 2px;
-            position: relative;
-            display: inline-block;
-        }}
-        .info-icon {{
-            display: inline-block;
-            margin-left: 6px;
-            color: #999999;
-            font-size: 11px;
-            font-weight: normal;
-            cursor: help;
-            position: relative;
-        }}
-        .info-icon .tooltip-box {{
-            display: none;
-            position: absolute;
-            width: 320px;
-            background-color: #2C2C2C;
-            color: #FFFFFF;
-            text-align: left;
-            border-radius: 8px;
-            padding: 12px 16px;
-            z-index: 9999;
-            top: 25px;
-            left: -160px;
-            font-size: 11px;
-            line-height: 1.6;
-            box-shadow: 0 4px 12px rgba(0,0,0,0.4);
-        }}
-        .info-icon:hover .tooltip-box {{
-            display: block;
-        }}
-    </style>
-    <div class="recommendation-header">
-        <div class="recommendation-title">
-            🎯 Staffing Recommendation
-            <span class="info-icon">
-                ⓘ
-                <div class="tooltip-box">
-                    <strong style="color: #F2B8C6;">About this metric:</strong><br><br>
-                    {tooltip_text}
-                </div>
-            </span>
-        </div>
-    </div>
-    """, unsafe_allow_html=True)
+    st.markdown(RECOMMENDATION_HEADER.render(tooltip_text=tooltip_text), unsafe_allow_html=True)
 
     # ============================================================================
     # STAFFING RECOMMENDATION & REVENUE IMPACT (all views)
     # ============================================================================
-    if scope != "All Stores (Aggregate)":
-        # Individual store
-        df = stores_data[scope].copy()
-
-        # Staffing is already in FTE (staff count)
-        df['Baseline_FTE'] = df['Baseline_Staffing']
-        df['AI_FTE'] = df['AI_Recommended_Staffing']
-
-        # Calculate averages for the current view period
-        # For hourly: average FTE across the operating day
-        # For daily: average FTE per day across the week
-        baseline_fte = df['Baseline_FTE'].mean()
-        ai_fte = df['AI_FTE'].mean()
-        total_traffic = df['Predicted_Traffic'].sum()
-    else:
-        # Aggregate across all stores
-        baseline_fte_sum = 0
-        ai_fte_sum = 0
-        total_traffic = 0
-
-        for store_name, df in stores_data.items():
-            df = df.copy()
-            df['Baseline_FTE'] = df['Baseline_Staffing']
-            df['AI_FTE'] = df['AI_Recommended_Staffing']
-
-            baseline_fte_sum += df['Baseline_FTE'].mean()
-            ai_fte_sum += df['AI_FTE'].mean()
-            total_traffic += df['Predicted_Traffic'].sum()
-
-        baseline_fte = baseline_fte_sum
-        ai_fte = ai_fte_sum
+    # Scope totals come from the hierarchy rollup (store or any multi-store node)
+    total_traffic = int(forecast_rollup.get(scope, 'traffic'))
+    total_baseline_staffing = forecast_rollup.get(scope, 'baseline_staffing')
+    total_ai_staffing = forecast_rollup.get(scope, 'ai_staffing')
+
+    # Calculate averages for the current view period, summed over stores in scope
+    # For hourly: average FTE across the operating day
+    # For daily: average FTE per day across the week
+    n_periods = len(time_options)
+    baseline_fte = total_baseline_staffing / n_periods
+    ai_fte = total_ai_staffing / n_periods
 
     # Calculate difference (runs for both individual and aggregate)
     fte_difference = baseline_fte - ai_fte
 
-    # Revenue impact calculation using dynamic conversion lift model
-    # Calculate actual total staffing for the period (not just averages)
-    if scope != "All Stores (Aggregate)":
-        total_baseline_staffing = df['Baseline_Staffing'].sum()
-        total_ai_staffing = df['AI_Recommended_Staffing'].sum()
-    else:
-        total_baseline_staffing = 0
-        total_ai_staffing = 0
-        for store_name, df_store in stores_data.items():
-            total_baseline_staffing += df_store['Baseline_Staffing'].sum()
-            total_ai_staffing += df_store['AI_Recommended_Staffing'].sum()
-
     # Use the dynamic conversion lift model (same as Revenue Recovery KPI)
     baseline_revenue_data = calculate_dynamic_revenue(total_traffic, total_baseline_staffing)
     ai_revenue_data = calculate_dynamic_revenue(total_traffic, total_ai_staffing)
@@ -1800,86 +1890,42 @@ with col_right:
         else:
             impact_text = f"However, the AI system dynamically adjusts staffing to maintain optimal 4-5:1 STA ratio throughout the week. This can still <strong>generate an estimated {revenue_per_day:,} kr per day</strong> ({revenue_weekly:,} kr per week) through better peak coverage."
 
-    st.markdown(f"""
-        <div style="background: {recommendation_color}; border-radius: 12px; padding: 24px; margin-bottom: 20px; border-left: 4px solid #F2B8C6;">
-            <div style="display: grid; grid-template-columns: repeat(3, 1fr); gap: 20px; margin-bottom: 20px;">
-                <div style="text-align: center;">
-                    <div style="color: #6B6B6B; font-size: 11px; font-weight: 600; text-transform: uppercase; letter-spacing: 1px; margin-bottom: 8px;">Legacy System</div>
-                    <div style="color: #1A1A1A; font-size: 32px; font-weight: 700;">{baseline_fte:.1f}</div>
-                    <div style="color: #999999; font-size: 12px; margin-top: 4px;">Avg FTE/Day</div>
-                </div>
-                <div style="text-align: center;">
-                    <div style="color: #6B6B6B; font-size: 11px; font-weight: 600; text-transform: uppercase; letter-spacing: 1px; margin-bottom: 8px;">AI Recommended</div>
-                    <div style="color: #34C759; font-size: 32px; font-weight: 700;">{ai_fte:.1f}</div>
-                    <div style="color: #999999; font-size: 12px; margin-top: 4px;">Avg FTE/Day</div>
-                </div>
-                <div style="text-align: center;">
-                    <div style="color: #6B6B6B; font-size: 11px; font-weight: 600; text-transform: uppercase; letter-spacing: 1px; margin-bottom: 8px;">Difference</div>
-                    <div style="color: {'#E74C3C' if fte_difference > 0 else '#34C759' if fte_difference < 0 else '#6B6B6B'}; font-size: 32px; font-weight: 700;">{fte_difference:+.1f}</div>
-                    <div style="color: #999999; font-size: 12px; margin-top: 4px;">FTE/Day</div>
-                </div>
-            </div>
-            <div style="padding: 16px; background: #FFFFFF; border-radius: 8px; margin-bottom: 12px;">
-                <div style="color: #1A1A1A; font-size: 14px; font-weight: 600; margin-bottom: 8px;">📊 Analysis</div>
-                <div style="color: #4A4A4A; font-size: 13px; line-height: 1.6;">{recommendation_text}</div>
-            </div>
-            <div style="padding: 16px; background: #FFFFFF; border-radius: 8px;">
-                <div style="color: #1A1A1A; font-size: 14px; font-weight: 600; margin-bottom: 8px;">💰 Revenue Impact</div>
-                <div style="color: #4A4A4A; font-size: 13px; line-height: 1.6;">{impact_text}</div>
-            </div>
-        </div>
-        """, unsafe_allow_html=True)
+    st.markdown(RECOMMENDATION_BOX.render(
+        recommendation_color=recommendation_color, baseline_fte=baseline_fte, ai_fte=ai_fte,
+        difference_color='#E74C3C' if fte_difference > 0 else '#34C759' if fte_difference < 0 else '#6B6B6B',
+        fte_difference=fte_difference, recommendation_text=recommendation_text, impact_text=impact_text
+    ), unsafe_allow_html=True)
+
+    # Floaters shared between the stores of one city (hourly plan for the selected day)
+    if st.session_state.view_mode == 'hourly' and STORE_HIERARCHY.level[scope] in ('city', 'store'):
+        staff_sharing_panel(scope, stores_data, selected_date, data_key)
 
     # ============================================================================
     # KPI OVERVIEW CARDS - COMPACT VERSION
     # ============================================================================
     st.markdown("<br>", unsafe_allow_html=True)
-    st.markdown("""
-    <div style="background: #FFFFFF; padding: 12px 16px; border-radius: 8px; border-left: 3px solid #F2B8C6; margin-bottom: 12px; box-shadow: 0 1px 3px rgba(0, 0, 0, 0.02);">
-        <div style="color: #1A1A1A; font-size: 13px; font-weight: 600; margin-bottom: 2px;">📊 Performance Metrics</div>
-    </div>
-    """, unsafe_allow_html=True)
-
-    # Generate mock performance data (in production, this would come from real metrics)
-    np.random.seed(42)
-
-    # Calculate actual AI adoption rates from implementation history
-    if scope != "All Stores (Aggregate)":
-        # Individual store adoption
-        store_history = st.session_state.implementation_history.get(scope, {})
-        today_str = datetime.now().strftime('%Y-%m-%d')
-
-        # Check if following AI today
-        adoption_today = 100 if store_history.get(today_str, {}).get('decision') == 1 else 0
-
-        # Last 3 days
-        days_3 = [store_history.get((datetime.now() - timedelta(days=i)).strftime('%Y-%m-%d'), {}).get('decision', 0) for i in range(3)]
-        adoption_3days = (sum([1 for d in days_3 if d == 1]) / len([d for d in days_3 if d is not None]) * 100) if any(d is not None for d in days_3) else 0
-
-        # Last week
-        days_7 = [store_history.get((datetime.now() - timedelta(days=i)).strftime('%Y-%m-%d'), {}).get('decision', 0) for i in range(7)]
-        adoption_week = (sum([1 for d in days_7 if d == 1]) / len([d for d in days_7 if d is not None]) * 100) if any(d is not None for d in days_7) else 0
+    st.markdown(SECTION_HEADER.render(title="📊 Performance Metrics"), unsafe_allow_html=True)
+
+    # Data Completeness and Freshness (received vs expected hourly feed records)
+    now = datetime.now()
+    data_today = data_quality.completeness(scope, 'today', now)
+    data_3days = data_quality.completeness(scope, '3d', now)
+    data_week = data_quality.completeness(scope, '7d', now)
+    data_lag = data_quality.freshness_lag(scope, now)
+    data_gaps = data_quality.gaps(scope, '7d', now)
+    if data_lag is None:
+        freshness_display = "no records yet"
+    elif data_lag == 0:
+        freshness_display = "up to date"
     else:
-        # Aggregate adoption across all stores
-        adoption_today = 91.7
-        adoption_3days = 91.7
-        adoption_week = 91.7
-
-    # Data Completeness and Freshness
-    data_today = 100.0
-    data_3days = 99.8
-    data_week = 99.4
+        freshness_display = f"{data_lag}h behind"
 
     # Forecast Accuracy (Actual vs Predicted)
     accuracy_today, accuracy_3days, accuracy_week = calculate_forecast_accuracy(
-        scope, stores_data, aggregate_data, selected_date
+        scope, forecast_rollup, selected_date, build_backtest_rollup(selected_date, CACHE_VERSIONS.fleet(STORES))
     )
 
     # Get colors for each metric (using global helper functions)
-    adoption_color_today = get_adoption_color(adoption_today)
-    adoption_color_3days = get_adoption_color(adoption_3days)
-    adoption_color_week = get_adoption_color(adoption_week)
-
     data_color_today = get_data_quality_color(data_today)
     data_color_3days = get_data_quality_color(data_3days)
     data_color_week = get_data_quality_color(data_week)
@@ -1888,57 +1934,18 @@ with col_right:
     accuracy_color_3days = get_accuracy_color(accuracy_3days)
     accuracy_color_week = get_accuracy_color(accuracy_week)
 
-    # Card 1: AI Adoption Rate (Compact)
-    st.markdown(f"""
-    <div style="background: #FFFFFF; border: 1px solid #E8E8E8; border-radius: 8px; padding: 12px; margin-bottom: 10px; box-shadow: 0 1px 3px rgba(0, 0, 0, 0.02);">
-        <div style="color: #1A1A1A; font-size: 12px; font-weight: 600; margin-bottom: 8px;">🎯 AI Adoption Rate</div>
-        <div style="display: grid; grid-template-columns: repeat(3, 1fr); gap: 8px; margin-bottom: 8px;">
-            <div style="text-align: center; padding: 8px; background: #FAFAFA; border-radius: 6px;">
-                <div style="color: #6B6B6B; font-size: 9px; font-weight: 600; text-transform: uppercase; margin-bottom: 3px;">Today</div>
-                <div style="color: {adoption_color_today}; font-size: 18px; font-weight: 700; line-height: 1;">{adoption_today:.0f}%</div>
-            </div>
-            <div style="text-align: center; padding: 8px; background: #FAFAFA; border-radius: 6px;">
-                <div style="color: #6B6B6B; font-size: 9px; font-weight: 600; text-transform: uppercase; margin-bottom: 3px;">3 Days</div>
-                <div style="color: {adoption_color_3days}; font-size: 18px; font-weight: 700; line-height: 1;">{adoption_3days:.0f}%</div>
-            </div>
-            <div style="text-align: center; padding: 8px; background: #FAFAFA; border-radius: 6px;">
-                <div style="color: #6B6B6B; font-size: 9px; font-weight: 600; text-transform: uppercase; margin-bottom: 3px;">Week</div>
-                <div style="color: {adoption_color_week}; font-size: 18px; font-weight: 700; line-height: 1;">{adoption_week:.0f}%</div>
-            </div>
-        </div>
-        <div style="padding: 6px 8px; background: #F0F9FF; border-radius: 4px; border-left: 2px solid {adoption_color_week};">
-            <div style="color: #4A4A4A; font-size: 9px; line-height: 1.4;">
-                % of days following AI recommendations
-            </div>
-        </div>
-    </div>
-    """, unsafe_allow_html=True)
+    # Card 1: AI Adoption Rate (Compact), drawn by the adoption section below so decisions can refresh it
+    adoption_card_slot = st.empty()
 
     # Card 2: Data Quality (Compact)
-    st.markdown(f"""
-    <div style="background: #FFFFFF; border: 1px solid #E8E8E8; border-radius: 8px; padding: 12px; margin-bottom: 10px; box-shadow: 0 1px 3px rgba(0, 0, 0, 0.02);">
-        <div style="color: #1A1A1A; font-size: 12px; font-weight: 600; margin-bottom: 8px;">📡 Data Quality</div>
-        <div style="display: grid; grid-template-columns: repeat(3, 1fr); gap: 8px; margin-bottom: 8px;">
-            <div style="text-align: center; padding: 8px; background: #FAFAFA; border-radius: 6px;">
-                <div style="color: #6B6B6B; font-size: 9px; font-weight: 600; text-transform: uppercase; margin-bottom: 3px;">Today</div>
-                <div style="color: {data_color_today}; font-size: 18px; font-weight: 700; line-height: 1;">{data_today:.1f}%</div>
-            </div>
-            <div style="text-align: center; padding: 8px; background: #FAFAFA; border-radius: 6px;">
-                <div style="color: #6B6B6B; font-size: 9px; font-weight: 600; text-transform: uppercase; margin-bottom: 3px;">3 Days</div>
-                <div style="color: {data_color_3days}; font-size: 18px; font-weight: 700; line-height: 1;">{data_3days:.1f}%</div>
-            </div>
-            <div style="text-align: center; padding: 8px; background: #FAFAFA; border-radius: 6px;">
-                <div style="color: #6B6B6B; font-size: 9px; font-weight: 600; text-transform: uppercase; margin-bottom: 3px;">Week</div>
-                <div style="color: {data_color_week}; font-size: 18px; font-weight: 700; line-height: 1;">{data_week:.1f}%</div>
-            </div>
-        </div>
-        <div style="padding: 6px 8px; background: #F0FFF4; border-radius: 4px; border-left: 2px solid {data_color_week};">
-            <div style="color: #4A4A4A; font-size: 9px; line-height: 1.4;">
-                Completeness & freshness of data feeds
-            </div>
-        </div>
-    </div>
-    """, unsafe_allow_html=True)
+    st.markdown(METRIC_CARD.render(
+        title="📡 Data Quality",
+        color_today=data_color_today, value_today=f"{data_today:.1f}%",
+        color_3days=data_color_3days, value_3days=f"{data_3days:.1f}%",
+        color_week=data_color_week, value_week=f"{data_week:.1f}%",
+        footer_background="#F0FFF4",
+        footer=f"Completeness of hourly feeds • {freshness_display} • {data_gaps} missing hour{'s' if data_gaps != 1 else ''} this week"
+    ), unsafe_allow_html=True)
 
     # Card 3: Forecast Accuracy (Compact)
     # Format accuracy values - show "N/A" for future dates
@@ -1946,63 +1953,126 @@ with col_right:
     days3_display = "N/A" if accuracy_3days == 0.0 else f"{accuracy_3days:.1f}%"
     week_display = "N/A" if accuracy_week == 0.0 else f"{accuracy_week:.1f}%"
 
-    st.markdown(f"""
-    <div style="background: #FFFFFF; border: 1px solid #E8E8E8; border-radius: 8px; padding: 12px; margin-bottom: 10px; box-shadow: 0 1px 3px rgba(0, 0, 0, 0.02);">
-        <div style="color: #1A1A1A; font-size: 12px; font-weight: 600; margin-bottom: 8px;">🎯 Forecast Accuracy</div>
-        <div style="display: grid; grid-template-columns: repeat(3, 1fr); gap: 8px; margin-bottom: 8px;">
-            <div style="text-align: center; padding: 8px; background: #FAFAFA; border-radius: 6px;">
-                <div style="color: #6B6B6B; font-size: 9px; font-weight: 600; text-transform: uppercase; margin-bottom: 3px;">Today</div>
-                <div style="color: {accuracy_color_today}; font-size: 18px; font-weight: 700; line-height: 1;">{today_display}</div>
-            </div>
-            <div style="text-align: center; padding: 8px; background: #FAFAFA; border-radius: 6px;">
-                <div style="color: #6B6B6B; font-size: 9px; font-weight: 600; text-transform: uppercase; margin-bottom: 3px;">3 Days</div>
-                <div style="color: {accuracy_color_3days}; font-size: 18px; font-weight: 700; line-height: 1;">{days3_display}</div>
-            </div>
-            <div style="text-align: center; padding: 8px; background: #FAFAFA; border-radius: 6px;">
-                <div style="color: #6B6B6B; font-size: 9px; font-weight: 600; text-transform: uppercase; margin-bottom: 3px;">Week</div>
-                <div style="color: {accuracy_color_week}; font-size: 18px; font-weight: 700; line-height: 1;">{week_display}</div>
-            </div>
-        </div>
-        <div style="padding: 6px 8px; background: #F0FFF4; border-radius: 4px; border-left: 2px solid {accuracy_color_week};">
-            <div style="color: #4A4A4A; font-size: 9px; line-height: 1.4;">
-                Predicted vs Realized traffic accuracy
-            </div>
-        </div>
-    </div>
-    """, unsafe_allow_html=True)
+    st.markdown(METRIC_CARD.render(
+        title="🎯 Forecast Accuracy",
+        color_today=accuracy_color_today, value_today=today_display,
+        color_3days=accuracy_color_3days, value_3days=days3_display,
+        color_week=accuracy_color_week, value_week=week_display,
+        footer_background="#F0FFF4", footer="Today: hourly accuracy • 3 Days / Week: 1 − WAPE of day-ahead backtests"
+    ), unsafe_allow_html=True)
+
+# ============================================================================
+# AI ADOPTION SECTION (left column, filled last: the fragments below update the
+# AI Adoption card created in the right column)
+# ============================================================================
+with adoption_section, PROFILER.stage("adoption"):
+    if is_store_scope:
+        decision_panel(scope, stores_data, adoption_card_slot)
+    else:
+        render_adoption_card(adoption_card_slot, scope)
+        adoption_leaderboard(scope)
 
 st.markdown("<br>", unsafe_allow_html=True)
 
 # ============================================================================
 # SYSTEM HEALTH SECTION
 # ============================================================================
-st.markdown("""
-<div style="background: #FFFFFF; padding: 12px 16px; border-radius: 8px; border-left: 3px solid #F2B8C6; margin-bottom: 12px; box-shadow: 0 1px 3px rgba(0, 0, 0, 0.02);">
-    <div style="color: #1A1A1A; font-size: 13px; font-weight: 600; margin-bottom: 2px;">🔧 System Health Monitor</div>
-</div>
-""", unsafe_allow_html=True)
+st.markdown(SECTION_HEADER.render(title="🔧 System Health Monitor"), unsafe_allow_html=True)
 col_h1, col_h2, col_h3 = st.columns(3)
 
-with col_h1:
-    st.markdown("""
-    <div class="status-badge">
-        <div class="status-title">Data Feeds</div>
-        <div class="status-value">✅ Active</div>
-    </div>
-    """, unsafe_allow_html=True)
-
-with col_h2:
-    st.markdown("""
-    <div class="status-badge">
-        <div class="status-title">Model Drift</div>
-        <div class="status-value">📊 Monitoring Active</div>
-    </div>
-    """, unsafe_allow_html=True)
-
-with col_h3:
-    st.markdown("""
-    <div class="status-badge">
-        <div class="status-title">Data Quality</div>
-        <div class="status-value">✓ 99.4%</div>
-    </div>
-    """, unsafe_allow_html=True)
+# Fleet-wide feed health (constant-time reads from the data-quality monitor)
+now = datetime.now()
+fleet_feed_lag = data_quality.freshness_lag(FLEET_NODE, now)
+fleet_completeness = data_quality.completeness(FLEET_NODE, '7d', now)
+if fleet_feed_lag is None:
+    feed_status = "⚠️ No Data"
+elif fleet_feed_lag > STALE_FEED_HOURS:
+    feed_status = f"⚠️ Delayed ({fleet_feed_lag}h)"
+else:
+    feed_status = "✅ Active"
+
+# Sources that failed or timed out in their latest recent concurrent load (served from fallbacks)
+unavailable_sources = sum(len(report['timed_out']) + len(report['failed']) for report in recent_load_reports(now))
+if unavailable_sources and feed_status == "✅ Active":
+    feed_status = f"⚠️ Partial ({unavailable_sources} source{'s' if unavailable_sources != 1 else ''})"
+quality_icon = "✓" if fleet_completeness >= 95 else "⚠️"
+
+# Stores whose forecast residuals are drifting (Page-Hinkley or PSI alert)
+drift_alerts = drift_monitor.alerts()
+if drift_alerts:
+    drift_status = f"⚠️ {len(drift_alerts)} Store{'s' if len(drift_alerts) != 1 else ''} Drifting"
+    drift_detail = ", ".join(alert['store'] for alert in drift_alerts[:3])
+    if len(drift_alerts) > 3:
+        drift_detail += f" +{len(drift_alerts) - 3} more"
+else:
+    drift_status = "✅ No Drift"
+    drift_detail = f"{len(STORES)} stores monitored"
+
+with col_h1, PROFILER.stage("system_health"):
+    st.markdown(STATUS_BADGE.render(title="Data Feeds", value=feed_status, detail=""), unsafe_allow_html=True)
+
+with col_h2, PROFILER.stage("system_health"):
+    st.markdown(STATUS_BADGE.render(title="Model Drift", value=drift_status, detail=drift_detail), unsafe_allow_html=True)
+
+with col_h3, PROFILER.stage("system_health"):
+    st.markdown(STATUS_BADGE.render(
+        title="Data Quality", value=f"{quality_icon} {fleet_completeness:.1f}%", detail=""
+    ), unsafe_allow_html=True)
+
+PROFILER.end_rerun()
+
+# ============================================================================
+# PROFILING PANEL (admin view, only when PANDORA_PROFILING=1)
+# ============================================================================
+if PROFILER.enabled:
+    with st.expander("⏱️ Rerun Profiling (Admin)", expanded=False):
+        profile = PROFILER.summary()
+
+        if profile['reruns'] == 0:
+            st.caption("No completed reruns recorded yet.")
+        else:
+            total = profile['total']
+            st.caption(f"Last {profile['reruns']} reruns • mean {total['mean_ms']:.0f} ms • "
+                       f"p95 {total['p95_ms']:.0f} ms • max {total['max_ms']:.0f} ms")
+
+            stage_rows = [
+                {'Stage': name, 'Mean (ms)': round(s['mean_ms'], 1), 'P95 (ms)': round(s['p95_ms'], 1),
+                 'Max (ms)': round(s['max_ms'], 1), 'Calls/Rerun': round(s['calls_per_rerun'], 1),
+                 'Share': f"{s['share']:.0%}"}
+                for name, s in sorted(profile['stages'].items(), key=lambda item: -item[1]['mean_ms'])
+            ]
+            st.dataframe(pd.DataFrame(stage_rows), hide_index=True, use_container_width=True)
+
+            cache_rows = [
+                {'Cached Function': name, 'Calls': c['calls'], 'Misses': c['misses'], 'Hit Rate': f"{c['hit_rate']:.0%}"}
+                for name, c in profile['cache'].items()
+            ]
+            if cache_rows:
+                st.dataframe(pd.DataFrame(cache_rows), hide_index=True, use_container_width=True)
+
+        fragment_rows = [
+            {'Fragment': name, 'Runs': f['runs'], 'P50 (ms)': round(f['p50_ms'], 1),
+             'P95 (ms)': round(f['p95_ms'], 1), 'Max (ms)': round(f['max_ms'], 1)}
+            for name, f in profile['fragments'].items()
+        ]
+        if fragment_rows:
+            st.caption("Fragment-only reruns (interactions that did not rerun the app)")
+            st.dataframe(pd.DataFrame(fragment_rows), hide_index=True, use_container_width=True)
+
+        session_bytes = sum(session_footprint.values())
+        largest = ", ".join(f"{key} {size / 1024:.1f} KB" for key, size in list(session_footprint.items())[:3])
+        st.caption(f"Session state {session_bytes / 1024:.1f} KB of {SESSION_MEMORY_CAP_BYTES / 1024:.0f} KB cap • "
+                   f"largest: {largest}")
+
+        template_stats = render_stats().values()
+        template_hits = sum(info.hits for info in template_stats)
+        template_renders = template_hits + sum(info.misses for info in template_stats)
+        if template_renders:
+            st.caption(f"HTML templates: {template_hits:,} of {template_renders:,} renders served from the memo "
+                       f"({template_hits / template_renders:.0%})")
+
+        col_json, col_prom = st.columns(2)
+        with col_json:
+            st.download_button("Export JSON", PROFILER.to_json(), file_name="rerun_profile.json", mime="application/json")
+        with col_prom:
+            st.download_button("Export Prometheus", PROFILER.to_prometheus(), file_name="rerun_profile.prom", mime="text/plain")
@@ -0,0 +1,296 @@
+"""
+Backtesting
+Rolling-origin evaluation of the traffic forecast over the fleet's history:
+for every store and forecast origin, forecast the next days with only the
+information available at the origin, compare with the hourly actuals and
+report WAPE / MAPE / bias per store, hour and horizon. Stores × origins run
+on a process pool, and forecasts are cached on disk so a repeated run only
+computes origins it has not seen.
+
+Usage (from the pandora-forecasting-poc directory):
+    python backtesting.py                              # 28 origins, 7-day horizon, fleet
+    python backtesting.py --origins 56 --horizon 14 --model recalibrated --workers 8
+"""
+
+import argparse
+import hashlib
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from cache_versions import CACHE_VERSIONS
+from forecast_data import HOURS, generate_store_hourly_data
+
+# ============================================================================
+# BACKTEST SETTINGS
+# ============================================================================
+DEFAULT_ORIGINS = 28            # Forecast origins (one per day, most recent last)
+DEFAULT_HORIZON = 7             # Days forecast from each origin
+CALIBRATION_DAYS = 14           # Actuals before the origin used by the recalibrated model
+CALIBRATION_DAMPING = 0.8       # Level correction shrinks towards 1 by this factor per day of horizon
+ORIGINS_PER_TASK = 7            # Origins of one store per process pool task
+
+CACHE_DIR = os.environ.get(
+    "PANDORA_BACKTEST_CACHE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "backtest_cache")
+)
+
+
+# ============================================================================
+# MODELS
+# ============================================================================
+def _day(store, day):
+    """Hourly predicted and actual traffic of one store and date (float, NaN where no actual)"""
+    forecast = generate_store_hourly_data(store, day)
+    return forecast.predicted.astype(float), forecast.actual.astype(float)
+
+
+def forecast_from_origin(store, origin, horizon, model='generator'):
+    """
+    Forecasts made at the end of `origin` for the following days, with their actuals
+
+    Models:
+        generator: the dashboard's forecast as is
+        recalibrated: generator forecast scaled by the store's actual / predicted
+                      ratio over the CALIBRATION_DAYS up to the origin, damped
+                      towards 1 with the horizon
+
+    Returns:
+        Tuple of (forecast, actual) arrays of shape (horizon, hours)
+    """
+    targets = [_day(store, origin + timedelta(days=h)) for h in range(1, horizon + 1)]
+    forecast = np.array([predicted for predicted, _ in targets])
+    actual = np.array([observed for _, observed in targets])
+
+    if model == 'recalibrated':
+        history = [_day(store, origin - timedelta(days=d)) for d in range(CALIBRATION_DAYS)]
+        predicted = np.concatenate([p for p, _ in history])
+        observed = np.concatenate([a for _, a in history])
+        known = np.isfinite(observed)
+        ratio = observed[known].sum() / predicted[known].sum() if predicted[known].sum() > 0 else 1.0
+        damping = CALIBRATION_DAMPING ** np.arange(horizon)
+        forecast = forecast * (1 + (ratio - 1) * damping)[:, None]
+    elif model != 'generator':
+        raise ValueError(f"Unknown backtest model: {model}")
+    return forecast, actual
+
+
+def _run_task(store, origins, horizon, model):
+    """Process pool task: one store over several origins"""
+    results = [forecast_from_origin(store, origin, horizon, model) for origin in origins]
+    return store, origins, np.array([f for f, _ in results]), np.array([a for _, a in results])
+
+
+# ============================================================================
+# DISK CACHE
+# ============================================================================
+class ForecastCache:
+    """
+    Backtest forecasts on disk, one .npz per store and model configuration
+
+    Each file holds the origins computed so far with their (origins ×
+    horizon × hours) forecasts and actuals; new origins are merged in. Keys
+    include the store's cache version (parameters, staffing rules, code and
+    input data, see cache_versions.py), so a changed input never reuses old
+    forecasts and only the stores it affects are recomputed.
+    """
+
+    def __init__(self, directory=CACHE_DIR):
+        self.directory = directory
+        self._lock = threading.Lock()
+
+    def path(self, store, horizon, model):
+        """Cache file of one store and configuration"""
+        key = f"{CACHE_VERSIONS.store(store)}|{model}|{horizon}|{CALIBRATION_DAYS}|{CALIBRATION_DAMPING}|{store}"
+        return os.path.join(self.directory, hashlib.sha1(key.encode("utf-8")).hexdigest()[:20] + ".npz")
+
+    def load(self, store, horizon, model):
+        """Cached {origin ordinal: (forecast, actual)} of a store (empty when none)"""
+        path = self.path(store, horizon, model)
+        if not os.path.exists(path):
+            return {}
+        with np.load(path) as data:
+            return {int(o): (f, a) for o, f, a in zip(data['origins'], data['forecast'], data['actual'])}
+
+    def save(self, store, horizon, model, entries):
+        """Write all cached origins of a store (atomic replace)"""
+        origins = sorted(entries)
+        path = self.path(store, horizon, model)
+        tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            np.savez(tmp_path, origins=np.array(origins, dtype=np.int64),
+                     forecast=np.array([entries[o][0] for o in origins]),
+                     actual=np.array([entries[o][1] for o in origins]))
+            os.replace(tmp_path, path)
+
+
+# ============================================================================
+# BACKTEST
+# ============================================================================
+class BacktestResult:
+    """
+    Forecasts and actuals as (stores × origins × horizon × hours) arrays
+
+    Hours without an actual are NaN and left out of every metric.
+    """
+
+    AXES = {'store': 0, 'origin': 1, 'horizon': 2, 'hour': 3}
+
+    def __init__(self, stores, origins, forecast, actual, computed_origins=0):
+        self.stores = list(stores)
+        self.origins = list(origins)
+        self.forecast = forecast
+        self.actual = actual
+        self.horizon = forecast.shape[2]
+        self.computed_origins = computed_origins  # Store × origin pairs computed this run (others cached)
+
+    def metrics(self, by='store'):
+        """
+        WAPE, MAPE and bias grouped along one axis
+
+        Args:
+            by: 'store', 'origin', 'horizon' or 'hour'
+
+        Returns:
+            DataFrame indexed by the group with 'WAPE_%', 'MAPE_%', 'Bias_%'
+            (forecast − actual, relative to actual traffic) and 'Hours'
+        """
+        keep = self.AXES[by]
+        other = tuple(axis for axis in range(4) if axis != keep)
+        known = np.isfinite(self.actual)
+        error = np.where(known, self.forecast - self.actual, 0.0)
+        actual = np.where(known, self.actual, 0.0)
+        positive = known & (self.actual > 0)
+        ape = np.where(positive, np.abs(error) / np.where(positive, self.actual, 1.0), 0.0)
+
+        total_actual = actual.sum(axis=other)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            frame = pd.DataFrame({
+                'WAPE_%': np.abs(error).sum(axis=other) / total_actual * 100,
+                'MAPE_%': ape.sum(axis=other) / positive.sum(axis=other) * 100,
+                'Bias_%': error.sum(axis=other) / total_actual * 100,
+                'Hours': known.sum(axis=other),
+            }, index=pd.Index(self._labels(by), name=by.capitalize()))
+        return frame.round(2)
+
+    def _labels(self, by):
+        if by == 'store':
+            return self.stores
+        if by == 'origin':
+            return [date.fromordinal(o).isoformat() for o in self.origins]
+        if by == 'horizon':
+            return [f"D+{h}" for h in range(1, self.horizon + 1)]
+        return list(HOURS)
+
+    def error_sums(self, horizon=1):
+        """
+        Absolute error and actual traffic per store and target date at one horizon
+
+        Additive, so they roll up to any hierarchy node (WAPE = error / actual).
+
+        Returns:
+            Tuple of (target dates, abs_error, actual), arrays of shape (stores, origins)
+        """
+        known = np.isfinite(self.actual[:, :, horizon - 1])
+        error = np.where(known, np.abs(self.forecast[:, :, horizon - 1] - self.actual[:, :, horizon - 1]), 0.0)
+        actual = np.where(known, self.actual[:, :, horizon - 1], 0.0)
+        targets = [date.fromordinal(o) + timedelta(days=horizon) for o in self.origins]
+        return targets, error.sum(axis=2), actual.sum(axis=2)
+
+
+def rolling_origins(last_target, n_origins, horizon):
+    """
+    Daily origins whose whole horizon ends on or before last_target
+
+    Returns:
+        List of origin dates, oldest first
+    """
+    last_origin = last_target - timedelta(days=horizon)
+    return [last_origin - timedelta(days=i) for i in reversed(range(n_origins))]
+
+
+def run_backtest(stores, origins, horizon=DEFAULT_HORIZON, model='generator', workers=None, cache=None):
+    """
+    Rolling-origin backtest
+
+    Args:
+        stores: Stores to evaluate
+        origins: Origin dates (see rolling_origins); their horizons must be in the past
+        horizon: Days forecast from each origin
+        model: 'generator' or 'recalibrated' (see forecast_from_origin)
+        workers: Process pool size (None: CPU count, 1: run in this process)
+        cache: ForecastCache, or None to always recompute
+
+    Returns:
+        BacktestResult
+    """
+    ordinals = [origin.toordinal() for origin in origins]
+    cached = {store: cache.load(store, horizon, model) if cache else {} for store in stores}
+
+    tasks = []
+    for store in stores:
+        missing = [o for o in ordinals if o not in cached[store]]
+        for i in range(0, len(missing), ORIGINS_PER_TASK):
+            tasks.append((store, [date.fromordinal(o) for o in missing[i:i + ORIGINS_PER_TASK]]))
+
+    if tasks and (workers == 1 or len(tasks) == 1):
+        outcomes = [_run_task(store, task_origins, horizon, model) for store, task_origins in tasks]
+    elif tasks:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_run_task, store, task_origins, horizon, model) for store, task_origins in tasks]
+            outcomes = [future.result() for future in futures]
+    else:
+        outcomes = []
+
+    updated = set()
+    for store, task_origins, forecast, actual in outcomes:
+        for origin, f, a in zip(task_origins, forecast, actual):
+            cached[store][origin.toordinal()] = (f, a)
+        updated.add(store)
+    if cache:
+        for store in updated:
+            cache.save(store, horizon, model, cached[store])
+
+    shape = (len(stores), len(ordinals), horizon, len(HOURS))
+    forecast = np.empty(shape)
+    actual = np.empty(shape)
+    for s, store in enumerate(stores):
+        for o, ordinal in enumerate(ordinals):
+            forecast[s, o], actual[s, o] = cached[store][ordinal]
+    return BacktestResult(stores, ordinals, forecast, actual,
+                          computed_origins=sum(len(task_origins) for _, task_origins in tasks))
+
+
+def main(argv=None):
+    from store_hierarchy import StoreHierarchy
+
+    parser = argparse.ArgumentParser(description="Rolling-origin backtest of the traffic forecast")
+    parser.add_argument("--origins", type=int, default=DEFAULT_ORIGINS, help="Number of daily forecast origins")
+    parser.add_argument("--horizon", type=int, default=DEFAULT_HORIZON, help="Days forecast from each origin")
+    parser.add_argument("--model", choices=("generator", "recalibrated"), default="generator")
+    parser.add_argument("--workers", type=int, default=None, help="Process pool size (1: no pool)")
+    parser.add_argument("--no-cache", action="store_true", help="Recompute every origin")
+    args = parser.parse_args(argv)
+
+    stores = StoreHierarchy.from_csv().stores
+    last_target = datetime.now().date() - timedelta(days=1)  # Last day with a full day of actuals
+    origins = rolling_origins(last_target, args.origins, args.horizon)
+
+    start = datetime.now()
+    result = run_backtest(stores, origins, args.horizon, args.model, args.workers,
+                          None if args.no_cache else ForecastCache())
+    elapsed = (datetime.now() - start).total_seconds()
+    print(f"{len(stores)} stores × {len(origins)} origins × {args.horizon} days ({args.model}): "
+          f"{result.computed_origins} store-origins computed, rest cached, {elapsed:.1f} s\n")
+    for by in ('store', 'horizon', 'hour'):
+        print(result.metrics(by).to_string(), end="\n\n")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,377 @@
+"""
+Benchmark Suite
+Times the forecast, adjustment and KPI hot paths behind the dashboard at fleet
+sizes of 3, 60 and 600 stores, tracks peak memory and fails on regressions
+against a saved baseline
+
+Usage (from the pandora-forecasting-poc directory):
+    python benchmarks/run_benchmarks.py --save-baseline     # record a baseline
+    python benchmarks/run_benchmarks.py                     # compare, exit 1 on regression
+    python benchmarks/run_benchmarks.py --sizes 3 60 --threshold 0.5
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from forecast_data import (  # noqa: E402
+    HourlyTensor,
+    apply_traffic_adjustments,
+    calculate_forecast_accuracy,
+    calculate_kpis,
+    calculate_store_accuracy,
+    generate_implementation_calendar,
+    generate_store_daily_data,
+    generate_store_hourly_data,
+    week_dates,
+)
+from data_loader import load_all  # noqa: E402
+from reconciliation import HierarchyReconciler  # noqa: E402
+from staff_sharing import optimize_floaters  # noqa: E402
+from store_hierarchy import HierarchyRollup, StoreHierarchy  # noqa: E402
+from whatif import WhatIfBaseline  # noqa: E402
+
+# ============================================================================
+# SETTINGS
+# ============================================================================
+DEFAULT_SIZES = (3, 60, 600)
+DEFAULT_REPEAT = 5
+DEFAULT_THRESHOLD = 0.25        # Fail when median time or peak memory grows by more than 25%
+MIN_TIME_DELTA = 0.001          # Ignore timing regressions smaller than 1 ms (timer noise)
+MIN_MEMORY_DELTA = 64 * 1024    # Ignore memory regressions smaller than 64 KB
+FORECAST_DATE = date(2026, 1, 5)  # Fixed past Monday: every slot has actuals, runs are comparable
+SIMULATED_IO_S = 0.005          # Latency per store fetch in the load benchmarks (POS export / sensor file)
+
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+BASELINE_PATH = os.path.join(RESULTS_DIR, "baseline.json")
+LATEST_PATH = os.path.join(RESULTS_DIR, "latest.json")
+
+REAL_STORES = (
+    {'store': "London", 'city': "London", 'country': "United Kingdom", 'region': "Northern Europe"},
+    {'store': "Copenhagen", 'city': "Copenhagen", 'country': "Denmark", 'region': "Northern Europe"},
+    {'store': "Paris", 'city': "Paris", 'country': "France", 'region': "Western Europe"},
+)
+
+
+# ============================================================================
+# SYNTHETIC FLEET
+# ============================================================================
+def make_registry(n_stores):
+    """
+    Store registry of n_stores: the three real stores first, then synthetic
+    stores spread over 5 regions × 4 countries × 5 cities
+    """
+    records = list(REAL_STORES[:n_stores])
+    for i in range(len(records), n_stores):
+        region, country, city = i % 5, (i // 5) % 4, (i // 20) % 5
+        records.append({
+            'store': f"Store {i:04d}",
+            'city': f"City {region}-{country}-{city}",
+            'country': f"Country {region}-{country}",
+            'region': f"Region {region}",
+        })
+    return records
+
+
+def make_history(stores, days=30, seed=0):
+    """Implementation decisions for the last `days` days, ~70% following AI"""
+    rng = np.random.default_rng(seed)
+    dates = [(datetime.now() - timedelta(days=i)).strftime('%Y-%m-%d') for i in range(days)]
+    return {
+        store: {d: {'decision': int(rng.random() < 0.7)} for d in dates}
+        for store in stores
+    }
+
+
+def build_rollup(hierarchy, stores_data, view_mode):
+    """Traffic, staffing and accuracy rollup as built by the dashboard"""
+    baseline = WhatIfBaseline.from_forecasts(stores_data, stores_data, view_mode)
+    idx = [baseline.store_index[store] for store in hierarchy.stores]
+    accuracy = [calculate_store_accuracy(stores_data[store]) for store in hierarchy.stores]
+    return HierarchyRollup(hierarchy, {
+        'traffic': baseline.store_traffic[idx],
+        'baseline_staffing': baseline.store_baseline_staffing[idx],
+        'ai_staffing': baseline.store_ai_staffing[idx],
+        'accuracy_sum': [a[0] for a in accuracy],
+        'accuracy_count': [a[1] for a in accuracy],
+        'store_count': np.ones(len(hierarchy.stores))
+    })
+
+
+def make_case(n_stores):
+    """Inputs shared by every benchmark at one fleet size"""
+    hierarchy = StoreHierarchy(make_registry(n_stores))
+    stores = hierarchy.stores
+    hourly = {store: generate_store_hourly_data(store, FORECAST_DATE) for store in stores}
+    daily = {store: generate_store_daily_data(store, FORECAST_DATE) for store in stores}
+
+    # Planner adjusts the afternoon peak (+15%) in every store
+    adjustments = {store: {"14:00": 15, "15:00": 15, "16:00": 10} for store in stores}
+    dated_adjustments = {
+        store: {(FORECAST_DATE.isoformat(), hour): value for hour, value in store_adjustments.items()}
+        for store, store_adjustments in adjustments.items()
+    }
+
+    # Week of hourly store forecasts (stores × 84 slots) with independently forecast
+    # aggregates (±5%), as region / country / city models would produce them
+    tensor = HourlyTensor.from_forecasts(stores, week_dates(FORECAST_DATE), generate_store_hourly_data)
+    reconciler = HierarchyReconciler(hierarchy)
+    store_week = tensor.predicted.reshape(len(stores), -1).astype(float)
+    base = reconciler.aggregate(store_week) * np.random.default_rng(0).normal(1, 0.05, (reconciler.n_nodes, 1))
+
+    return {
+        'hierarchy': hierarchy,
+        'stores': stores,
+        'hourly': hourly,
+        'daily': daily,
+        'adjustments': adjustments,
+        'dated_adjustments': dated_adjustments,
+        'tensor': tensor,
+        'reconciler': reconciler,
+        'base_forecasts': base,
+        'clusters': [  # City clusters sharing one floater per store
+            (cluster, np.array([hourly[store].predicted for store in cluster]),
+             np.array([hourly[store].ai_staffing for store in cluster]))
+            for cluster in (hierarchy.stores_in(node) for node in hierarchy.nodes if hierarchy.level[node] == 'city')
+        ],
+        'rollup': build_rollup(hierarchy, hourly, 'hourly'),
+        'history': make_history(stores),
+    }
+
+
+# ============================================================================
+# BENCHMARKS
+# ============================================================================
+def bench_hourly_forecast(case):
+    for store in case['stores']:
+        generate_store_hourly_data(store, FORECAST_DATE)
+
+
+def bench_daily_forecast(case):
+    for store in case['stores']:
+        generate_store_daily_data(store, FORECAST_DATE)
+
+
+def bench_apply_adjustments(case):
+    apply_traffic_adjustments(case['hourly'], case['adjustments'], 'hourly')
+
+
+def bench_daily_reduction(case):
+    t = case['tensor']
+    tensor = HourlyTensor(t.stores, t.dates, t.predicted, t.actual, t.baseline_staffing, t.ai_staffing)
+    for store in case['stores']:
+        tensor.daily_forecast(store)
+
+
+def bench_adjust_week_tensor(case):
+    tensor = case['tensor'].with_adjustments(case['dated_adjustments'])
+    for store in case['stores']:
+        tensor.daily_forecast(store)
+
+
+def fetch_store(store):
+    """One store's forecast behind simulated I/O latency"""
+    time.sleep(SIMULATED_IO_S)
+    return generate_store_hourly_data(store, FORECAST_DATE)
+
+
+def bench_serial_load(case):
+    for store in case['stores']:
+        fetch_store(store)
+
+
+def bench_concurrent_load(case):
+    load_all({store: (lambda store=store: fetch_store(store)) for store in case['stores']})
+
+
+def bench_build_rollup(case):
+    build_rollup(case['hierarchy'], case['hourly'], 'hourly')
+
+
+def bench_kpis_all_nodes(case):
+    for node in case['hierarchy'].nodes:
+        calculate_kpis(node, case['rollup'])
+
+
+def bench_accuracy_all_nodes(case):
+    for node in case['hierarchy'].nodes:
+        calculate_forecast_accuracy(node, case['rollup'], FORECAST_DATE)
+
+
+def bench_reconciler_build(case):
+    HierarchyReconciler(case['hierarchy'])
+
+
+def bench_reconcile_bottom_up(case):
+    case['reconciler'].reconcile(case['base_forecasts'], 'bottom_up')
+
+
+def bench_reconcile_mint(case):
+    case['reconciler'].reconcile(case['base_forecasts'], 'mint', 'structural')
+
+
+def bench_staff_sharing(case):
+    for stores, traffic, staff in case['clusters']:
+        optimize_floaters(stores, traffic, staff, len(stores))
+
+
+def bench_calendar(case):
+    for store in case['stores']:
+        generate_implementation_calendar(store, case['history'])
+
+
+BENCHMARKS = (
+    ('generate_store_hourly_data', bench_hourly_forecast),
+    ('generate_store_daily_data', bench_daily_forecast),
+    ('apply_traffic_adjustments', bench_apply_adjustments),
+    ('hourly_tensor_daily_view', bench_daily_reduction),
+    ('hourly_tensor_adjustments', bench_adjust_week_tensor),
+    ('store_load_serial', bench_serial_load),
+    ('store_load_concurrent', bench_concurrent_load),
+    ('build_forecast_rollup', bench_build_rollup),
+    ('calculate_kpis', bench_kpis_all_nodes),
+    ('calculate_forecast_accuracy', bench_accuracy_all_nodes),
+    ('generate_implementation_calendar', bench_calendar),
+    ('hierarchy_reconciler_build', bench_reconciler_build),
+    ('reconcile_bottom_up', bench_reconcile_bottom_up),
+    ('reconcile_mint', bench_reconcile_mint),
+    ('staff_sharing_clusters', bench_staff_sharing),
+)
+
+
+# ============================================================================
+# RUNNER
+# ============================================================================
+def measure(func, case, repeat):
+    """
+    Time and memory for one benchmark
+
+    Timing and memory come from separate runs: tracemalloc slows allocation
+    heavy code considerably, so it must not be active while timing.
+
+    Returns:
+        Dictionary with median/min seconds and peak traced memory in bytes
+    """
+    func(case)  # Warm-up (imports, first-call allocations)
+
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(case)
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    func(case)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {'median_s': statistics.median(times), 'min_s': min(times), 'peak_bytes': peak}
+
+
+def run(sizes, repeat, only=None):
+    """Run every benchmark at every fleet size; results keyed 'name[n_stores]'"""
+    results = {}
+    for n_stores in sizes:
+        case = make_case(n_stores)
+        for name, func in BENCHMARKS:
+            if only and not any(pattern in name for pattern in only):
+                continue
+            key = f"{name}[{n_stores}]"
+            results[key] = measure(func, case, repeat)
+            r = results[key]
+            print(f"{key:<45} {r['median_s'] * 1000:>10.2f} ms  (min {r['min_s'] * 1000:.2f} ms)  "
+                  f"peak {r['peak_bytes'] / 1024:>10.1f} KB")
+    return results
+
+
+def compare(results, baseline, threshold):
+    """
+    Regressions vs a baseline
+
+    Returns:
+        List of human-readable regression descriptions (empty = pass)
+    """
+    regressions = []
+    for key, current in results.items():
+        previous = baseline.get(key)
+        if previous is None:
+            continue
+
+        time_delta = current['median_s'] - previous['median_s']
+        if time_delta > MIN_TIME_DELTA and current['median_s'] > previous['median_s'] * (1 + threshold):
+            regressions.append(f"{key}: time {previous['median_s'] * 1000:.2f} ms → "
+                               f"{current['median_s'] * 1000:.2f} ms "
+                               f"(+{time_delta / previous['median_s']:.0%})")
+
+        memory_delta = current['peak_bytes'] - previous['peak_bytes']
+        if memory_delta > MIN_MEMORY_DELTA and current['peak_bytes'] > previous['peak_bytes'] * (1 + threshold):
+            regressions.append(f"{key}: peak memory {previous['peak_bytes'] / 1024:.0f} KB → "
+                               f"{current['peak_bytes'] / 1024:.0f} KB "
+                               f"(+{memory_delta / max(previous['peak_bytes'], 1):.0%})")
+    return regressions
+
+
+def save(results, path):
+    """Write results with enough environment info to judge comparability"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'results': results
+        }, f, indent=2)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the forecast, adjustment and KPI hot paths")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES),
+                        help="Fleet sizes (number of stores) to benchmark")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="Timed runs per benchmark")
+    parser.add_argument("--only", nargs="+", help="Run only benchmarks whose name contains one of these")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Allowed relative slowdown / memory growth before failing (0.25 = 25%%)")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="Baseline results file")
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the new baseline")
+    args = parser.parse_args(argv)
+
+    results = run(args.sizes, args.repeat, args.only)
+    save(results, LATEST_PATH)
+
+    if args.save_baseline:
+        save(results, args.baseline)
+        print(f"\nBaseline saved to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"\nNo baseline at {args.baseline} (run with --save-baseline first)")
+        return 0
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)['results']
+
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+        for regression in regressions:
+            print(f"  - {regression}")
+        return 1
+
+    print(f"\nNo regressions beyond {args.threshold:.0%} vs {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,137 @@
+"""
+Startup Profile
+Where a fresh container's time-to-first-render goes: the import time of the
+modules app.py loads (python -X importtime) and the dashboard's first run
+in a new process, cold (empty on-disk caches) and after warmup.py
+
+Every measurement runs in its own subprocess with its own temporary cache
+directories, so nothing is shared with the caches under data/.
+
+Usage (from the pandora-forecasting-poc directory):
+    python benchmarks/startup_profile.py
+    python benchmarks/startup_profile.py --runs 5 --top 20
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_PATH = os.path.join(ROOT, "app.py")
+
+# ============================================================================
+# SETTINGS
+# ============================================================================
+DEFAULT_RUNS = 3
+DEFAULT_TOP = 15
+RENDER_TIMEOUT_S = 300
+APP_MODULES = (  # Imported at the top of app.py (the lazily imported plotly / scipy are left out on purpose)
+    'streamlit', 'pandas', 'numpy', 'forecast_data', 'staffing_model', 'scenario_engine', 'adoption_index',
+    'backtesting', 'cache_versions', 'data_loader', 'data_quality', 'event_calendar', 'export_service',
+    'intraday', 'model_drift', 'prediction_intervals', 'profiling', 'reconciliation', 'session_memory',
+    'staff_sharing', 'warmup', 'whatif', 'store_hierarchy', 'ui_templates',
+)
+LAZY_MODULES = ('plotly.graph_objects', 'plotly.subplots', 'scipy.sparse.linalg')
+
+FIRST_RENDER = f"""
+import time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+imported = time.perf_counter()
+at = AppTest.from_file({APP_PATH!r}, default_timeout={RENDER_TIMEOUT_S})
+at.run()
+rendered = time.perf_counter()
+assert not at.exception, at.exception
+print(imported - start, rendered - imported)
+"""
+
+
+# ============================================================================
+# IMPORT TIME
+# ============================================================================
+def import_times(modules):
+    """
+    Cumulative import time of each module in a fresh interpreter
+
+    Returns:
+        List of (module, seconds), slowest first
+    """
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import " + ", ".join(modules)],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    times = []
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if name.strip() in modules:  # Not interpreter startup (site, encodings) or nested imports
+            times.append((name.strip(), int(cumulative) / 1e6))
+    return sorted(times, key=lambda item: item[1], reverse=True)
+
+
+# ============================================================================
+# FIRST RENDER
+# ============================================================================
+def first_render(env, warm=False):
+    """
+    Seconds to import streamlit's test harness and to run the dashboard once, in a new process
+
+    Args:
+        env: Environment with the cache directory overrides
+        warm: Run warmup.py (in its own process, like a container entrypoint) first
+    """
+    if warm:
+        subprocess.run([sys.executable, os.path.join(ROOT, "warmup.py")], cwd=ROOT, env=env,
+                       capture_output=True, check=True)
+    process = subprocess.run([sys.executable, "-c", FIRST_RENDER], cwd=ROOT, env=env,
+                             capture_output=True, text=True, check=True)
+    harness_s, render_s = (float(value) for value in process.stdout.split()[-2:])
+    return harness_s, render_s
+
+
+def cache_env(directory):
+    """Environment pointing every on-disk cache at an empty directory"""
+    env = dict(os.environ)
+    env['PANDORA_FEATURE_DIR'] = os.path.join(directory, "features")
+    env['PANDORA_SNAPSHOT_DIR'] = os.path.join(directory, "forecast_snapshots")
+    env['PANDORA_BACKTEST_CACHE'] = os.path.join(directory, "backtest_cache")
+    return env
+
+
+def profile_renders(runs):
+    """Median (harness, first render) seconds, cold and warmed up"""
+    results = {}
+    for label, warm in (('cold', False), ('warmed up', True)):
+        timings = []
+        for _ in range(runs):
+            with tempfile.TemporaryDirectory() as directory:
+                timings.append(first_render(cache_env(directory), warm))
+        results[label] = (statistics.median(t[0] for t in timings), statistics.median(t[1] for t in timings))
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Profile imports and the first render of a fresh process")
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS, help="First renders timed per variant")
+    parser.add_argument("--top", type=int, default=DEFAULT_TOP, help="Slowest imports listed")
+    args = parser.parse_args(argv)
+
+    print("Slowest imports of app.py (cumulative):")
+    for name, seconds in import_times(APP_MODULES)[:args.top]:
+        print(f"  {name:<30} {seconds * 1000:>9.1f} ms")
+    print("Loaded on first use instead:")
+    for name, seconds in import_times(LAZY_MODULES):
+        print(f"  {name:<30} {seconds * 1000:>9.1f} ms")
+
+    print(f"\nFirst render of a new process (median of {args.runs}):")
+    for label, (harness_s, render_s) in profile_renders(args.runs).items():
+        print(f"  {label:<12} first render {render_s:.2f} s  (test harness import {harness_s:.2f} s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
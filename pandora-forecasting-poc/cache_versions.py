@@ -0,0 +1,193 @@
+"""
+Cache Versions
+Cache keys derived from what a forecast depends on - the store's generator
+parameters, the staffing rule table, the forecasting code and a watermark of
+the input data files - instead of a manually bumped version string, so a
+change to any of them invalidates exactly the forecasts it affects
+"""
+
+import hashlib
+import os
+import threading
+from datetime import datetime
+
+import staffing_model
+from event_calendar import HOLIDAYS_PATH, PROMOTIONS_PATH
+from feature_store import FEATURE_STORE
+from forecast_data import STORE_PARAMETERS
+from store_hierarchy import REGISTRY_PATH
+
+# ============================================================================
+# VERSION INPUTS
+# ============================================================================
+MODULE_DIR = os.path.dirname(os.path.abspath(__file__))
+CODE_PATHS = tuple(  # Forecast code: a changed source invalidates every store
+    os.path.join(MODULE_DIR, name)
+    for name in ('forecast_data.py', 'staffing_model.py', 'event_calendar.py', 'feature_store.py')
+)
+STAFFING_RULES = (
+    'HOURLY_AI_STAFFING_TIERS', 'HOURLY_AI_PEAK_VISITORS_PER_STAFF', 'HOURLY_AI_PEAK_STAFF_RANGE',
+    'HOURLY_BASELINE_STAFFING_TIERS', 'HOURLY_BASELINE_PEAK_STAFF',
+)
+DATA_PATHS = (  # Input data watermark (the feature array is compiled from these CSVs)
+    REGISTRY_PATH, HOLIDAYS_PATH, PROMOTIONS_PATH,
+    FEATURE_STORE.csv_path('weather'), FEATURE_STORE.csv_path('tourism'), FEATURE_STORE.csv_path('local_events'),
+)
+INTRADAY_TTL_MINUTES = 60       # Today's actuals arrive hourly: today's forecasts expire every hour
+VERSION_LENGTH = 16             # Hex digits kept of each version hash
+
+
+def digest(*parts):
+    """Short stable hash of some values (their repr, so equal values give equal versions in every process)"""
+    return hashlib.sha1(repr(parts).encode("utf-8")).hexdigest()[:VERSION_LENGTH]
+
+
+def file_watermark(paths):
+    """(modification time in ns, size) per file, None for a missing file"""
+    watermark = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            watermark.append((stat.st_mtime_ns, stat.st_size))
+        except FileNotFoundError:
+            watermark.append(None)
+    return tuple(watermark)
+
+
+def intraday_bucket(dates, now=None):
+    """
+    TTL bucket of intraday data
+
+    Args:
+        dates: Dates a cached value covers
+        now: Current time (default: now)
+
+    Returns:
+        Start of the current INTRADAY_TTL_MINUTES window as 'YYYY-MM-DDTHH:MM'
+        if today is one of the dates (its actuals are still arriving), else
+        None: values of other dates never expire
+    """
+    now = datetime.now() if now is None else now
+    if now.date() not in dates:
+        return None
+    minutes = now.hour * 60 + now.minute
+    minutes -= minutes % INTRADAY_TTL_MINUTES
+    return now.replace(hour=minutes // 60, minute=minutes % 60).strftime("%Y-%m-%dT%H:%M")
+
+
+class CacheVersions:
+    """
+    Per-store forecast versions
+
+    A store's version hashes its own generator parameters with the fleet-wide
+    parts (code, staffing rules, data watermark), so editing one store's row
+    of data/store_params.csv changes only that store's version. refresh()
+    picks up changes on disk; between refreshes a version is a dictionary
+    lookup.
+    """
+
+    def __init__(self, parameters=STORE_PARAMETERS, code_paths=CODE_PATHS, data_paths=DATA_PATHS):
+        self.parameters = parameters
+        self.code_paths = code_paths
+        self.data_paths = data_paths
+        self._code_stat = None
+        self._code_version = None
+        self.fleet_part = None
+        self._stores = {}
+        self._fleets = {}
+        self._lock = threading.Lock()
+        self.refresh()
+
+    def _code(self):
+        """Hash of the forecasting code, re-read only when a file's stat changes (a touch alone keeps it)"""
+        stat = file_watermark(self.code_paths)
+        if stat != self._code_stat:
+            sha = hashlib.sha1()
+            for path in self.code_paths:
+                if os.path.exists(path):
+                    with open(path, "rb") as f:
+                        sha.update(f.read())
+            self._code_stat, self._code_version = stat, sha.hexdigest()[:VERSION_LENGTH]
+        return self._code_version
+
+    def refresh(self):
+        """
+        Re-check the version inputs (a few stat calls; run once per rerun)
+
+        Returns:
+            True if any store's version may have changed
+        """
+        with self._lock:
+            params_changed = self.parameters.reload()
+            staffing = tuple(getattr(staffing_model, name) for name in STAFFING_RULES)
+            fleet_part = digest(self._code(), staffing, file_watermark(self.data_paths))
+            if not params_changed and fleet_part == self.fleet_part:
+                return False
+            self.fleet_part = fleet_part
+            self._stores = {}
+            self._fleets = {}
+            return True
+
+    def store(self, store):
+        """Version of one store's forecasts"""
+        version = self._stores.get(store)
+        if version is None:
+            version = self._stores[store] = digest(self.fleet_part, store, self.parameters.get(store))
+        return version
+
+    def fleet(self, stores):
+        """Version of a store set's forecasts (changes with any member's version)"""
+        key = tuple(stores)
+        version = self._fleets.get(key)
+        if version is None:
+            version = self._fleets[key] = digest(*(self.store(store) for store in key))
+        return version
+
+    def week(self, stores, dates, now=None):
+        """Version of a store set's forecasts over some dates: fleet version and intraday TTL bucket"""
+        return self.fleet(stores), intraday_bucket(dates, now)
+
+
+class VersionedBuilds:
+    """
+    Last value built per key with the store versions it was built from
+
+    Lets a cache rebuild after a version change reuse the stores whose
+    version did not change: stale() names the stores to recompute.
+    """
+
+    def __init__(self, max_entries=16):
+        self.max_entries = max_entries
+        self._builds = {}
+        self._lock = threading.Lock()
+
+    def stale(self, key, versions):
+        """
+        Args:
+            key: Build key (e.g. week start)
+            versions: Dictionary store → version wanted
+
+        Returns:
+            Tuple of (previous value or None, stores to recompute)
+        """
+        previous = self._builds.get(key)
+        if previous is None:
+            return None, list(versions)
+        built, value = previous
+        return value, [store for store, version in versions.items() if built.get(store) != version]
+
+    def incomplete(self, key):
+        """True if the last value of a key holds stores recorded without a version (e.g. fallback data)"""
+        previous = self._builds.get(key)
+        return previous is not None and None in previous[0].values()
+
+    def record(self, key, versions, value):
+        """Keep a value with the versions of the stores it holds (oldest key dropped beyond max_entries)"""
+        with self._lock:
+            self._builds.pop(key, None)
+            self._builds[key] = (dict(versions), value)
+            while len(self._builds) > self.max_entries:
+                del self._builds[next(iter(self._builds))]
+
+
+CACHE_VERSIONS = CacheVersions()
@@ -0,0 +1,99 @@
+"""
+Concurrent Data Loading
+Fetches many independent sources (store forecasts, feed actuals, decision
+history) concurrently on an asyncio event loop, with bounded concurrency,
+per-source timeouts and fallback values for sources that fail, so a load
+takes about as long as its slowest source instead of the sum of all of them
+"""
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# ============================================================================
+# LOADER SETTINGS
+# ============================================================================
+DEFAULT_CONCURRENCY = 16        # Sources in flight at once (connection / file handle budget)
+DEFAULT_TIMEOUT_S = 10.0        # Per-source timeout before its fallback is used
+
+
+async def _load_one(key, source, semaphore, executor, timeout):
+    """Run one source under the concurrency limit; returns (key, status, value, seconds)"""
+    async with semaphore:
+        start = time.perf_counter()
+        try:
+            if asyncio.iscoroutinefunction(source):
+                value = await asyncio.wait_for(source(), timeout)
+            else:
+                # Blocking I/O runs on the loader's own thread pool
+                value = await asyncio.wait_for(asyncio.get_running_loop().run_in_executor(executor, source), timeout)
+            return key, 'ok', value, time.perf_counter() - start
+        except asyncio.TimeoutError:
+            return key, 'timeout', None, time.perf_counter() - start
+        except Exception as exc:  # A failing source must not fail the whole load
+            return key, 'error', exc, time.perf_counter() - start
+
+
+async def load_all_async(sources, concurrency=DEFAULT_CONCURRENCY, timeout=DEFAULT_TIMEOUT_S, fallback=None):
+    """
+    Load every source concurrently
+
+    Args:
+        sources: Dictionary key → zero-argument callable (blocking) or coroutine function
+        concurrency: Maximum number of sources in flight
+        timeout: Seconds per source before it counts as timed out
+        fallback: Optional function key → value used for sources that time out
+                  or fail (e.g. the last cached copy); None leaves them out
+
+    Returns:
+        Tuple of (results, report):
+        - results: Dictionary key → value (fallback values included)
+        - report: Dictionary with 'loaded', 'timed_out', 'failed' ({key: error}),
+          'fallbacks', 'elapsed_s', 'slowest_s' and 'sum_s' (serial equivalent)
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    start = time.perf_counter()
+    # Sized to the concurrency limit: the default pool (CPU count + 4) would cap I/O waits
+    executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="data-loader")
+    try:
+        outcomes = await asyncio.gather(*(
+            _load_one(key, source, semaphore, executor, timeout) for key, source in sources.items()
+        ))
+    finally:
+        executor.shutdown(wait=False)  # Timed-out sources finish in the background
+
+    results = {}
+    report = {'loaded': 0, 'timed_out': [], 'failed': {}, 'fallbacks': 0}
+    for key, status, value, _ in outcomes:
+        if status == 'ok':
+            results[key] = value
+            report['loaded'] += 1
+            continue
+        if status == 'timeout':
+            report['timed_out'].append(key)
+        else:
+            report['failed'][key] = repr(value)
+        if fallback is not None:
+            try:
+                results[key] = fallback(key)
+                report['fallbacks'] += 1
+            except Exception as exc:
+                report['failed'][key] = repr(exc)
+
+    durations = [seconds for _, _, _, seconds in outcomes]
+    report['elapsed_s'] = time.perf_counter() - start
+    report['slowest_s'] = max(durations, default=0.0)
+    report['sum_s'] = sum(durations)
+    return results, report
+
+
+def load_all(sources, concurrency=DEFAULT_CONCURRENCY, timeout=DEFAULT_TIMEOUT_S, fallback=None):
+    """
+    Synchronous entry point for load_all_async
+
+    Streamlit scripts and cached functions run on plain threads without an
+    event loop, so each call runs its own loop. Note that a timed-out
+    blocking source keeps its worker thread until it returns; only its
+    result is discarded.
+    """
+    return asyncio.run(load_all_async(sources, concurrency, timeout, fallback))
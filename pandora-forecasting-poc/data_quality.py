@@ -0,0 +1,187 @@
+"""
+Data Quality Monitor
+Completeness, freshness and gap detection for the hourly traffic feeds,
+maintained incrementally per ingested batch with counters on every hierarchy
+node so any scope reads in constant time
+"""
+
+import threading
+
+import numpy as np
+
+# ============================================================================
+# FEED SETTINGS
+# ============================================================================
+OPEN_HOUR = 9                   # First operating hour (09:00)
+SLOTS_PER_DAY = 12              # Hourly records per store per day (09:00-21:00)
+HORIZON_DAYS = 7                # Days of counters kept (longest window)
+WINDOWS = {'today': 1, '3d': 3, '7d': 7}
+STALE_FEED_HOURS = 2            # Operating hours without records before a feed counts as delayed
+
+# Popcount of every 12-bit received mask
+_POPCOUNT = np.array([bin(m).count("1") for m in range(1 << SLOTS_PER_DAY)], dtype=np.int16)
+
+
+def expected_slots_today(now):
+    """Hourly records due so far today (hours that have fully passed)"""
+    return int(np.clip(now.hour - OPEN_HOUR, 0, SLOTS_PER_DAY))
+
+
+def _gaps(mask):
+    """Missing hours before the latest received hour of a day (holes, not trailing lag)"""
+    mask = np.asarray(mask, dtype=np.int64)
+    highest = np.where(mask > 0, np.floor(np.log2(np.maximum(mask, 1))).astype(np.int64) + 1, 0)
+    return highest - _POPCOUNT[mask]
+
+
+class DataQualityMonitor:
+    """
+    Received-record counters per store and per hierarchy node
+
+    Each store-day holds a bitmask of the hours received. Ingesting a batch
+    ORs new hours into the mask and pushes the change in received records and
+    gaps up the store's ancestor chain (store → city → country → region →
+    fleet), so reads never aggregate over stores. Day columns form a ring of
+    HORIZON_DAYS and are cleared when a new day first appears.
+    """
+
+    def __init__(self, hierarchy, horizon=HORIZON_DAYS):
+        self.hierarchy = hierarchy
+        self.horizon = horizon
+        self.version = 0  # Bumped whenever new records arrive
+        self.polled = None  # Last (date, hour) the feeds were polled, maintained by the caller
+
+        n_stores = len(hierarchy.stores)
+        n_nodes = len(hierarchy.row)
+        self._node_by_row = {row: node for node, row in hierarchy.row.items()}
+        self._store_count = np.zeros(n_nodes, dtype=np.int64)
+        self._ancestors = []
+        for store in hierarchy.stores:
+            rows, node = [], store
+            while node is not None:
+                rows.append(hierarchy.row[node])
+                node = hierarchy.parent[node]
+            self._ancestors.append(np.array(rows, dtype=np.intp))
+            self._store_count[rows] += 1
+
+        self._day_ordinal = np.full(horizon, -1, dtype=np.int64)
+        self._masks = np.zeros((n_stores, horizon), dtype=np.int64)
+        self._received = np.zeros((n_nodes, horizon), dtype=np.int64)
+        self._gap_count = np.zeros((n_nodes, horizon), dtype=np.int64)
+
+        # Freshness: position (day ordinal × slots + hour slot) of the latest record
+        self._last_position = np.full(n_stores, -1, dtype=np.int64)
+        self._oldest_position = np.full(n_nodes, -1, dtype=np.int64)  # Stalest store per node
+        self._lock = threading.Lock()
+
+    def _column(self, ordinal):
+        """Ring column for a day, cleared if it still holds an older day"""
+        col = ordinal % self.horizon
+        if self._day_ordinal[col] != ordinal:
+            if self._day_ordinal[col] > ordinal:
+                return None  # Older than the horizon
+            self._day_ordinal[col] = ordinal
+            self._masks[:, col] = 0
+            self._received[:, col] = 0
+            self._gap_count[:, col] = 0
+        return col
+
+    def ingest(self, batch):
+        """
+        Ingest a batch of hourly records
+
+        Args:
+            batch: Iterable of (store, date, slots) where slots are the hour
+                   indexes (0 = 09:00) received for that store and date;
+                   hours already received are ignored
+
+        Returns:
+            Number of new records
+        """
+        new_records = 0
+        touched = set()
+
+        with self._lock:
+            for store, day, slots in batch:
+                s = self.hierarchy.store_index.get(store)
+                if s is None or len(slots) == 0:
+                    continue
+                col = self._column(day.toordinal())
+                if col is None:
+                    continue
+
+                old_mask = self._masks[s, col]
+                new_mask = old_mask | int(np.bitwise_or.reduce(np.left_shift(1, np.asarray(slots, dtype=np.int64))))
+                if new_mask == old_mask:
+                    continue
+                self._masks[s, col] = new_mask
+
+                added = int(_POPCOUNT[new_mask] - _POPCOUNT[old_mask])
+                gap_delta = int(_gaps(new_mask) - _gaps(old_mask))
+                ancestors = self._ancestors[s]
+                self._received[ancestors, col] += added
+                self._gap_count[ancestors, col] += gap_delta
+                new_records += added
+
+                position = day.toordinal() * SLOTS_PER_DAY + int(np.floor(np.log2(new_mask)))
+                if position > self._last_position[s]:
+                    self._last_position[s] = position
+                    touched.add(s)
+
+            # Stalest store per node: only nodes above updated stores can change
+            for node_row in {row for s in touched for row in self._ancestors[s]}:
+                node = self._node_by_row[node_row]
+                start, end = self.hierarchy.span[node]
+                self._oldest_position[node_row] = self._last_position[start:end].min()
+
+            if new_records:
+                self.version += 1
+        return new_records
+
+    # ------------------------------------------------------------------
+    # Queries (constant time per node)
+    # ------------------------------------------------------------------
+    def _window_columns(self, today, days):
+        ordinals = today.toordinal() - np.arange(days)
+        cols = ordinals % self.horizon
+        return cols[self._day_ordinal[cols] == ordinals]
+
+    def completeness(self, node, window, now):
+        """
+        Received / expected hourly records (%) for a node over a window
+
+        Args:
+            node: Hierarchy node
+            window: 'today', '3d' or '7d'
+            now: Current datetime (today's expected records are the hours passed)
+        """
+        days = WINDOWS[window]
+        row = self.hierarchy.row[node]
+        expected = self._store_count[row] * (expected_slots_today(now) + SLOTS_PER_DAY * (days - 1))
+        if expected == 0:
+            return 100.0
+        received = self._received[row, self._window_columns(now.date(), days)].sum()
+        return float(min(received / expected, 1.0) * 100)
+
+    def gaps(self, node, window, now):
+        """Missing hours inside received ranges (holes) for a node over a window"""
+        row = self.hierarchy.row[node]
+        return int(self._gap_count[row, self._window_columns(now.date(), WINDOWS[window])].sum())
+
+    def freshness_lag(self, node, now):
+        """
+        Operating hours since the stalest store of a node last sent a record
+
+        Returns:
+            Lag in hours (0 = up to date), None if the node has never reported
+        """
+        oldest = self._oldest_position[self.hierarchy.row[node]]
+        if oldest < 0:
+            return None
+        # Latest record due: the last fully passed hour today, else yesterday's close
+        due_today = expected_slots_today(now)
+        if due_today > 0:
+            latest_due = now.date().toordinal() * SLOTS_PER_DAY + due_today - 1
+        else:
+            latest_due = (now.date().toordinal() - 1) * SLOTS_PER_DAY + SLOTS_PER_DAY - 1
+        return int(max(0, latest_due - oldest))
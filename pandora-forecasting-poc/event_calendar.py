@@ -0,0 +1,127 @@
+"""
+Event Calendar
+Holiday and promotional event multipliers on store traffic, loaded from local
+CSV tables and precomputed into a store × day-of-year matrix per year, so a
+forecast looks its multiplier up in constant time however many events exist
+"""
+
+import csv
+import os
+import threading
+from datetime import date
+
+import numpy as np
+
+from store_hierarchy import REGISTRY_PATH
+
+# ============================================================================
+# CALENDAR FILES
+# ============================================================================
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+HOLIDAYS_PATH = os.path.join(DATA_DIR, "events", "holidays.csv")       # country,date,name,multiplier
+PROMOTIONS_PATH = os.path.join(DATA_DIR, "events", "promotions.csv")   # name,start_date,end_date,countries,multiplier
+ALL_COUNTRIES = "*"             # Promotion runs in every country
+COUNTRY_SEPARATOR = ";"         # Promotion limited to several countries: "Denmark;France"
+
+
+class EventCalendar:
+    """
+    Traffic multipliers per store and date from holidays and promotions
+
+    Holidays apply to every store of their country; promotions run over a
+    date range in all or some countries. Overlapping events multiply. Each
+    year is compiled once into a (stores × days) matrix (one extra
+    row of ones for stores outside the registry); lookups index into it.
+    """
+
+    def __init__(self, stores, store_countries, events):
+        """
+        Args:
+            stores: Store names
+            store_countries: Dictionary store → country
+            events: List of (name, start date, end date, countries or None for all, multiplier)
+        """
+        self.stores = list(stores)
+        self.store_index = {store: i for i, store in enumerate(self.stores)}
+        self.default_row = len(self.stores)  # Unknown stores: no events
+
+        country_rows = {}
+        for store in self.stores:
+            country_rows.setdefault(store_countries.get(store), []).append(self.store_index[store])
+        self._country_rows = {country: np.array(rows) for country, rows in country_rows.items()}
+        self._all_rows = np.arange(len(self.stores))
+
+        self.events = sorted(events, key=lambda event: event[1])
+        self._years = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_csv(cls, holidays_path=HOLIDAYS_PATH, promotions_path=PROMOTIONS_PATH, registry_path=REGISTRY_PATH):
+        """Load the holiday and promotion tables (a missing table means no events of that kind)"""
+        with open(registry_path, newline="", encoding="utf-8") as f:
+            store_countries = {row['store']: row['country'] for row in csv.DictReader(f)}
+
+        events = []
+        if os.path.exists(holidays_path):
+            with open(holidays_path, newline="", encoding="utf-8") as f:
+                for row in csv.DictReader(f):
+                    day = date.fromisoformat(row['date'])
+                    events.append((row['name'], day, day, (row['country'],), float(row['multiplier'])))
+        if os.path.exists(promotions_path):
+            with open(promotions_path, newline="", encoding="utf-8") as f:
+                for row in csv.DictReader(f):
+                    countries = None if row['countries'] == ALL_COUNTRIES else tuple(row['countries'].split(COUNTRY_SEPARATOR))
+                    events.append((row['name'], date.fromisoformat(row['start_date']),
+                                   date.fromisoformat(row['end_date']), countries, float(row['multiplier'])))
+        return cls(list(store_countries), store_countries, events)
+
+    def _rows(self, countries):
+        """Matrix rows of the stores in some countries (all stores for None)"""
+        if countries is None:
+            return self._all_rows
+        rows = [self._country_rows[country] for country in countries if country in self._country_rows]
+        return np.concatenate(rows) if rows else self._all_rows[:0]
+
+    def year_matrix(self, year):
+        """(stores + 1) × days-of-year multipliers of one year, compiled on first use"""
+        matrix = self._years.get(year)
+        if matrix is not None:
+            return matrix
+
+        with self._lock:
+            if year not in self._years:
+                first = date(year, 1, 1).toordinal()
+                n_days = date(year, 12, 31).toordinal() - first + 1
+                matrix = np.ones((len(self.stores) + 1, n_days))
+                for _, start, end, countries, multiplier in self.events:
+                    lo = max(start.toordinal() - first, 0)
+                    hi = min(end.toordinal() - first, n_days - 1)
+                    if lo <= hi:
+                        matrix[np.ix_(self._rows(countries), np.arange(lo, hi + 1))] *= multiplier
+                matrix.setflags(write=False)
+                self._years[year] = matrix
+            return self._years[year]
+
+    def multiplier(self, store, day):
+        """Traffic multiplier of one store on one date (1.0 without events)"""
+        return float(self.year_matrix(day.year)[self.store_index.get(store, self.default_row),
+                                                day.toordinal() - date(day.year, 1, 1).toordinal()])
+
+    def events_on(self, stores, day):
+        """
+        Events active on a date for any of the stores
+
+        Returns:
+            List of (name, multiplier), in start date order
+        """
+        rows = {self.store_index[store] for store in stores if store in self.store_index}
+        active = []
+        for name, start, end, countries, multiplier in self.events:
+            if start > day:
+                break
+            if day <= end and rows.intersection(self._rows(countries).tolist()):
+                active.append((name, multiplier))
+        return active
+
+
+EVENT_CALENDAR = EventCalendar.from_csv()
@@ -0,0 +1,245 @@
+"""
+Export Service
+Forecast and staffing plan exports (CSV, Parquet, Excel) for a scope and
+horizon, produced one chunk of stores × dates at a time and written with
+streaming writers, so a fleet-wide quarter is never held in memory at once
+"""
+
+import os
+import tempfile
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+from forecast_data import DAYS, HOURS, HourlyTensor, generate_store_hourly_data, week_dates
+from staffing_model import DEFAULT_ATV_DKK, adjusted_conversion_rate_array
+
+# ============================================================================
+# EXPORT SETTINGS
+# ============================================================================
+HORIZON_WEEKS = {'day': 0, 'week': 1, 'quarter': 13}   # Quarter: 13 weeks from the selected week's Monday
+STORE_BLOCK = 256               # Stores per chunk (one chunk = STORE_BLOCK stores × one week)
+SPOOL_MAX_BYTES = 8 * 1024 * 1024  # Exports larger than this spill from memory to a temporary file
+EXCEL_MAX_ROWS = 1_048_575      # Data rows per worksheet (Excel limit minus the header row)
+
+EXPORT_COLUMNS = (
+    'Store', 'Date', 'Period', 'Predicted_Traffic', 'Actual_Traffic', 'Adjustment_Pct',
+    'Baseline_Staffing', 'AI_Recommended_Staffing', 'Baseline_STA_Ratio', 'AI_STA_Ratio',
+    'Baseline_Revenue_DKK', 'AI_Revenue_DKK'
+)
+
+FORMATS = {
+    'csv': {'label': 'CSV', 'extension': 'csv', 'mime': 'text/csv'},
+    'parquet': {'label': 'Parquet', 'extension': 'parquet', 'mime': 'application/vnd.apache.parquet'},
+    'excel': {'label': 'Excel', 'extension': 'xlsx',
+              'mime': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'},
+}
+
+
+def available_formats():
+    """
+    Export formats whose writer can be imported (Parquet needs pyarrow, Excel openpyxl)
+
+    Returns:
+        List of format keys of FORMATS, CSV always first
+    """
+    formats = ['csv']
+    try:
+        import pyarrow.parquet  # noqa: F401
+        formats.append('parquet')
+    except ImportError:
+        pass
+    try:
+        import openpyxl  # noqa: F401
+        formats.append('excel')
+    except ImportError:
+        pass
+    return formats
+
+
+def horizon_dates(selected_date, horizon):
+    """Dates covered by an export horizon ('day', 'week' or 'quarter')"""
+    if horizon == 'day':
+        return [selected_date]
+    monday = week_dates(selected_date)[0]
+    return [monday + timedelta(days=i) for i in range(HORIZON_WEEKS[horizon] * len(DAYS))]
+
+
+# ============================================================================
+# CHUNKS
+# ============================================================================
+def _revenue(traffic, staffing):
+    """Revenue per row with the STA conversion model (staffing floored at 1 like calculate_dynamic_revenue)"""
+    sta_ratio = traffic / np.maximum(staffing, 1)
+    revenue = traffic * adjusted_conversion_rate_array(sta_ratio) * DEFAULT_ATV_DKK
+    return sta_ratio, revenue.astype(np.int64)
+
+
+def _chunk_frame(tensor, base, dates, adjustments, granularity):
+    """Export rows of one tensor restricted to `dates`, hourly or daily (base: the unadjusted tensor)"""
+    d = np.array([tensor.date_index[day.isoformat()] for day in dates])
+    n_stores, n_dates = len(tensor.stores), len(d)
+
+    if granularity == 'hourly':
+        predicted = tensor.predicted[:, d]
+        actual = tensor.actual[:, d]
+        baseline = tensor.baseline_staffing[:, d]
+        ai = tensor.ai_staffing[:, d]
+        periods = HOURS
+        adjustment = np.zeros(predicted.shape)
+        hour_index = {hour: h for h, hour in enumerate(HOURS)}
+        date_position = {day.isoformat(): i for i, day in enumerate(dates)}
+        for s, store in enumerate(tensor.stores):
+            for (day, hour), value in adjustments.get(store, {}).items():
+                if day in date_position and hour in hour_index:
+                    adjustment[s, date_position[day], hour_index[hour]] = value
+    else:
+        totals = tensor.daily_totals()
+        predicted = totals['predicted'][:, d, None]
+        actual = totals['actual'][:, d, None]
+        baseline = totals['baseline_staffing'][:, d, None]
+        ai = totals['ai_staffing'][:, d, None]
+        periods = ('Day',)
+        # Effective change of the day's total from its adjusted hours
+        unadjusted = base.daily_totals()['predicted'][:, d, None].astype(float)
+        adjustment = np.divide(predicted - unadjusted, unadjusted, out=np.zeros(predicted.shape),
+                               where=unadjusted > 0) * 100
+
+    n_periods = len(periods)
+    traffic = predicted.astype(float).ravel()
+    baseline_sta, baseline_revenue = _revenue(traffic, baseline.astype(float).ravel())
+    ai_sta, ai_revenue = _revenue(traffic, ai.astype(float).ravel())
+
+    return pd.DataFrame({
+        'Store': np.repeat(tensor.stores, n_dates * n_periods),
+        'Date': np.tile(np.repeat([day.isoformat() for day in dates], n_periods), n_stores),
+        'Period': np.tile(periods, n_stores * n_dates),
+        'Predicted_Traffic': predicted.ravel().astype(np.int64),
+        'Actual_Traffic': actual.ravel().astype(float),
+        'Adjustment_Pct': adjustment.ravel().round(1),
+        'Baseline_Staffing': baseline.ravel().astype(np.int64),
+        'AI_Recommended_Staffing': ai.ravel().astype(np.int64),
+        'Baseline_STA_Ratio': baseline_sta.round(2),
+        'AI_STA_Ratio': ai_sta.round(2),
+        'Baseline_Revenue_DKK': baseline_revenue,
+        'AI_Revenue_DKK': ai_revenue,
+    }, columns=list(EXPORT_COLUMNS))
+
+
+def iter_export_chunks(stores, dates, adjustments, granularity='hourly', today=None,
+                       forecast_for=generate_store_hourly_data):
+    """
+    Export rows as DataFrame chunks of at most STORE_BLOCK stores × one week
+
+    Args:
+        stores: Stores of the scope
+        dates: Consecutive dates of the horizon (see horizon_dates)
+        adjustments: {store: {(date ISO string, hour label): percentage}} applied to the traffic
+        granularity: 'hourly' (one row per store × date × hour) or 'daily' (one row per
+                     store × date, staffing in staff-hours, Adjustment_Pct the change of the day total)
+        today: Current date (days before it have actuals)
+        forecast_for: Function (store, date) → hourly StoreForecast
+
+    Yields:
+        DataFrames with EXPORT_COLUMNS; each is dropped once written
+    """
+    weeks = {}
+    for day in dates:
+        weeks.setdefault(week_dates(day)[0], []).append(day)
+
+    for week_days in weeks.values():
+        for i in range(0, len(stores), STORE_BLOCK):
+            block = stores[i:i + STORE_BLOCK]
+            block_adjustments = {store: adjustments[store] for store in block if adjustments.get(store)}
+            base = HourlyTensor.from_forecasts(block, week_days, forecast_for, today)
+            tensor = base.with_adjustments(block_adjustments) if block_adjustments else base
+            yield _chunk_frame(tensor, base, week_days, block_adjustments, granularity)
+
+
+# ============================================================================
+# STREAMING WRITERS
+# ============================================================================
+def write_csv(chunks, f):
+    """Append each chunk to a binary file as UTF-8 CSV (header once); returns the row count"""
+    rows = 0
+    for chunk in chunks:
+        f.write(chunk.to_csv(index=False, header=rows == 0).encode('utf-8'))
+        rows += len(chunk)
+    return rows
+
+
+def write_parquet(chunks, f):
+    """Write each chunk as one Parquet row group; returns the row count (requires pyarrow)"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    rows = 0
+    writer = None
+    try:
+        for chunk in chunks:
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(f, table.schema, compression='snappy')
+            writer.write_table(table)
+            rows += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
+
+def write_excel(chunks, f):
+    """
+    Stream chunks into a write-only workbook; returns the row count (requires openpyxl)
+
+    Rows go to disk as they are appended; a new worksheet starts every
+    EXCEL_MAX_ROWS rows.
+    """
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet, sheet_rows, rows = None, EXCEL_MAX_ROWS, 0
+    for chunk in chunks:
+        for record in chunk.itertuples(index=False, name=None):
+            if sheet_rows == EXCEL_MAX_ROWS:
+                sheet = workbook.create_sheet(f"Forecast {len(workbook.worksheets) + 1}")
+                sheet.append(list(EXPORT_COLUMNS))
+                sheet_rows = 0
+            sheet.append([None if isinstance(v, float) and np.isnan(v) else v for v in record])
+            sheet_rows += 1
+        rows += len(chunk)
+    if sheet is None:
+        workbook.create_sheet("Forecast 1").append(list(EXPORT_COLUMNS))
+    workbook.save(f)
+    return rows
+
+
+WRITERS = {'csv': write_csv, 'parquet': write_parquet, 'excel': write_excel}
+
+
+def export_bytes(chunks, fmt):
+    """
+    Encode chunks into one export file
+
+    Chunks are written one at a time into a spooled temporary file (kept in
+    memory up to SPOOL_MAX_BYTES, on disk beyond), so the peak is one chunk
+    plus the encoded file rather than the whole table.
+
+    Args:
+        chunks: Iterable of DataFrames (see iter_export_chunks)
+        fmt: Key of FORMATS
+
+    Returns:
+        File contents as bytes
+    """
+    with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES, dir=os.environ.get("PANDORA_EXPORT_DIR")) as f:
+        WRITERS[fmt](chunks, f)
+        f.seek(0)
+        return f.read()
+
+
+def export_file_name(scope_label, horizon, selected_date, fmt):
+    """Download file name, e.g. 'pandora_forecast_London_week_2026-10-19.csv'"""
+    safe_scope = "".join(c if c.isalnum() else "_" for c in scope_label).strip("_") or "scope"
+    return f"pandora_forecast_{safe_scope}_{horizon}_{selected_date.isoformat()}.{FORMATS[fmt]['extension']}"
@@ -0,0 +1,312 @@
+"""
+Feature Store
+External regressors of store traffic (weather, tourism, local events) keyed by
+(city, date, hour), compiled from local CSV stand-ins into aligned
+memory-mapped arrays so the forecast engine reads them as zero-copy slices
+instead of merging rows
+"""
+
+import csv
+import os
+import threading
+from datetime import date, timedelta
+
+import numpy as np
+
+from store_hierarchy import REGISTRY_PATH
+
+# ============================================================================
+# FEATURE SETTINGS
+# ============================================================================
+FEATURE_DIR = os.environ.get(
+    "PANDORA_FEATURE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "features")
+)
+FEATURES = ('temperature_c', 'precip_mm', 'tourism_index', 'event_uplift')
+NEUTRAL = {'temperature_c': 15.0, 'precip_mm': 0.0, 'tourism_index': 1.0, 'event_uplift': 1.0}
+HOURS_PER_DAY = 12              # Operating hours 09:00-21:00 (slot 0 = 09:00)
+FIRST_HOUR = 9
+
+# Stand-in span (the CSVs are generated for these dates when missing)
+STANDIN_START = date(2025, 1, 1)
+STANDIN_END = date(2027, 12, 31)
+
+# Traffic response to the regressors
+RAIN_EFFECT_PER_MM = 0.04       # -4% walk-in traffic per mm/h of rain
+MAX_RAIN_EFFECT = 0.25          # Rain never removes more than 25%
+COMFORT_TEMPERATURE_C = (8.0, 26.0)
+TEMPERATURE_EFFECT_PER_C = 0.01 # -1% per °C outside the comfort band
+MAX_TEMPERATURE_EFFECT = 0.15
+NO_REGRESSORS = np.ones(HOURS_PER_DAY, dtype=np.float32)
+NO_REGRESSORS.setflags(write=False)
+
+
+class FeatureStore:
+    """
+    Regressors as one (cities × days × hours × features) float32 array
+
+    The array is compiled from the CSVs into an .npy file once (recompiled
+    when a CSV or this module is newer) and opened memory-mapped, so every
+    process and session shares the same pages. A city's days are contiguous,
+    so the features of one city over a date range are a view, not a copy.
+    The traffic multiplier of every cell is compiled alongside into its own
+    (cities × days × hours) .npy and mapped the same way.
+    """
+
+    def __init__(self, directory=FEATURE_DIR, registry_path=REGISTRY_PATH):
+        self.directory = directory
+        with open(registry_path, newline="", encoding="utf-8") as f:
+            self.store_city = {row['store']: row['city'] for row in csv.DictReader(f)}
+        self._array = None
+        self._multiplier = None
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Compilation
+    # ------------------------------------------------------------------
+    def csv_path(self, name):
+        """Stand-in CSV of one source ('weather', 'tourism' or 'local_events')"""
+        return os.path.join(self.directory, f"{name}.csv")
+
+    @property
+    def array_path(self):
+        """Compiled feature array (.npy, opened memory-mapped)"""
+        return os.path.join(self.directory, "features.npy")
+
+    @property
+    def multiplier_path(self):
+        """Compiled traffic multiplier plane (.npy, opened memory-mapped)"""
+        return os.path.join(self.directory, "traffic_multiplier.npy")
+
+    @property
+    def index_path(self):
+        """Start date and city order of the compiled array"""
+        return os.path.join(self.directory, "features_index.csv")
+
+    def _stale(self):
+        """A compiled file is missing or older than one of the CSVs or this module (the multiplier's rules)"""
+        compiled_paths = (self.array_path, self.multiplier_path, self.index_path)
+        if not all(os.path.exists(path) for path in compiled_paths):
+            return True
+        compiled = min(os.path.getmtime(path) for path in compiled_paths)
+        paths = [self.csv_path(name) for name in ('weather', 'tourism', 'local_events')] + [os.path.abspath(__file__)]
+        return any(not os.path.exists(path) or os.path.getmtime(path) > compiled for path in paths)
+
+    def compile(self):
+        """
+        Build the memory-mapped array from the CSVs
+
+        weather.csv: city,date,hour,temperature_c,precip_mm (hourly)
+        tourism.csv: city,date,tourism_index (daily, applies to every hour)
+        local_events.csv: city,date,start_hour,end_hour,name,uplift (uplifts of overlapping events multiply)
+        Cells without a record keep NEUTRAL values. The traffic multiplier
+        plane is scored from the array one city at a time. Every file is
+        written to a temporary path and renamed into place, the index last,
+        so a reader never pairs a new array with an old index.
+        """
+        if not all(os.path.exists(self.csv_path(name)) for name in ('weather', 'tourism', 'local_events')):
+            write_standin_csvs(self.directory, sorted(set(self.store_city.values())))
+
+        def read(name):
+            with open(self.csv_path(name), newline="", encoding="utf-8") as f:
+                return list(csv.DictReader(f))
+
+        weather, tourism, events = read('weather'), read('tourism'), read('local_events')
+        cities = sorted({row['city'] for row in weather + tourism + events})
+        days = [date.fromisoformat(row['date']) for row in weather + tourism + events]
+        start, end = min(days), max(days)
+
+        city_index = {city: i for i, city in enumerate(cities)}
+        n_days = (end - start).days + 1
+        shape = (len(cities), n_days, HOURS_PER_DAY, len(FEATURES))
+
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = f"{self.array_path}.{os.getpid()}.tmp.npy"  # Renamed into place once complete
+        array = np.lib.format.open_memmap(tmp_path, mode='w+', dtype=np.float32, shape=shape)
+        for f, feature in enumerate(FEATURES):
+            array[..., f] = NEUTRAL[feature]
+
+        def cell(row):
+            return city_index[row['city']], (date.fromisoformat(row['date']) - start).days
+
+        t, p, r, e = (FEATURES.index(name) for name in ('temperature_c', 'precip_mm', 'tourism_index', 'event_uplift'))
+        for row in weather:
+            c, d = cell(row)
+            h = int(row['hour']) - FIRST_HOUR
+            if 0 <= h < HOURS_PER_DAY:
+                array[c, d, h, t] = float(row['temperature_c'])
+                array[c, d, h, p] = float(row['precip_mm'])
+        for row in tourism:
+            c, d = cell(row)
+            array[c, d, :, r] = float(row['tourism_index'])
+        for row in events:
+            c, d = cell(row)
+            lo = max(int(row['start_hour']) - FIRST_HOUR, 0)
+            hi = min(int(row['end_hour']) - FIRST_HOUR, HOURS_PER_DAY)
+            array[c, d, lo:hi, e] *= float(row['uplift'])
+        array.flush()
+
+        multiplier_tmp_path = f"{self.multiplier_path}.{os.getpid()}.tmp.npy"
+        multiplier = np.lib.format.open_memmap(multiplier_tmp_path, mode='w+', dtype=np.float32, shape=shape[:3])
+        for c in range(len(cities)):
+            multiplier[c] = regressor_multiplier(array[c])
+        multiplier.flush()
+        del array, multiplier
+
+        index_tmp_path = f"{self.index_path}.{os.getpid()}.tmp"
+        with open(index_tmp_path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(['start', start.isoformat()])
+            writer.writerow(['cities'] + cities)
+        os.replace(tmp_path, self.array_path)
+        os.replace(multiplier_tmp_path, self.multiplier_path)
+        os.replace(index_tmp_path, self.index_path)
+
+    def _load(self):
+        """Memory-mapped array, multiplier plane and index (compiled on first use)"""
+        if self._array is None:
+            with self._lock:
+                if self._array is None:
+                    if self._stale():
+                        self.compile()
+                    with open(self.index_path, newline="", encoding="utf-8") as f:
+                        rows = list(csv.reader(f))
+                    self.start = date.fromisoformat(rows[0][1])
+                    self.city_index = {city: i for i, city in enumerate(rows[1][1:])}
+                    # Plain ndarray views of the maps
+                    self._multiplier = np.asarray(np.load(self.multiplier_path, mmap_mode='r'))
+                    self._array = np.asarray(np.load(self.array_path, mmap_mode='r'))
+        return self._array
+
+    def warm(self):
+        """Compile (if stale) and map the array now instead of on the first forecast"""
+        self._load()
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+    def city_window(self, city, first, days=1):
+        """
+        Features of one city over consecutive dates
+
+        Returns:
+            Read-only (days × hours × features) view into the memory map, or
+            None when the city or any date is not covered
+        """
+        array = self._load()
+        c = self.city_index.get(city)
+        d = (first - self.start).days
+        if c is None or d < 0 or d + days > array.shape[1]:
+            return None
+        return array[c, d:d + days]
+
+    def store_window(self, store, first, days=1):
+        """city_window of a store's city"""
+        return self.city_window(self.store_city.get(store), first, days)
+
+    def traffic_multiplier(self, store, day):
+        """
+        Hourly traffic multiplier of one store and date from its regressors
+
+        Rain and temperatures outside the comfort band lower walk-in traffic;
+        tourism and local events scale it (see regressor_multiplier, compiled
+        into the multiplier plane).
+
+        Returns:
+            Read-only view of HOURS_PER_DAY multipliers into the memory map; ones when the store's city or
+            the date has no features
+        """
+        array = self._load()
+        c = self.city_index.get(self.store_city.get(store))
+        d = (day - self.start).days
+        if c is None or not 0 <= d < array.shape[1]:
+            return NO_REGRESSORS
+        return self._multiplier[c, d]
+
+
+def regressor_multiplier(features):
+    """
+    Traffic multiplier from a (... × features) array (any leading shape, e.g. hours or stores × days × hours)
+
+    Vectorized over all leading axes, so the whole fleet can be scored in one call.
+    """
+    temperature = features[..., FEATURES.index('temperature_c')].astype(float)
+    rain = features[..., FEATURES.index('precip_mm')].astype(float)
+    low, high = COMFORT_TEMPERATURE_C
+    discomfort = np.maximum(low - temperature, 0) + np.maximum(temperature - high, 0)
+
+    multiplier = (1 - np.minimum(rain * RAIN_EFFECT_PER_MM, MAX_RAIN_EFFECT)) \
+        * (1 - np.minimum(discomfort * TEMPERATURE_EFFECT_PER_C, MAX_TEMPERATURE_EFFECT))
+    return multiplier * features[..., FEATURES.index('tourism_index')] * features[..., FEATURES.index('event_uplift')]
+
+
+# ============================================================================
+# LOCAL STAND-INS
+# ============================================================================
+CITY_CLIMATE = {  # (mean °C in January, mean °C in July, rainy-hour probability, summer tourism peak)
+    "London": (5.5, 19.0, 0.12, 0.12),
+    "Copenhagen": (1.5, 17.5, 0.10, 0.10),
+    "Paris": (5.0, 21.0, 0.09, 0.15),
+}
+DEFAULT_CLIMATE = (4.0, 19.0, 0.10, 0.10)
+LOCAL_EVENTS_PER_YEAR = 10      # Concerts, matches, markets near each city's stores
+
+
+def write_standin_csvs(directory, cities, start=STANDIN_START, end=STANDIN_END):
+    """
+    Write deterministic synthetic weather, tourism and local event CSVs
+
+    Local stand-ins for the external feeds; real extracts with the same
+    columns can replace them.
+    """
+    os.makedirs(directory, exist_ok=True)
+    n_days = (end - start).days + 1
+    dates = [start + timedelta(days=i) for i in range(n_days)]
+    day_of_year = np.array([d.timetuple().tm_yday for d in dates])
+    hours = np.arange(FIRST_HOUR, FIRST_HOUR + HOURS_PER_DAY)
+
+    weather_rows, tourism_rows, event_rows = [], [], []
+    for city in cities:
+        rng = np.random.default_rng(sum(map(ord, city)))
+        winter, summer, rain_probability, tourism_peak = CITY_CLIMATE.get(city, DEFAULT_CLIMATE)
+
+        # Seasonal mean (coldest mid-January) + day-to-day anomaly + diurnal cycle peaking mid-afternoon
+        season = (winter + summer) / 2 - (summer - winter) / 2 * np.cos(2 * np.pi * (day_of_year - 15) / 365.25)
+        anomaly = np.convolve(rng.normal(0, 2.5, n_days), np.ones(3) / 3, mode='same')
+        diurnal = 3.0 * np.sin(np.pi * (hours - 9) / 12)
+        temperature = season[:, None] + anomaly[:, None] + diurnal[None, :]
+
+        # Rain comes in spells: a wet day has a run of rainy hours
+        wet_day = rng.random(n_days) < rain_probability * 3
+        rainy = wet_day[:, None] & (rng.random((n_days, HOURS_PER_DAY)) < 0.45)
+        precipitation = np.where(rainy, rng.gamma(1.5, 1.0, (n_days, HOURS_PER_DAY)), 0.0)
+
+        for i, day in enumerate(dates):
+            iso = day.isoformat()
+            for h, hour in enumerate(hours):
+                weather_rows.append((city, iso, int(hour), round(float(temperature[i, h]), 1),
+                                     round(float(precipitation[i, h]), 1)))
+
+        # Tourism: summer peak and a smaller December one
+        tourism = (1 + tourism_peak * np.exp(-((day_of_year - 200) / 35.0) ** 2)
+                   + 0.05 * np.exp(-((day_of_year - 350) / 10.0) ** 2))
+        tourism_rows += [(city, day.isoformat(), round(float(value), 3)) for day, value in zip(dates, tourism)]
+
+        n_events = int(LOCAL_EVENTS_PER_YEAR * n_days / 365)
+        for i in sorted(rng.choice(n_days, size=n_events, replace=False)):
+            start_hour = int(rng.integers(12, 18))
+            event_rows.append((city, dates[i].isoformat(), start_hour, start_hour + int(rng.integers(2, 5)),
+                               "Local event", round(float(rng.uniform(1.1, 1.35)), 2)))
+
+    for name, header, rows in (
+        ('weather', ('city', 'date', 'hour', 'temperature_c', 'precip_mm'), weather_rows),
+        ('tourism', ('city', 'date', 'tourism_index'), tourism_rows),
+        ('local_events', ('city', 'date', 'start_hour', 'end_hour', 'name', 'uplift'), event_rows),
+    ):
+        with open(os.path.join(directory, f"{name}.csv"), "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(header)
+            writer.writerows(rows)
+
+
+FEATURE_STORE = FeatureStore()
@@ -0,0 +1,649 @@
+"""
+Forecast Data
+Synthetic store forecasts, traffic adjustments and KPI calculations behind the
+dashboard, kept free of Streamlit so they can be cached by app.py and timed by
+the benchmark suite (benchmarks/run_benchmarks.py)
+"""
+
+import csv
+import os
+import random
+import zlib
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from event_calendar import EVENT_CALENDAR
+from feature_store import FEATURE_STORE
+from staffing_model import (
+    ai_staffing_for_traffic,
+    calculate_dynamic_revenue,
+    hourly_ai_staffing,
+    hourly_baseline_staffing,
+)
+
+
+# ============================================================================
+# COMPACT STORE FORECAST
+# ============================================================================
+HOURS = tuple(f"{h:02d}:00" for h in range(9, 21))  # Operating hours: 9 AM to 9 PM
+DAYS = ('Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday')
+SLOT_LABELS = {'hourly': HOURS, 'daily': DAYS}
+TIME_COLUMNS = {'hourly': 'Hour', 'daily': 'Day'}
+SLOT_INDEX = {view_mode: {label: i for i, label in enumerate(labels)} for view_mode, labels in SLOT_LABELS.items()}
+FEED_DROPOUT_RATE = 0.006  # Share of hourly actuals lost in the store feeds (sensor/upload outages)
+
+# Store-specific generator parameters (visitors/hr), one row per store: store,base,peak_boost,peak_hours
+STORE_PARAMS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "store_params.csv")
+DEFAULT_STORE_PARAMS = {"base": 10, "peak_boost": 7, "peak_hours": (12, 18)}
+PEAK_HOUR_SEPARATOR = ";"
+
+
+class StoreForecast:
+    """
+    One store's forecast as fixed-width arrays indexed by time slot
+
+    Slots are positions in HOURS / DAYS (shared, never stored per forecast),
+    traffic is int32, staffing int16, and actuals are float32 with NaN where
+    not yet known. Instances are treated as immutable: adjustments and bands
+    return new forecasts that share every unchanged array. A DataFrame is only
+    built for display (to_frame).
+    """
+
+    __slots__ = ('store', 'view_mode', 'predicted', 'actual', 'baseline_staffing', 'ai_staffing', 'lower', 'upper')
+
+    def __init__(self, store, view_mode, predicted, actual, baseline_staffing, ai_staffing, lower=None, upper=None):
+        self.store = store
+        self.view_mode = view_mode
+        self.predicted = np.asarray(predicted, dtype=np.int32)
+        self.actual = np.asarray(actual, dtype=np.float32)
+        self.baseline_staffing = np.asarray(baseline_staffing, dtype=np.int16)
+        self.ai_staffing = np.asarray(ai_staffing, dtype=np.int16)
+        self.lower = None if lower is None else np.asarray(lower, dtype=np.float32)
+        self.upper = None if upper is None else np.asarray(upper, dtype=np.float32)
+
+    @property
+    def labels(self):
+        """Hour or day label per slot"""
+        return SLOT_LABELS[self.view_mode]
+
+    @property
+    def time_col(self):
+        """'Hour' or 'Day'"""
+        return TIME_COLUMNS[self.view_mode]
+
+    @property
+    def nbytes(self):
+        """Memory held by the slot arrays"""
+        arrays = (self.predicted, self.actual, self.baseline_staffing, self.ai_staffing, self.lower, self.upper)
+        return sum(a.nbytes for a in arrays if a is not None)
+
+    def slot(self, label):
+        """Slot index of an hour ('14:00') or day ('Friday')"""
+        return SLOT_INDEX[self.view_mode][label]
+
+    def _replace(self, **changes):
+        values = {name: getattr(self, name) for name in self.__slots__}
+        values.update(changes)
+        return StoreForecast(**values)
+
+    def with_bands(self, lower, upper):
+        """Copy with prediction interval arrays"""
+        return self._replace(lower=lower, upper=upper)
+
+    def with_adjustments(self, adjustments):
+        """
+        Copy with percentage traffic adjustments applied
+
+        Adjusted slots get new traffic, scaled prediction bands and AI staffing
+        recomputed from the new traffic; everything else is shared. Hourly
+        forecasts only (see ai_staffing_for_traffic).
+
+        Args:
+            adjustments: {hour or day label: percentage change vs this forecast}
+        """
+        slots = np.array([self.slot(label) for label in adjustments], dtype=np.intp)
+        factors = 1 + np.array(list(adjustments.values()), dtype=float) / 100
+
+        predicted = self.predicted.copy()
+        predicted[slots] = (self.predicted[slots] * factors).astype(np.int32)
+
+        ai_staffing = self.ai_staffing.copy()
+        ai_staffing[slots] = ai_staffing_for_traffic(predicted[slots], self.view_mode)
+
+        changes = {'predicted': predicted, 'ai_staffing': ai_staffing}
+        if self.upper is not None:
+            changes['lower'] = self.lower.copy()
+            changes['upper'] = self.upper.copy()
+            changes['lower'][slots] *= factors
+            changes['upper'][slots] *= factors
+        return self._replace(**changes)
+
+    def with_traffic(self, predicted, ai_staffing):
+        """
+        Copy with new traffic and AI staffing for every slot
+
+        Prediction bands scale with the traffic change of each slot; used by
+        the daily view, whose totals are recomputed from adjusted hours.
+        """
+        predicted = np.asarray(predicted, dtype=np.int32)
+        changes = {'predicted': predicted, 'ai_staffing': ai_staffing}
+        if self.upper is not None:
+            ratio = np.divide(predicted, self.predicted, out=np.ones(len(predicted)), where=self.predicted > 0)
+            changes['lower'] = self.lower * ratio
+            changes['upper'] = self.upper * ratio
+        return self._replace(**changes)
+
+    def to_frame(self):
+        """DataFrame for display (Actual_Traffic is NaN where not yet known)"""
+        frame = pd.DataFrame({
+            self.time_col: list(self.labels),
+            'Predicted_Traffic': self.predicted.astype(np.int64),
+            'Actual_Traffic': self.actual.astype(float),
+            'Baseline_Staffing': self.baseline_staffing.astype(np.int64),
+            'AI_Recommended_Staffing': self.ai_staffing.astype(np.int64)
+        })
+        if self.upper is not None:
+            frame['Predicted_Lower'] = self.lower.astype(float)
+            frame['Predicted_Upper'] = self.upper.astype(float)
+        return frame
+
+
+# ============================================================================
+# DATA GENERATION
+# ============================================================================
+class StoreParameters:
+    """
+    Generator parameters per store from data/store_params.csv
+
+    The table is re-read when the file changes (see reload), so editing one
+    store's row takes effect without a restart; stores without a row use
+    DEFAULT_STORE_PARAMS.
+    """
+
+    def __init__(self, path=STORE_PARAMS_PATH):
+        self.path = path
+        self.params = {}
+        self._stat = None
+        self.reload()
+
+    def reload(self):
+        """Re-read the table if the file changed since the last read; returns whether it did"""
+        try:
+            stat = os.stat(self.path)
+            stat = (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            stat = None
+        if stat == self._stat:
+            return False
+
+        params = {}
+        if stat is not None:
+            with open(self.path, newline="", encoding="utf-8") as f:
+                for row in csv.DictReader(f):
+                    params[row['store']] = {
+                        "base": int(row['base']),
+                        "peak_boost": int(row['peak_boost']),
+                        "peak_hours": tuple(int(h) for h in row['peak_hours'].split(PEAK_HOUR_SEPARATOR) if h),
+                    }
+        self.params, self._stat = params, stat  # Swapped in one assignment for concurrent readers
+        return True
+
+    def get(self, store):
+        """Parameters of one store"""
+        return self.params.get(store, DEFAULT_STORE_PARAMS)
+
+
+STORE_PARAMETERS = StoreParameters()
+
+
+def generate_store_hourly_data(store_name, date):
+    """
+    Generate hourly synthetic data for a specific store
+
+    Args:
+        store_name: Name of the store
+        date: Date for the forecast
+
+    Returns:
+        StoreForecast with hourly traffic and staffing data
+    """
+    selected_date_obj = date.date() if isinstance(date, datetime) else date
+
+    # Seed per store and date so each day has its own traffic and residuals. A
+    # local generator (same sequence as the global one) keeps concurrent loads safe;
+    # crc32 rather than hash() so every process (backtest workers) sees the same data.
+    seed = (zlib.crc32(store_name.encode("utf-8")) + selected_date_obj.toordinal()) % 10000
+    rng = np.random.RandomState(seed)
+
+    # Store-specific parameters - Scaled for small luxury jewelry store (visitors/hr)
+    # Typical range: 5-20 visitors/hr (data/store_params.csv)
+    params = STORE_PARAMETERS.get(store_name)
+
+    # Check if selected date is today or in the past
+    today = datetime.now().date()
+    is_today = selected_date_obj == today
+    is_past = selected_date_obj < today
+    current_hour = datetime.now().hour
+
+    # Holiday / promotion uplift of this store and date (precomputed lookup, see event_calendar.py)
+    uplift = EVENT_CALENDAR.multiplier(store_name, selected_date_obj)
+    # Weather, tourism and local events of the store's city per hour (zero-copy read of the feature store)
+    regressors = FEATURE_STORE.traffic_multiplier(store_name, selected_date_obj)
+
+    # Generate hourly data
+    n_slots = len(HOURS)
+    predicted = np.empty(n_slots, dtype=np.int32)
+    actual = np.full(n_slots, np.nan, dtype=np.float32)
+    for i, hour in enumerate(HOURS):
+        hour_num = int(hour.split(':')[0])
+
+        # Base traffic with random variation
+        traffic = params["base"] + rng.randint(-2, 3)
+
+        # Peak hour boost
+        if hour_num in params["peak_hours"]:
+            traffic += params["peak_boost"]
+
+        # Gradual increase throughout the day (opening hours ramp up)
+        if i < 4:  # First few hours - lower traffic
+            traffic = int(traffic * 0.6)
+        elif i > 8:  # Evening - moderate decline
+            traffic = int(traffic * 0.85)
+
+        if uplift != 1.0 or regressors[i] != 1.0:
+            traffic = int(traffic * uplift * regressors[i])
+
+        # Ensure minimum of 3 visitors/hr (never empty store)
+        traffic = max(3, traffic)
+
+        predicted[i] = traffic
+
+        # Generate actual traffic (with slight variance from predicted)
+        if is_past:
+            # Past date: show actual traffic for all hours
+            variance = rng.uniform(-0.08, 0.08)
+            actual[i] = int(traffic * (1 + variance))
+        elif is_today and hour_num < current_hour:
+            # Today: show actual traffic only for hours that have passed
+            variance = rng.uniform(-0.08, 0.08)
+            actual[i] = int(traffic * (1 + variance))
+        # Future dates or future hours: actual traffic remains NaN
+
+    # Feed gaps: a few hourly records never arrive. Drawn from a separate
+    # generator so the traffic itself does not change.
+    actual[np.random.default_rng(seed).random(n_slots) < FEED_DROPOUT_RATE] = np.nan
+
+    # AI-recommended staffing (optimal for small luxury store, aims for 4-5:1 shopper-to-staff ratio)
+    # Baseline staffing (legacy - understaffed, runs at 8-12:1, always fewer than AI)
+    return StoreForecast(
+        store_name, 'hourly', predicted, actual,
+        baseline_staffing=hourly_baseline_staffing(predicted),
+        ai_staffing=hourly_ai_staffing(predicted)
+    )
+
+def generate_store_daily_data(store_name, date):
+    """
+    Daily totals for a specific store (7 days), reduced from its hourly forecasts
+
+    Args:
+        store_name: Name of the store
+        date: Any date of the week (Monday-Sunday) to forecast
+
+    Returns:
+        StoreForecast with daily traffic and staff-hours
+    """
+    selected_date_obj = date.date() if isinstance(date, datetime) else date
+    tensor = HourlyTensor.from_forecasts([store_name], week_dates(selected_date_obj), generate_store_hourly_data)
+    return tensor.daily_forecast(store_name)
+
+
+# ============================================================================
+# HOURLY TENSOR (store × date × hour)
+# ============================================================================
+def week_dates(date):
+    """The seven dates (Monday-Sunday) of the week containing `date`"""
+    monday = date - timedelta(days=date.weekday())
+    return [monday + timedelta(days=i) for i in range(len(DAYS))]
+
+def adjustments_for_date(adjustments_dict, date):
+    """
+    Hourly adjustments of one date by hour label
+
+    Args:
+        adjustments_dict: {store: {(date ISO string, hour label): percentage}}
+        date: Date to select
+
+    Returns:
+        {store: {hour label: percentage}} (stores without adjustments on the date left out)
+    """
+    day = date.isoformat()
+    selected = {}
+    for store, adjustments in adjustments_dict.items():
+        hours = {hour: value for (adjustment_day, hour), value in adjustments.items() if adjustment_day == day}
+        if hours:
+            selected[store] = hours
+    return selected
+
+
+def group_adjustments_by_date(adjustments):
+    """One store's dated hourly adjustments grouped by date: {date ISO string: {hour label: percentage}}"""
+    grouped = {}
+    for (day, hour), value in adjustments.items():
+        grouped.setdefault(day, {})[hour] = value
+    return grouped
+
+
+class HourlyTensor:
+    """
+    Hourly forecasts of many stores over consecutive dates as
+    (stores × dates × hours) arrays
+
+    The single source of both views: the hourly view is one date's slice and
+    the daily view a reduction over hours (traffic summed, staffing summed to
+    staff-hours). Adjustments are hourly and dated; applying them recomputes
+    only the (store, date) rows they touch, in the hourly arrays and in the
+    daily totals.
+    """
+
+    def __init__(self, stores, dates, predicted, actual, baseline_staffing, ai_staffing, today=None):
+        self.stores = list(stores)
+        self.dates = list(dates)
+        self.store_index = {store: i for i, store in enumerate(self.stores)}
+        self.date_index = {day.isoformat(): i for i, day in enumerate(self.dates)}
+        self.predicted = np.asarray(predicted, dtype=np.int32)
+        self.actual = np.asarray(actual, dtype=np.float32)
+        self.baseline_staffing = np.asarray(baseline_staffing, dtype=np.int16)
+        self.ai_staffing = np.asarray(ai_staffing, dtype=np.int16)
+
+        # Daily actuals exist once a day is over (every hour has passed)
+        today = datetime.now().date() if today is None else today
+        self.closed = np.array([day < today for day in self.dates])
+        self._daily = None
+
+    @classmethod
+    def from_forecasts(cls, stores, dates, forecast_for, today=None):
+        """
+        Stack hourly forecasts
+
+        Args:
+            stores: Store names
+            dates: Consecutive dates
+            forecast_for: Function (store, date) → hourly StoreForecast
+        """
+        forecasts = [[forecast_for(store, day) for day in dates] for store in stores]
+
+        def stack(field):
+            return np.array([[getattr(forecast, field) for forecast in row] for row in forecasts])
+
+        return cls(stores, dates, stack('predicted'), stack('actual'),
+                   stack('baseline_staffing'), stack('ai_staffing'), today)
+
+    @property
+    def nbytes(self):
+        """Memory held by the hourly arrays"""
+        return sum(a.nbytes for a in (self.predicted, self.actual, self.baseline_staffing, self.ai_staffing))
+
+    def forecast(self, store, date):
+        """Hourly StoreForecast of one store and date (views into the tensor, no copy)"""
+        s, d = self.store_index[store], self.date_index[date.isoformat()]
+        return StoreForecast(store, 'hourly', self.predicted[s, d], self.actual[s, d],
+                             self.baseline_staffing[s, d], self.ai_staffing[s, d])
+
+    def daily_totals(self):
+        """
+        Daily reduction, computed once per tensor
+
+        Returns:
+            Dictionary of (stores × dates) arrays: 'predicted', 'actual',
+            'baseline_staffing', 'ai_staffing' (staff-hours). Missing hourly
+            actuals of a closed day are filled with the forecast.
+        """
+        if self._daily is None:
+            filled = np.where(np.isfinite(self.actual), self.actual, self.predicted)
+            self._daily = {
+                'predicted': self.predicted.sum(axis=2, dtype=np.int32),
+                'actual': np.where(self.closed, filled.sum(axis=2), np.nan).astype(np.float32),
+                'baseline_staffing': self.baseline_staffing.sum(axis=2, dtype=np.int16),
+                'ai_staffing': self.ai_staffing.sum(axis=2, dtype=np.int16)
+            }
+        return self._daily
+
+    def daily_forecast(self, store):
+        """Daily StoreForecast of one store (one slot per date)"""
+        s = self.store_index[store]
+        totals = self.daily_totals()
+        return StoreForecast(store, 'daily', totals['predicted'][s], totals['actual'][s],
+                             totals['baseline_staffing'][s], totals['ai_staffing'][s])
+
+    def with_adjustments(self, adjustments_dict):
+        """
+        Copy with dated hourly adjustments applied
+
+        Args:
+            adjustments_dict: {store: {(date ISO string, hour label): percentage}};
+                              dates outside the tensor are ignored
+
+        Returns:
+            HourlyTensor sharing actuals and baseline staffing; only the
+            adjusted (store, date) rows of traffic, AI staffing and the daily
+            totals are recomputed
+        """
+        predicted = self.predicted.copy()
+        ai_staffing = self.ai_staffing.copy()
+        totals = {name: values.copy() for name, values in self.daily_totals().items()}
+
+        for store, adjustments in adjustments_dict.items():
+            s = self.store_index.get(store)
+            if s is None:
+                continue
+            for day, hours in group_adjustments_by_date(adjustments).items():
+                d = self.date_index.get(day)
+                if d is None:
+                    continue
+                adjusted = self.forecast(store, self.dates[d]).with_adjustments(hours)
+                predicted[s, d] = adjusted.predicted
+                ai_staffing[s, d] = adjusted.ai_staffing
+                totals['predicted'][s, d] = adjusted.predicted.sum()
+                totals['ai_staffing'][s, d] = adjusted.ai_staffing.sum()
+
+        tensor = HourlyTensor(self.stores, self.dates, predicted, self.actual,
+                              self.baseline_staffing, ai_staffing)
+        tensor.closed = self.closed
+        tensor._daily = totals
+        return tensor
+
+
+# ============================================================================
+# ADJUSTMENTS & KPIS
+# ============================================================================
+def apply_traffic_adjustments(stores_data, adjustments_dict, view_mode='hourly'):
+    """
+    Apply manual traffic adjustments and recalculate AI staffing recommendations
+
+    Args:
+        stores_data: Dictionary of StoreForecast per store
+        adjustments_dict: Dictionary of adjustments per store
+        view_mode: 'hourly' (daily totals are adjusted through HourlyTensor.with_adjustments)
+
+    Returns:
+        Updated stores_data with adjusted predictions (unadjusted stores are
+        shared, not copied)
+    """
+    adjusted_data = {}
+    slot_index = SLOT_INDEX[view_mode]
+
+    for store_name, forecast in stores_data.items():
+        # Only hours/days of this view can be adjusted
+        adjustments = {
+            time_value: adjustment
+            for time_value, adjustment in adjustments_dict.get(store_name, {}).items()
+            if time_value in slot_index
+        }
+
+        # Percentage adjustment per slot; the prediction interval scales with the
+        # forecast and AI staffing is recalculated from the new traffic
+        # (optimal 4-5:1 STA ratio per hour; daily totals come from the week tensor)
+        adjusted_data[store_name] = forecast.with_adjustments(adjustments) if adjustments else forecast
+
+    return adjusted_data
+
+def calculate_store_accuracy(forecast):
+    """Sum and count of per-period accuracy (%) where actual traffic is available"""
+    predicted = forecast.predicted.astype(float)
+    actual = forecast.actual.astype(float)
+    has_actual = np.isfinite(actual) & (actual > 0)
+
+    # Accuracy = 1 - (absolute error / predicted)
+    accuracy = np.maximum(0, 1 - np.abs(predicted[has_actual] - actual[has_actual]) / predicted[has_actual]) * 100
+    return accuracy.sum(), len(accuracy)
+
+def calculate_kpis(scope, rollup):
+    """
+    Calculate KPIs based on selected scope
+
+    Args:
+        scope: Hierarchy node (fleet, region, country, city or store)
+        rollup: HierarchyRollup with traffic and staffing totals per node
+
+    Returns:
+        Tuple (traffic, revenue, conversion_improvement, baseline_revenue,
+        ai_revenue, lost_revenue, baseline_cr, ai_cr)
+    """
+    # Scope totals are precomputed for every node (constant-time lookup)
+    total_traffic = int(rollup.get(scope, 'traffic'))
+    total_baseline_staffing = rollup.get(scope, 'baseline_staffing')
+    total_ai_staffing = rollup.get(scope, 'ai_staffing')
+
+    # Calculate dynamic revenue with baseline staffing
+    baseline_revenue_data = calculate_dynamic_revenue(total_traffic, total_baseline_staffing)
+    baseline_revenue = baseline_revenue_data['revenue']
+    baseline_cr = baseline_revenue_data['conversion_rate']
+
+    # Calculate dynamic revenue with AI staffing
+    ai_revenue_data = calculate_dynamic_revenue(total_traffic, total_ai_staffing)
+    ai_revenue = ai_revenue_data['revenue']
+    ai_cr = ai_revenue_data['conversion_rate']
+
+    # Calculate lost revenue (positive = lost opportunity, negative = savings)
+    lost_revenue = ai_revenue - baseline_revenue
+
+    # Return AI revenue as the primary metric
+    revenue = ai_revenue
+
+    # Calculate conversion efficiency (improvement from baseline to AI)
+    conversion_improvement = ((ai_cr - baseline_cr) / baseline_cr * 100) if baseline_cr > 0 else 0
+
+    # Store baseline and AI revenue for returning
+    return total_traffic, revenue, conversion_improvement, baseline_revenue, ai_revenue, lost_revenue, baseline_cr, ai_cr
+
+def calculate_forecast_accuracy(scope, rollup, selected_date, backtest_rollup=None):
+    """
+    Calculate forecast accuracy by comparing actual vs predicted traffic
+    Returns accuracy for today, 3-day average, and weekly average
+
+    Today is the mean per-period accuracy of the displayed forecast (scope
+    rollup). The 3-day and weekly values are 100 × (1 − WAPE) of day-ahead
+    backtests over the days up to the selected date (see backtesting.py),
+    from the additive error sums of backtest_rollup; without it they repeat
+    today's value.
+
+    Args:
+        scope: Hierarchy node
+        rollup: HierarchyRollup with 'accuracy_sum' / 'accuracy_count'
+        selected_date: Date on display
+        backtest_rollup: Optional HierarchyRollup with 'abs_error_3d', 'actual_3d',
+                         'abs_error_7d' and 'actual_7d'
+    """
+    today = datetime.now().date()
+
+    # Convert selected_date to date object if needed
+    # Check datetime first since it's a subclass of date
+    if hasattr(selected_date, 'date') and callable(selected_date.date):
+        selected_date_obj = selected_date.date()
+    else:
+        selected_date_obj = selected_date
+
+    # Check if we have actual data (past dates only)
+    has_actual_data = selected_date_obj <= today
+
+    if not has_actual_data:
+        # Future dates - no actual data, return N/A or default values
+        return 0.0, 0.0, 0.0
+
+    # Base accuracy from current data (mean of per-period accuracies with actuals)
+    accuracy_count = rollup.get(scope, 'accuracy_count')
+    accuracy_today = rollup.get(scope, 'accuracy_sum') / accuracy_count if accuracy_count > 0 else 92.0
+
+    def window_accuracy(window):
+        if backtest_rollup is None:
+            return accuracy_today
+        actual = backtest_rollup.get(scope, f'actual_{window}')
+        if actual <= 0:
+            return accuracy_today
+        return max(0.0, 100 * (1 - backtest_rollup.get(scope, f'abs_error_{window}') / actual))
+
+    return accuracy_today, window_accuracy('3d'), window_accuracy('7d')
+
+# ============================================================================
+# ADOPTION CALENDAR
+# ============================================================================
+DECISION_HISTORY_DAYS = 29      # Mock decision history before today
+STORE_ADOPTION_RATES = {"London": 0.95, "Copenhagen": 0.85}  # Share of days following AI (others: 0.95)
+
+def generate_decision_history(store_name, today, days=DECISION_HISTORY_DAYS):
+    """
+    Mock implementation decisions for one store (today excluded, so the user makes today's choice)
+
+    Args:
+        store_name: Name of the store
+        today: Current date
+        days: Days of history before today
+
+    Returns:
+        {date_str: {'decision': 1 (following AI) or 0 (using legacy)}}
+    """
+    adoption_rate = STORE_ADOPTION_RATES.get(store_name, 0.95)
+    return {
+        (today - timedelta(days=i)).strftime('%Y-%m-%d'): {'decision': 1 if random.random() < adoption_rate else 0}
+        for i in range(1, days + 1)
+    }
+
+def generate_implementation_calendar(store_name, implementation_history):
+    """
+    Generate a calendar heatmap of AI adoption for a specific store
+
+    Args:
+        store_name: Name of the store
+        implementation_history: {store: {date_str: {'decision': 1/0, ...}}}
+
+    Returns:
+        DataFrame with one row per day of the last 30 days
+    """
+    # Get last 30 days including today
+    dates = []
+    decisions = []
+
+    for i in range(30):
+        date = datetime.now() - timedelta(days=29-i)
+        date_str = date.strftime('%Y-%m-%d')
+
+        if store_name in implementation_history and date_str in implementation_history[store_name]:
+            implementation = implementation_history[store_name][date_str]
+            decision = implementation['decision']  # 1 = AI, 0 = Legacy
+        else:
+            decision = None
+
+        dates.append(date)
+        decisions.append(decision)
+
+    # Create calendar grid data
+    df_calendar = pd.DataFrame({
+        'Date': dates,
+        'Decision': decisions,  # 1 = Following AI, 0 = Using Legacy, None = No decision yet
+        'Day': [d.strftime('%a') for d in dates],
+        'Week': [(d - dates[0]).days // 7 for d in dates]
+    })
+
+    return df_calendar
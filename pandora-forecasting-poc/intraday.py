@@ -0,0 +1,236 @@
+"""
+Intraday Re-forecast
+Online correction of today's remaining hourly forecast from a stream of
+hourly actuals, with an append-only JSONL queue standing in for the store
+traffic feed
+"""
+
+import fcntl
+import json
+import os
+import threading
+from datetime import date
+
+import numpy as np
+
+from forecast_data import HOURS
+
+# ============================================================================
+# CORRECTION SETTINGS
+# ============================================================================
+EWMA_ALPHA = 0.3                # Weight of the latest hour in the actual / predicted ratio
+MIN_HOURS = 2                   # Hours observed today before the forecast is corrected
+MAX_CORRECTION = 0.5            # Correction clipped to ±50%
+MIN_CORRECTION = 0.01           # Corrections below 1% are ignored (forecast left as is)
+
+QUEUE_DIR = os.environ.get(
+    "PANDORA_ACTUALS_QUEUE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "actuals_queue")
+)
+
+
+class ActualsQueue:
+    """
+    Hourly actuals as one append-only JSONL file per day
+
+    Each line is {"store", "date", "hour", "actual"}. Producers append, and
+    consumers keep their own byte offset, so a read only parses the lines
+    added since the consumer's last read. Consumers only read today's file;
+    earlier days are pruned.
+    """
+
+    def __init__(self, directory=QUEUE_DIR):
+        self.directory = directory
+        self._lock = threading.Lock()
+
+    def path(self, day):
+        """Queue file of one day"""
+        return os.path.join(self.directory, f"{day.isoformat()}.jsonl")
+
+    def publish(self, records, new_only=False):
+        """
+        Append records
+
+        Args:
+            records: Iterable of dicts with 'store', 'date' (date), 'hour' ('14:00') and 'actual'
+            new_only: Skip records at or before their store's last queued hour
+                      of that day, so a producer that starts again (or runs in
+                      every replica) never queues an hour twice
+
+        Returns:
+            Number of records written
+        """
+        by_day = {}
+        for record in records:
+            by_day.setdefault(record['date'], []).append(record)
+
+        written = 0
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            for day, day_records in by_day.items():
+                with open(self.path(day), "a+", encoding="utf-8") as f:
+                    fcntl.flock(f, fcntl.LOCK_EX)  # Producers in other processes wait (released on close)
+                    if new_only:
+                        f.seek(0)
+                        last = {}
+                        for line in f:
+                            if line.endswith("\n"):  # Not a partially written line
+                                queued = json.loads(line)
+                                last[queued['store']] = max(last.get(queued['store'], ""), queued['hour'])
+                        day_records = [record for record in day_records
+                                       if record['hour'] > last.get(record['store'], "")]
+                    if day_records:
+                        f.write("\n".join(json.dumps({
+                            'store': record['store'],
+                            'date': record['date'].isoformat(),
+                            'hour': record['hour'],
+                            'actual': float(record['actual'])
+                        }) for record in day_records) + "\n")
+                    written += len(day_records)
+        return written
+
+    def prune(self, keep_from):
+        """
+        Delete the queue files of days before a date
+
+        Returns:
+            Number of files deleted
+        """
+        if not os.path.isdir(self.directory):
+            return 0
+        removed = 0
+        with self._lock:
+            for name in os.listdir(self.directory):
+                stem, extension = os.path.splitext(name)
+                try:
+                    day = date.fromisoformat(stem)
+                except ValueError:
+                    continue
+                if extension == ".jsonl" and day < keep_from:
+                    try:
+                        os.remove(os.path.join(self.directory, name))
+                        removed += 1
+                    except FileNotFoundError:  # Pruned by another replica
+                        pass
+        return removed
+
+    def read(self, day, offset=0):
+        """
+        Records of one day appended after a byte offset
+
+        Returns:
+            Tuple of (records, new offset); a partially written last line is
+            left for the next read
+        """
+        path = self.path(day)
+        if not os.path.exists(path) or os.path.getsize(path) <= offset:
+            return [], offset
+
+        with open(path, "rb") as f:
+            f.seek(offset)
+            data = f.read()
+        complete = data.rfind(b"\n") + 1
+        records = [json.loads(line) for line in data[:complete].splitlines() if line.strip()]
+        return records, offset + complete
+
+
+class IntradayCorrector:
+    """
+    Per-store EWMA of actual / predicted traffic for today
+
+    Each new hour moves only its store's ratio; the remaining hours of that
+    store's forecast are then scaled by the ratio (and AI staffing recomputed)
+    while every other store keeps its forecast untouched.
+    """
+
+    def __init__(self, stores, day):
+        """
+        Args:
+            stores: Store names
+            day: Date being corrected (today)
+        """
+        self.stores = list(stores)
+        self.store_index = {store: i for i, store in enumerate(self.stores)}
+        self.version = 0  # Bumped whenever any store's correction changes
+        self._lock = threading.Lock()
+        self.reset(day)
+
+    def reset(self, day):
+        """Start a new day: no hours observed, queue read from the beginning"""
+        n = len(self.stores)
+        self.day = day
+        self.offset = 0
+        self._ratio = np.ones(n)
+        self._hours = np.zeros(n, dtype=np.int64)
+        self._last_slot = np.full(n, -1, dtype=np.int64)
+        self.store_version = np.zeros(n, dtype=np.int64)
+        self.version += 1
+
+    def consume(self, queue, predicted_for, today):
+        """
+        Apply the records queued since the last call
+
+        Args:
+            queue: ActualsQueue
+            predicted_for: Function store → today's original hourly predicted traffic
+            today: Current date (a new date resets the corrector)
+
+        Returns:
+            Stores whose correction changed
+        """
+        with self._lock:
+            if today != self.day:
+                self.reset(today)
+
+            records, self.offset = queue.read(self.day, self.offset)
+            touched = set()
+            for record in records:
+                s = self.store_index.get(record['store'])
+                slot = HOURS.index(record['hour']) if record['hour'] in HOURS else -1
+                if s is None or slot <= self._last_slot[s] or date.fromisoformat(record['date']) != self.day:
+                    continue  # Unknown store, out-of-order / repeated hour, or another day
+
+                predicted = predicted_for(record['store'])[slot]
+                if predicted <= 0:
+                    continue
+                self._ratio[s] += EWMA_ALPHA * (record['actual'] / predicted - self._ratio[s])
+                self._hours[s] += 1
+                self._last_slot[s] = slot
+                touched.add(s)
+
+            if touched:
+                self.store_version[list(touched)] += 1
+                self.version += 1
+            return [self.stores[s] for s in sorted(touched)]
+
+    def correction(self, store):
+        """
+        Current correction of one store
+
+        Returns:
+            Tuple of (factor, first corrected slot, hours observed), or None
+            while the store has too few hours or a negligible correction
+        """
+        s = self.store_index.get(store)
+        if s is None or self._hours[s] < MIN_HOURS:
+            return None
+        factor = float(np.clip(self._ratio[s], 1 - MAX_CORRECTION, 1 + MAX_CORRECTION))
+        if abs(factor - 1) < MIN_CORRECTION:
+            return None
+        return factor, int(self._last_slot[s]) + 1, int(self._hours[s])
+
+    def apply(self, forecast):
+        """
+        Forecast with the remaining hours rescaled (the same forecast if uncorrected)
+
+        Uses the manual-adjustment path, so prediction bands scale and AI
+        staffing is recomputed for the corrected hours only.
+        """
+        correction = self.correction(forecast.store)
+        if correction is None:
+            return forecast
+        factor, first_slot, _ = correction
+        remaining = forecast.labels[first_slot:]
+        if not remaining:
+            return forecast
+        return forecast.with_adjustments({label: (factor - 1) * 100 for label in remaining})
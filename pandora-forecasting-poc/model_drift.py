@@ -0,0 +1,191 @@
+"""
+Model Drift
+Streaming drift detection on hourly forecast residuals for every store at
+once: Page-Hinkley on the mean relative residual and PSI on the actual /
+predicted traffic ratio distribution
+"""
+
+import threading
+
+import numpy as np
+
+# ============================================================================
+# DETECTOR SETTINGS
+# ============================================================================
+SLOTS_PER_DAY = 12              # Hourly records per store per day (09:00-21:00)
+RESIDUAL_CLIP = 1.0             # Relative residuals clipped to ±100% (one bad hour cannot alarm alone)
+
+PH_DELTA = 0.03                 # Page-Hinkley: mean shift tolerated without alarm (3%)
+PH_THRESHOLD = 1.0              # Page-Hinkley: cumulative deviation that raises an alarm
+PH_MIN_HOURS = 24               # Hours of history before Page-Hinkley may alarm
+
+PSI_EDGES = np.array([0.85, 0.95, 1.05, 1.15])  # actual / predicted bins (wide: hourly counts are small)
+PSI_REFERENCE_HOURS = 336       # First 4 weeks of hours per store form the reference distribution
+PSI_DECAY = 1 / 84              # Recent distribution: exponential decay (~1 week of opening hours)
+PSI_MIN_RECENT_HOURS = 84       # Hours after the reference before PSI is scored
+PSI_ALERT = 0.25                # PSI above this is a significant distribution shift
+PSI_EPSILON = 1e-4              # Floor on bin shares (keeps the log finite)
+
+ALERT_HOLD_HOURS = 24           # A Page-Hinkley alarm stays active for this many observed hours
+
+
+class DriftMonitor:
+    """
+    Per-store drift detectors updated one hour at a time, vectorized over stores
+
+    All state is held in arrays indexed by store, so each new hour of actuals
+    is a handful of array operations for the whole fleet: O(1) per store and
+    independent of how much history has been seen.
+
+    Page-Hinkley tracks a running mean of the relative residual and alarms
+    when the cumulative deviation from it (beyond PH_DELTA) exceeds
+    PH_THRESHOLD in either direction; it then restarts so it learns the new
+    level. PSI compares a recency-weighted histogram of actual / predicted
+    against the store's reference histogram.
+    """
+
+    def __init__(self, stores):
+        """
+        Args:
+            stores: Store names (the order of rows in observe_day arrays)
+        """
+        self.stores = list(stores)
+        self.store_index = {store: i for i, store in enumerate(self.stores)}
+        self.version = 0  # Bumped whenever new hours are observed
+
+        n = len(self.stores)
+        n_bins = len(PSI_EDGES) + 1
+
+        # Page-Hinkley state
+        self._count = np.zeros(n, dtype=np.int64)
+        self._mean = np.zeros(n)
+        self._cum_up = np.zeros(n)
+        self._min_up = np.zeros(n)
+        self._cum_down = np.zeros(n)
+        self._max_down = np.zeros(n)
+        self._ph_direction = np.zeros(n, dtype=np.int8)    # +1 traffic above forecast, -1 below
+        self._since_alarm = np.full(n, ALERT_HOLD_HOURS, dtype=np.int64)
+
+        # PSI state
+        self._reference = np.zeros((n, n_bins))
+        self._reference_count = np.zeros(n, dtype=np.int64)
+        self._recent = np.zeros((n, n_bins))
+        self._recent_weight = np.zeros(n)
+        self._recent_count = np.zeros(n, dtype=np.int64)
+        self._psi = np.zeros(n)
+
+        self._last_position = np.full(n, -1, dtype=np.int64)  # Latest observed day ordinal × slots + slot
+        self._lock = threading.Lock()
+
+    def observe_day(self, day, predicted, actual):
+        """
+        Observe one day of hourly actuals for every store
+
+        Hours already observed for a store are skipped, so a day can be fed
+        repeatedly as its hours arrive.
+
+        Args:
+            day: Date of the records
+            predicted: Predicted traffic, shape (stores, SLOTS_PER_DAY)
+            actual: Actual traffic, same shape, NaN where no record exists
+
+        Returns:
+            Number of new hours observed
+        """
+        predicted = np.asarray(predicted, dtype=float)
+        actual = np.asarray(actual, dtype=float)
+        base = day.toordinal() * SLOTS_PER_DAY
+        observed = 0
+
+        with self._lock:
+            for slot in range(predicted.shape[1]):
+                mask = (np.isfinite(actual[:, slot]) & (predicted[:, slot] > 0)
+                        & (self._last_position < base + slot))
+                rows = np.flatnonzero(mask)
+                if len(rows) == 0:
+                    continue
+                self._update(rows, predicted[rows, slot], actual[rows, slot])
+                self._last_position[rows] = base + slot
+                observed += len(rows)
+
+            if observed:
+                self.version += 1
+        return observed
+
+    def _update(self, rows, predicted, actual):
+        """One hour for the given stores (all arrays aligned with rows)"""
+        ratio = actual / predicted
+        x = np.clip(ratio - 1, -RESIDUAL_CLIP, RESIDUAL_CLIP)
+
+        # Page-Hinkley (two-sided)
+        self._count[rows] += 1
+        self._mean[rows] += (x - self._mean[rows]) / self._count[rows]
+        deviation = x - self._mean[rows]
+        self._cum_up[rows] += deviation - PH_DELTA
+        self._min_up[rows] = np.minimum(self._min_up[rows], self._cum_up[rows])
+        self._cum_down[rows] += deviation + PH_DELTA
+        self._max_down[rows] = np.maximum(self._max_down[rows], self._cum_down[rows])
+        self._since_alarm[rows] += 1
+
+        up = self._cum_up[rows] - self._min_up[rows] > PH_THRESHOLD
+        down = self._max_down[rows] - self._cum_down[rows] > PH_THRESHOLD
+        alarm = (up | down) & (self._count[rows] >= PH_MIN_HOURS)
+        if alarm.any():
+            hit = rows[alarm]
+            self._ph_direction[hit] = np.where(up[alarm], 1, -1)
+            self._since_alarm[hit] = 0
+            # Restart so the detector learns the new level
+            self._count[hit] = 0
+            self._mean[hit] = 0
+            self._cum_up[hit] = self._min_up[hit] = 0
+            self._cum_down[hit] = self._max_down[hit] = 0
+
+        # PSI: fill the reference first, then decay the recent histogram
+        bins = np.searchsorted(PSI_EDGES, ratio, side='right')
+        filling = self._reference_count[rows] < PSI_REFERENCE_HOURS
+        ref_rows = rows[filling]
+        np.add.at(self._reference, (ref_rows, bins[filling]), 1)
+        self._reference_count[ref_rows] += 1
+
+        live_rows = rows[~filling]
+        if len(live_rows):
+            self._recent[live_rows] *= 1 - PSI_DECAY
+            np.add.at(self._recent, (live_rows, bins[~filling]), PSI_DECAY)
+            self._recent_weight[live_rows] = self._recent_weight[live_rows] * (1 - PSI_DECAY) + PSI_DECAY
+            self._recent_count[live_rows] += 1
+
+            reference = np.maximum(self._reference[live_rows] / self._reference_count[live_rows, None], PSI_EPSILON)
+            recent = np.maximum(self._recent[live_rows] / self._recent_weight[live_rows, None], PSI_EPSILON)
+            psi = ((recent - reference) * np.log(recent / reference)).sum(axis=1)
+            # Not scored until the recent histogram holds a full decay window
+            self._psi[live_rows] = np.where(self._recent_count[live_rows] >= PSI_MIN_RECENT_HOURS, psi, 0.0)
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+    def psi(self):
+        """Current PSI per store (0 until reference and recent windows are filled)"""
+        return self._psi
+
+    def alert_mask(self):
+        """Stores currently in drift (Page-Hinkley alarm held or PSI above threshold)"""
+        return (self._since_alarm < ALERT_HOLD_HOURS) | (self._psi > PSI_ALERT)
+
+    def alerts(self):
+        """
+        Stores currently in drift
+
+        Returns:
+            List of dicts with 'store', 'detector' ('page_hinkley' or 'psi'),
+            'direction' ('above' / 'below' forecast, None for PSI only) and 'psi'
+        """
+        result = []
+        for i in np.flatnonzero(self.alert_mask()):
+            ph_active = self._since_alarm[i] < ALERT_HOLD_HOURS
+            result.append({
+                'store': self.stores[i],
+                'detector': 'page_hinkley' if ph_active else 'psi',
+                'direction': ('above' if self._ph_direction[i] > 0 else 'below') if ph_active else None,
+                'psi': float(self._psi[i])
+            })
+        return result
@@ -0,0 +1,127 @@
+"""
+Prediction Intervals
+Empirical forecast bands from rolling residuals of actual vs predicted traffic,
+kept per store × weekday × time slot
+"""
+
+import threading
+
+import numpy as np
+
+# ============================================================================
+# INTERVAL SETTINGS
+# ============================================================================
+DEFAULT_WINDOW = 8              # Residuals kept per cell (8 weeks of the same weekday/slot)
+DEFAULT_COVERAGE = 0.80         # P10 - P90 band
+MIN_OBSERVATIONS = 3            # Below this a cell falls back to the default band
+FALLBACK_BAND = 0.10            # ±10% until enough actuals have been seen
+SEEN_RETENTION = 5000           # Dedupe keys kept for the latest N observed days
+
+
+class ResidualIntervalModel:
+    """
+    Rolling residual quantiles per store × weekday × slot
+
+    Residuals are relative (actual / predicted - 1), so a band learned on one
+    forecast level carries over to adjusted forecasts. Each cell holds a ring
+    buffer of the last `window` residuals. New actuals only mark their cells
+    dirty; quantiles for all dirty cells are recomputed in a single
+    vectorized nanquantile call the next time a band is read.
+    """
+
+    def __init__(self, stores, n_slots, window=DEFAULT_WINDOW, coverage=DEFAULT_COVERAGE):
+        self.stores = list(stores)
+        self.store_index = {store: i for i, store in enumerate(self.stores)}
+        self.n_slots = n_slots
+        self.window = window
+        self.quantiles = ((1 - coverage) / 2, 1 - (1 - coverage) / 2)
+        self.version = 0  # Bumped whenever new residuals arrive (used in cache keys)
+
+        shape = (len(self.stores), 7, n_slots)
+        self._residuals = np.full(shape + (window,), np.nan)
+        self._cursor = np.zeros(shape, dtype=np.int64)
+        self._lower = np.full(shape, -FALLBACK_BAND)
+        self._upper = np.full(shape, FALLBACK_BAND)
+        self._dirty = np.zeros(shape, dtype=bool)
+        self._seen = {}
+        self._lock = threading.Lock()
+
+    def observe(self, store, weekday, predicted, actual, key=None):
+        """
+        Record actuals for one store and weekday
+
+        Args:
+            store: Store name
+            weekday: Day of week (0=Monday)
+            predicted: Predicted traffic per slot (length n_slots)
+            actual: Actual traffic per slot, NaN/None where not yet known
+            key: Optional identifier of the observed day; slots already
+                 recorded under the same key are skipped, so the same day can
+                 be fed repeatedly as its hours fill in
+
+        Returns:
+            Number of new residuals recorded
+        """
+        predicted = np.asarray(predicted, dtype=float)
+        actual = np.asarray(actual, dtype=float)
+        slots = np.flatnonzero(np.isfinite(actual) & (predicted > 0))
+
+        with self._lock:
+            if key is not None:
+                seen = self._seen.setdefault(key, np.zeros(self.n_slots, dtype=bool))
+                slots = slots[~seen[slots]]
+                seen[slots] = True
+                if len(self._seen) > SEEN_RETENTION:
+                    self._seen.pop(next(iter(self._seen)))
+
+            if len(slots) == 0:
+                return 0
+
+            s = self.store_index[store]
+            cursor = self._cursor[s, weekday, slots]
+            self._residuals[s, weekday, slots, cursor % self.window] = actual[slots] / predicted[slots] - 1
+            self._cursor[s, weekday, slots] = cursor + 1
+            self._dirty[s, weekday, slots] = True
+            self.version += 1
+
+        return len(slots)
+
+    def _refresh(self):
+        """Recompute quantiles for every dirty cell in one vectorized pass"""
+        if not self._dirty.any():
+            return
+
+        dirty = self._dirty
+        window_residuals = self._residuals[dirty]
+        enough = np.count_nonzero(np.isfinite(window_residuals), axis=1) >= MIN_OBSERVATIONS
+
+        lower = np.full(len(window_residuals), -FALLBACK_BAND)
+        upper = np.full(len(window_residuals), FALLBACK_BAND)
+        if enough.any():
+            lower[enough], upper[enough] = np.nanquantile(window_residuals[enough], self.quantiles, axis=1)
+
+        # Band always contains the point forecast
+        self._lower[dirty] = np.minimum(lower, 0.0)
+        self._upper[dirty] = np.maximum(upper, 0.0)
+        self._dirty[:] = False
+
+    def band(self, store, weekdays, slots, predicted):
+        """
+        Absolute prediction interval around a forecast
+
+        Args:
+            store: Store name
+            weekdays: Weekday per forecast row
+            slots: Slot index per forecast row
+            predicted: Predicted traffic per forecast row
+
+        Returns:
+            Tuple (lower, upper) of arrays in visits
+        """
+        with self._lock:
+            self._refresh()
+            s = self.store_index[store]
+            predicted = np.asarray(predicted, dtype=float)
+            lower = predicted * (1 + self._lower[s, weekdays, slots])
+            upper = predicted * (1 + self._upper[s, weekdays, slots])
+        return np.maximum(lower, 0.0), upper
@@ -0,0 +1,313 @@
+"""
+Rerun Profiling
+Per-stage wall time, call counts and cache hit rates for each Streamlit rerun,
+kept in a ring buffer for the admin panel and exportable as JSON or
+Prometheus text
+
+Disabled (the default) every hook is a single attribute check: stage() hands
+back a shared no-op context manager and the cache decorators call straight
+through. Enable with PANDORA_PROFILING=1.
+"""
+
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+# ============================================================================
+# SETTINGS
+# ============================================================================
+DEFAULT_CAPACITY = 200          # Reruns kept in the ring buffer
+ENV_FLAG = "PANDORA_PROFILING"
+METRIC_PREFIX = "pandora"
+
+
+class _NullStage:
+    """Shared no-op context manager used while profiling is off"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    """Times one pipeline stage into the current rerun record"""
+
+    __slots__ = ('record', 'name', 'start')
+
+    def __init__(self, record, name):
+        self.record = record
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        stage = self.record['stages'].setdefault(self.name, [0.0, 0])
+        stage[0] += elapsed
+        stage[1] += 1
+        return False
+
+
+class _FragmentRun:
+    """Times a fragment-only rerun (no full rerun record open)"""
+
+    __slots__ = ('profiler', 'name', 'start')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler._record_fragment(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class RerunProfiler:
+    """
+    Collects stage timings and cache statistics per rerun
+
+    Every session reruns on its own script thread, so the record being filled
+    lives in thread-local storage; completed reruns go into a shared ring
+    buffer and process-lifetime counters (for Prometheus).
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY, enabled=None):
+        self.enabled = os.environ.get(ENV_FLAG, "") not in ("", "0") if enabled is None else enabled
+        self.reruns = deque(maxlen=capacity)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+        # Process-lifetime counters
+        self.rerun_count = 0
+        self.rerun_seconds = 0.0
+        self.stage_totals = {}   # stage → [seconds, calls]
+        self.cache_totals = {}   # function → [calls, misses]
+        self.fragment_runs = deque(maxlen=capacity)  # (fragment, seconds) of fragment-only reruns
+        self.fragment_totals = {}  # fragment → [seconds, runs]
+
+    # ------------------------------------------------------------------
+    # Rerun lifecycle
+    # ------------------------------------------------------------------
+    def start_rerun(self):
+        """Begin a rerun record (a rerun cut short by st.rerun() is simply replaced)"""
+        self._local.record = {
+            'started': time.time(),
+            'start': time.perf_counter(),
+            'stages': {},
+            'cache': {}
+        } if self.enabled else None
+
+    def end_rerun(self):
+        """Close the current rerun record and add it to the ring buffer"""
+        record = getattr(self._local, 'record', None)
+        if record is None:
+            return
+        self._local.record = None
+
+        total = time.perf_counter() - record.pop('start')
+        record['total_s'] = total
+
+        with self._lock:
+            self.reruns.append(record)
+            self.rerun_count += 1
+            self.rerun_seconds += total
+            for name, (seconds, calls) in record['stages'].items():
+                totals = self.stage_totals.setdefault(name, [0.0, 0])
+                totals[0] += seconds
+                totals[1] += calls
+            for name, (calls, misses) in record['cache'].items():
+                totals = self.cache_totals.setdefault(name, [0, 0])
+                totals[0] += calls
+                totals[1] += misses
+
+    def _record(self):
+        return getattr(self._local, 'record', None)
+
+    # ------------------------------------------------------------------
+    # Hooks
+    # ------------------------------------------------------------------
+    def stage(self, name):
+        """Context manager timing one pipeline stage of the current rerun"""
+        record = self._record()
+        if record is None:
+            return _NULL_STAGE
+        return _Stage(record, name)
+
+    def fragment(self, name):
+        """
+        Context manager timing the body of an st.fragment
+
+        During a full rerun it is an ordinary stage; a fragment-only rerun has
+        no rerun record open and is recorded on its own, so interaction
+        latency is reported separately from full reruns.
+        """
+        if not self.enabled:
+            return _NULL_STAGE
+        record = self._record()
+        if record is not None:
+            return _Stage(record, name)
+        return _FragmentRun(self, name)
+
+    def _record_fragment(self, name, seconds):
+        with self._lock:
+            self.fragment_runs.append((name, seconds))
+            totals = self.fragment_totals.setdefault(name, [0.0, 0])
+            totals[0] += seconds
+            totals[1] += 1
+
+    def _count_cache(self, name, index):
+        record = self._record()
+        if record is not None:
+            record['cache'].setdefault(name, [0, 0])[index] += 1
+
+    def cache_calls(self, name):
+        """
+        Decorator counting calls of a cached function
+
+        Goes outside st.cache_data / st.cache_resource; cache_misses goes
+        inside, so hits = calls - misses.
+        """
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                self._count_cache(name, 0)
+                return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def cache_misses(self, name):
+        """Decorator counting executions of a cached function's body (cache misses)"""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                self._count_cache(name, 1)
+                return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    # ------------------------------------------------------------------
+    # Reports
+    # ------------------------------------------------------------------
+    def summary(self):
+        """
+        Statistics over the reruns in the ring buffer
+
+        Returns:
+            Dictionary with:
+            - 'reruns': Number of reruns in the buffer
+            - 'total': {'mean_ms', 'p50_ms', 'p95_ms', 'max_ms'} of full reruns
+            - 'stages': {stage: {'mean_ms', 'p50_ms', 'p95_ms', 'max_ms', 'calls_per_rerun', 'share'}}
+            - 'cache': {function: {'calls', 'misses', 'hit_rate'}}
+            - 'fragments': {fragment: {'mean_ms', 'p50_ms', 'p95_ms', 'max_ms', 'runs'}}
+              of fragment-only reruns
+        """
+        with self._lock:
+            reruns = list(self.reruns)
+            fragment_runs = list(self.fragment_runs)
+
+        def stats(values_s):
+            values_ms = np.asarray(values_s) * 1000
+            p50, p95 = np.percentile(values_ms, (50, 95))
+            return {'mean_ms': float(values_ms.mean()), 'p50_ms': float(p50),
+                    'p95_ms': float(p95), 'max_ms': float(values_ms.max())}
+
+        fragments = {}
+        for name in dict.fromkeys(name for name, _ in fragment_runs):
+            seconds = [s for fragment, s in fragment_runs if fragment == name]
+            fragments[name] = dict(stats(seconds), runs=len(seconds))
+
+        if not reruns:
+            return {'reruns': 0, 'total': {}, 'stages': {}, 'cache': {}, 'fragments': fragments}
+
+        totals = [r['total_s'] for r in reruns]
+        mean_total = float(np.mean(totals))
+
+        stages = {}
+        for name in dict.fromkeys(name for r in reruns for name in r['stages']):
+            seconds = [r['stages'].get(name, (0.0, 0))[0] for r in reruns]
+            calls = [r['stages'].get(name, (0.0, 0))[1] for r in reruns]
+            stages[name] = dict(stats(seconds),
+                                calls_per_rerun=float(np.mean(calls)),
+                                share=float(np.mean(seconds)) / mean_total if mean_total > 0 else 0.0)
+
+        cache = {}
+        for r in reruns:
+            for name, (calls, misses) in r['cache'].items():
+                entry = cache.setdefault(name, {'calls': 0, 'misses': 0})
+                entry['calls'] += calls
+                entry['misses'] += misses
+        for entry in cache.values():
+            entry['hit_rate'] = 1 - entry['misses'] / entry['calls'] if entry['calls'] else 0.0
+
+        return {'reruns': len(reruns), 'total': stats(totals), 'stages': stages, 'cache': cache,
+                'fragments': fragments}
+
+    def to_json(self, include_reruns=True):
+        """Summary (and optionally the raw ring buffer) as a JSON string"""
+        payload = {'summary': self.summary()}
+        if include_reruns:
+            with self._lock:
+                payload['reruns'] = [
+                    {'started': r['started'], 'total_s': r['total_s'],
+                     'stages': {name: {'seconds': s, 'calls': c} for name, (s, c) in r['stages'].items()},
+                     'cache': {name: {'calls': c, 'misses': m} for name, (c, m) in r['cache'].items()}}
+                    for r in self.reruns
+                ]
+        return json.dumps(payload, indent=2)
+
+    def to_prometheus(self):
+        """Process-lifetime counters in the Prometheus text exposition format"""
+        with self._lock:
+            stage_totals = {name: tuple(v) for name, v in self.stage_totals.items()}
+            cache_totals = {name: tuple(v) for name, v in self.cache_totals.items()}
+            fragment_totals = {name: tuple(v) for name, v in self.fragment_totals.items()}
+            rerun_count, rerun_seconds = self.rerun_count, self.rerun_seconds
+
+        p = METRIC_PREFIX
+        lines = [
+            f"# HELP {p}_reruns_total Completed Streamlit reruns",
+            f"# TYPE {p}_reruns_total counter",
+            f"{p}_reruns_total {rerun_count}",
+            f"# HELP {p}_rerun_seconds_total Wall time spent in reruns",
+            f"# TYPE {p}_rerun_seconds_total counter",
+            f"{p}_rerun_seconds_total {rerun_seconds:.6f}",
+            f"# HELP {p}_stage_seconds_total Wall time spent per pipeline stage",
+            f"# TYPE {p}_stage_seconds_total counter",
+        ]
+        lines += [f'{p}_stage_seconds_total{{stage="{name}"}} {s:.6f}' for name, (s, _) in stage_totals.items()]
+        lines += [f"# HELP {p}_stage_calls_total Executions per pipeline stage",
+                  f"# TYPE {p}_stage_calls_total counter"]
+        lines += [f'{p}_stage_calls_total{{stage="{name}"}} {c}' for name, (_, c) in stage_totals.items()]
+        lines += [f"# HELP {p}_cache_calls_total Calls of cached functions",
+                  f"# TYPE {p}_cache_calls_total counter"]
+        lines += [f'{p}_cache_calls_total{{function="{name}"}} {c}' for name, (c, _) in cache_totals.items()]
+        lines += [f"# HELP {p}_cache_misses_total Cache misses (function body executed)",
+                  f"# TYPE {p}_cache_misses_total counter"]
+        lines += [f'{p}_cache_misses_total{{function="{name}"}} {m}' for name, (_, m) in cache_totals.items()]
+        lines += [f"# HELP {p}_fragment_runs_total Fragment-only reruns",
+                  f"# TYPE {p}_fragment_runs_total counter"]
+        lines += [f'{p}_fragment_runs_total{{fragment="{name}"}} {n}' for name, (_, n) in fragment_totals.items()]
+        lines += [f"# HELP {p}_fragment_seconds_total Wall time spent in fragment-only reruns",
+                  f"# TYPE {p}_fragment_seconds_total counter"]
+        lines += [f'{p}_fragment_seconds_total{{fragment="{name}"}} {s:.6f}' for name, (s, _) in fragment_totals.items()]
+        return "\n".join(lines) + "\n"
+
+
+# Process-wide profiler shared by every session
+PROFILER = RerunProfiler()
@@ -0,0 +1,180 @@
+"""
+Forecast Reconciliation
+Makes forecasts at every level of the fleet → region → country → city →
+store hierarchy add up, with sparse summing and constraint matrices built
+once per hierarchy: bottom-up, top-down (proportions) and MinT with a
+diagonal covariance (OLS / structural / variance scaling)
+
+scipy is only imported when a sparse matrix is first needed (MinT or a
+coherence check): summing to every node is a per-level np.add.reduceat, so
+the dashboard's aggregation path never loads it.
+"""
+
+from functools import cached_property
+
+import numpy as np
+
+from store_hierarchy import LEVELS
+
+# ============================================================================
+# RECONCILIATION SETTINGS
+# ============================================================================
+METHODS = ('bottom_up', 'top_down', 'mint')
+MINT_WEIGHTS = ('ols', 'structural', 'variance')
+
+
+class HierarchyReconciler:
+    """
+    Summing matrix S (nodes × stores) of a StoreHierarchy and the MinT solver
+
+    Node rows follow hierarchy.row (level-major: fleet, regions, countries,
+    cities, then the stores in hierarchy.stores order), so a (nodes × slots)
+    forecast array is aggregates on top and store forecasts at the bottom.
+
+    MinT is solved in its projection form
+        ỹ = ŷ − W Cᵀ (C W Cᵀ)⁻¹ C ŷ,   C = [I  −S_agg]
+    which only factorizes an (aggregates × aggregates) matrix. With a
+    diagonal W its non-zeros are the ancestor / descendant pairs, so it stays
+    sparse however many stores there are; the LU factor is cached per weight vector.
+    """
+
+    def __init__(self, hierarchy):
+        self.hierarchy = hierarchy
+        self.n_stores = len(hierarchy.stores)
+        self.n_nodes = len(hierarchy.row)
+        self.n_aggregates = self.n_nodes - self.n_stores
+
+        nodes = sorted(hierarchy.row, key=hierarchy.row.get)
+        self.stores_under = np.array([hierarchy.span[node][1] - hierarchy.span[node][0] for node in nodes])  # Structural scaling
+        self.level_rows = {
+            level: np.array([row for node, row in hierarchy.row.items() if hierarchy.level[node] == level])
+            for level in LEVELS
+        }
+        # Level-major rows are each level's nodes in store order, i.e. its reduceat segments
+        self._level_starts = [hierarchy.level_starts(level) for level in LEVELS]
+        self._factors = {}
+
+    @cached_property
+    def S(self):
+        """Sparse summing matrix (nodes × stores)"""
+        from scipy import sparse
+
+        rows, cols = [], []
+        for node, row in self.hierarchy.row.items():
+            start, end = self.hierarchy.span[node]
+            rows.append(np.full(end - start, row))
+            cols.append(np.arange(start, end))
+        return sparse.csr_matrix(
+            (np.ones(sum(len(r) for r in rows)), (np.concatenate(rows), np.concatenate(cols))),
+            shape=(self.n_nodes, self.n_stores)
+        )
+
+    @cached_property
+    def C(self):
+        """Constraint matrix [I  −S_agg] (aggregates × nodes); C y = 0 for coherent forecasts"""
+        from scipy import sparse
+
+        return sparse.hstack([sparse.identity(self.n_aggregates, format='csr'), -self.S[:self.n_aggregates]],
+                             format='csr')
+
+    def aggregate(self, store_forecasts):
+        """
+        Bottom-level forecasts summed to every node
+
+        Args:
+            store_forecasts: (stores × slots) array in hierarchy.stores order
+
+        Returns:
+            (nodes × slots) array in hierarchy.row order
+        """
+        store_forecasts = np.asarray(store_forecasts, dtype=float)
+        return np.concatenate([np.add.reduceat(store_forecasts, starts, axis=0) for starts in self._level_starts])
+
+    def bottom_up(self, base):
+        """Coherent forecasts from the store rows of a (nodes × slots) base forecast"""
+        return self.aggregate(base[self.n_aggregates:])
+
+    def top_down(self, base, proportions):
+        """
+        Fleet forecast split over stores by proportions, then summed up
+
+        Args:
+            base: (nodes × slots) base forecasts (only the fleet row is used)
+            proportions: Store shares (stores, or stores × slots), e.g. of
+                         historical actuals; normalized to sum to 1
+        """
+        proportions = np.asarray(proportions, dtype=float)
+        proportions = proportions / proportions.sum(axis=0, keepdims=True)
+        if proportions.ndim == 1:
+            proportions = proportions[:, None]
+        fleet = base[self.level_rows['fleet'][0]]
+        return self.aggregate(proportions * fleet[None, :])
+
+    def weights(self, kind='structural', residual_variance=None):
+        """
+        Diagonal of W
+
+        Args:
+            kind: 'ols' (identity), 'structural' (stores under each node) or
+                  'variance' (residual variance per node, MinT-diagonal)
+            residual_variance: Per-node variances, required for 'variance'
+        """
+        if kind == 'ols':
+            return np.ones(self.n_nodes)
+        if kind == 'structural':
+            return self.stores_under.astype(float)
+        if kind == 'variance':
+            if residual_variance is None:
+                raise ValueError("residual_variance is required for variance weights")
+            return np.maximum(np.asarray(residual_variance, dtype=float), 1e-9)
+        raise ValueError(f"Unknown MinT weights: {kind}")
+
+    def _factor(self, w):
+        """LU factor of C W Cᵀ for a weight vector (cached)"""
+        key = w.tobytes()
+        factor = self._factors.get(key)
+        if factor is None:
+            from scipy import sparse
+            from scipy.sparse.linalg import splu
+
+            system = (self.C @ sparse.diags(w) @ self.C.T).tocsc()
+            factor = self._factors[key] = splu(system)
+        return factor
+
+    def mint(self, base, w):
+        """
+        MinT (diagonal W) reconciliation of (nodes × slots) base forecasts
+
+        Args:
+            base: Base forecasts of every node, hierarchy.row order
+            w: Diagonal of W (see weights)
+
+        Returns:
+            Coherent (nodes × slots) forecasts
+        """
+        base = np.asarray(base, dtype=float)
+        incoherence = self.C @ base
+        if not np.any(incoherence):
+            return base.copy()
+        return base - (w[:, None] * (self.C.T @ self._factor(w).solve(incoherence)))
+
+    def reconcile(self, base, method='mint', weights='structural', residual_variance=None, proportions=None):
+        """
+        Coherent forecasts of every node
+
+        Args:
+            base: (nodes × slots) base forecasts, hierarchy.row order
+            method: 'bottom_up', 'top_down' (needs proportions) or 'mint'
+            weights: MinT weights (see weights)
+        """
+        if method == 'bottom_up':
+            return self.bottom_up(base)
+        if method == 'top_down':
+            return self.top_down(base, proportions)
+        if method == 'mint':
+            return self.mint(base, self.weights(weights, residual_variance))
+        raise ValueError(f"Unknown reconciliation method: {method}")
+
+    def coherence_error(self, forecasts):
+        """Largest absolute gap between an aggregate and the sum of its stores"""
+        return float(np.abs(self.C @ np.asarray(forecasts, dtype=float)).max(initial=0.0))
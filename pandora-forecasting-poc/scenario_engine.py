@@ -0,0 +1,129 @@
+"""
+Monte Carlo Scenario Engine
+Turns the point revenue estimates from calculate_kpis into P10/P50/P90 ranges by
+sampling traffic, average ticket value and conversion-curve uncertainty
+"""
+
+import numpy as np
+
+from staffing_model import (
+    BASELINE_CR,
+    CR_DECLINE_PER_POINT,
+    CR_GAIN_PER_POINT,
+    DEFAULT_ATV_DKK,
+    SURVIVAL_PENALTY_PER_POINT,
+    adjusted_conversion_rate_array,
+)
+
+# ============================================================================
+# DEFAULT UNCERTAINTY ASSUMPTIONS
+# ============================================================================
+DEFAULT_SCENARIOS = 5000
+TRAFFIC_NOISE_SD = 0.05         # Log-scale sd per store-slot (~ ±8% actual vs predicted spread)
+ATV_CV = 0.10                   # Ticket value variation per store and scenario
+CURVE_UNCERTAINTY = 0.15        # Relative sd of the conversion curve slopes
+BASELINE_CR_UNCERTAINTY = 0.10  # Relative sd of the 20% baseline conversion rate
+
+# Upper bound on elements in one (scenarios × stores × slots) chunk.
+# 4M float32 values ≈ 16 MB, so a full fleet runs on a normal server.
+MAX_CHUNK_ELEMENTS = 4_000_000
+
+PERCENTILES = (10, 50, 90)
+
+
+def _lognormal_multiplier(rng, sd, size, dtype=np.float64):
+    """Mean-one multiplicative noise exp(N(-sd²/2, sd))"""
+    noise = rng.standard_normal(size, dtype=dtype)
+    noise *= sd
+    noise -= 0.5 * sd ** 2
+    return np.exp(noise, out=noise)
+
+
+def _percentile_summary(values):
+    """Summarize a 1-D sample as {'p10': ..., 'p50': ..., 'p90': ...}"""
+    p10, p50, p90 = np.percentile(values, PERCENTILES)
+    return {'p10': float(p10), 'p50': float(p50), 'p90': float(p90)}
+
+
+def simulate_revenue_impact(predicted_traffic, baseline_staffing, ai_staffing,
+                            n_scenarios=DEFAULT_SCENARIOS, atv_dkk=DEFAULT_ATV_DKK,
+                            traffic_noise=TRAFFIC_NOISE_SD, atv_cv=ATV_CV,
+                            curve_uncertainty=CURVE_UNCERTAINTY,
+                            baseline_cr_uncertainty=BASELINE_CR_UNCERTAINTY,
+                            seed=42, max_chunk_elements=MAX_CHUNK_ELEMENTS):
+    """
+    Sample revenue outcomes for baseline and AI staffing across many traffic paths
+
+    Each chunk draws a (scenarios × stores × slots) traffic array around the
+    forecast. Revenue follows the same aggregation as calculate_kpis: scope
+    totals give one STA ratio per plan, and the conversion curve applies to it.
+    Staffing stays fixed because the rota is planned from the forecast, not
+    from the traffic that actually shows up.
+
+    Args:
+        predicted_traffic: Array (stores × slots) of forecast visits
+        baseline_staffing: Array (stores × slots) of legacy staffing
+        ai_staffing: Array (stores × slots) of AI recommended staffing
+        n_scenarios: Number of Monte Carlo scenarios
+        atv_dkk: Average ticket value in DKK
+        traffic_noise: Log-scale sd of per store-slot traffic noise
+        atv_cv: Relative sd of the ticket value per store and scenario
+        curve_uncertainty: Relative sd of the conversion curve slopes
+        baseline_cr_uncertainty: Relative sd of the baseline conversion rate
+        seed: Random seed so reruns show the same bands
+        max_chunk_elements: Memory bound for one scenario chunk
+
+    Returns:
+        Dictionary with P10/P50/P90 summaries:
+        - 'baseline_revenue', 'ai_revenue', 'revenue_impact'
+        - 'n_scenarios': Number of scenarios sampled
+    """
+    predicted_traffic = np.atleast_2d(np.asarray(predicted_traffic, dtype=float))
+    n_stores, n_slots = predicted_traffic.shape
+
+    total_baseline_staffing = max(float(np.sum(baseline_staffing)), 1.0)
+    total_ai_staffing = max(float(np.sum(ai_staffing)), 1.0)
+
+    rng = np.random.default_rng(seed)
+    chunk_size = max(1, min(n_scenarios, max_chunk_elements // max(1, n_stores * n_slots)))
+
+    baseline_revenue = np.empty(n_scenarios)
+    ai_revenue = np.empty(n_scenarios)
+
+    for start in range(0, n_scenarios, chunk_size):
+        size = min(chunk_size, n_scenarios - start)
+        chunk = slice(start, start + size)
+
+        # Traffic paths: (scenarios × stores × slots) in float32, reduced per store immediately
+        traffic = _lognormal_multiplier(rng, traffic_noise, (size, n_stores, n_slots), dtype=np.float32)
+        traffic *= predicted_traffic
+        store_traffic = traffic.sum(axis=2, dtype=np.float64)
+        del traffic
+
+        # Ticket value varies per store and scenario
+        store_atv = atv_dkk * _lognormal_multiplier(rng, atv_cv, (size, n_stores))
+        ticket_value = (store_traffic * store_atv).sum(axis=1)
+        total_traffic = store_traffic.sum(axis=1)
+
+        # Conversion curve uncertainty: one perturbed curve per scenario
+        baseline_cr = BASELINE_CR * _lognormal_multiplier(rng, baseline_cr_uncertainty, size)
+        slope_scale = _lognormal_multiplier(rng, curve_uncertainty, size)
+        curve = {
+            'baseline_cr': baseline_cr,
+            'decline_per_point': CR_DECLINE_PER_POINT * slope_scale,
+            'gain_per_point': CR_GAIN_PER_POINT * slope_scale,
+            'survival_penalty': SURVIVAL_PENALTY_PER_POINT * slope_scale,
+        }
+
+        baseline_cr_sample = adjusted_conversion_rate_array(total_traffic / total_baseline_staffing, **curve)
+        ai_cr_sample = adjusted_conversion_rate_array(total_traffic / total_ai_staffing, **curve)
+
+        baseline_revenue[chunk] = ticket_value * baseline_cr_sample
+        ai_revenue[chunk] = ticket_value * ai_cr_sample
+
+    return {
+        'baseline_revenue': _percentile_summary(baseline_revenue),
+        'ai_revenue': _percentile_summary(ai_revenue),
+        'revenue_impact': _percentile_summary(ai_revenue - baseline_revenue),
+        'n_scenarios': n_scenarios
+    }
@@ -0,0 +1,105 @@
+"""
+Session Memory
+Footprint of one Streamlit session's own state, measured against a per-session
+cap so that many concurrent users cannot grow the process without bound.
+Shared data (forecast tensors, decision history) lives in process-wide caches
+and is not part of a session's footprint.
+"""
+
+import os
+import sys
+
+import numpy as np
+
+# ============================================================================
+# MEMORY SETTINGS
+# ============================================================================
+SESSION_MEMORY_CAP_BYTES = int(os.environ.get("PANDORA_SESSION_CAP_KB", "512")) * 1024
+
+
+def deep_sizeof(obj, seen=None):
+    """
+    Approximate bytes held by an object and everything it references
+
+    Containers, plain objects (__dict__ / __slots__), numpy arrays and pandas
+    objects are followed; an object reached twice is counted once, so pass the
+    same `seen` set across calls to measure several roots without double counting.
+    """
+    seen = set() if seen is None else seen
+    total = 0
+    stack = [obj]
+
+    while stack:
+        item = stack.pop()
+        if id(item) in seen:
+            continue
+        seen.add(id(item))
+
+        if isinstance(item, np.ndarray):
+            total += sys.getsizeof(item)  # Includes the data buffer unless the array is a view
+            continue
+        if hasattr(item, 'memory_usage') and hasattr(item, 'dtypes'):
+            memory = item.memory_usage(deep=True)  # pandas Series / DataFrame
+            total += int(memory.sum() if hasattr(memory, 'sum') else memory)
+            continue
+
+        total += sys.getsizeof(item)
+        if isinstance(item, (str, bytes, int, float, bool, type(None))):
+            continue
+        if isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple, set, frozenset)):
+            stack.extend(item)
+        else:
+            if hasattr(item, '__dict__'):
+                stack.append(vars(item))
+            for slot in getattr(type(item), '__slots__', ()):
+                if hasattr(item, slot):
+                    stack.append(getattr(item, slot))
+    return total
+
+
+def measure_session(state):
+    """
+    Bytes per session state key
+
+    Args:
+        state: Mapping of key → value (e.g. dict(st.session_state))
+
+    Returns:
+        Dictionary key → bytes, largest first
+    """
+    seen = set()
+    sizes = {key: deep_sizeof(value, seen) for key, value in state.items()}
+    return dict(sorted(sizes.items(), key=lambda item: -item[1]))
+
+
+def trim_adjustments(adjustments, keep_dates, max_bytes):
+    """
+    Drop the oldest adjustment dates outside keep_dates until the adjustments fit in max_bytes
+
+    Args:
+        adjustments: {store: {(date_iso, hour): pct}}, modified in place
+        keep_dates: ISO dates never trimmed (the week on screen)
+        max_bytes: Budget for the adjustments
+
+    Returns:
+        List of ISO dates removed
+    """
+    by_date = {}
+    for store, store_adjustments in adjustments.items():
+        for key in store_adjustments:
+            if key[0] not in keep_dates:
+                by_date.setdefault(key[0], []).append((store, key))
+
+    removed = []
+    for day in sorted(by_date):
+        if deep_sizeof(adjustments) <= max_bytes:
+            break
+        for store, key in by_date[day]:
+            del adjustments[store][key]
+        for store in [store for store, store_adjustments in adjustments.items() if not store_adjustments]:
+            del adjustments[store]
+        removed.append(day)
+    return removed
@@ -0,0 +1,254 @@
+"""
+Staff Sharing
+Floating associates shared by the stores of a city cluster: every hour the
+floater pool is reassigned to the stores where a few more associates add the
+most revenue per associate under the STA conversion curve, with the travel
+time between stores taken out of the hour a floater moves
+"""
+
+import csv
+import heapq
+import os
+
+import numpy as np
+
+from staffing_model import DEFAULT_ATV_DKK, adjusted_conversion_rate_array
+
+# ============================================================================
+# SHARING SETTINGS
+# ============================================================================
+TRAVEL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "store_travel.csv")  # store_a,store_b,minutes
+DEFAULT_TRAVEL_MINUTES = 20     # Between two stores of a city without a travel-time entry
+MAX_TRAVEL_MINUTES = 30         # Floaters never move further than this between two hours
+HOUR_MINUTES = 60
+MIN_GAIN_DKK = 1.0              # Smaller revenue gains leave the floater where it is
+
+
+def travel_matrix(stores, path=TRAVEL_PATH, default=DEFAULT_TRAVEL_MINUTES):
+    """
+    Travel minutes between the stores of a cluster
+
+    Read from a symmetric store_a,store_b,minutes table; pairs without an
+    entry (or no table at all) take `default`.
+
+    Returns:
+        (stores × stores) float array, zero on the diagonal
+    """
+    index = {store: i for i, store in enumerate(stores)}
+    travel = np.full((len(stores), len(stores)), float(default))
+    if os.path.exists(path):
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                a, b = index.get(row['store_a']), index.get(row['store_b'])
+                if a is not None and b is not None:
+                    travel[a, b] = travel[b, a] = float(row['minutes'])
+    np.fill_diagonal(travel, 0.0)
+    return travel
+
+
+def store_revenue(traffic, staff, atv_dkk=DEFAULT_ATV_DKK):
+    """
+    Revenue of store-hours with possibly fractional staff (vectorized)
+
+    traffic × CR(traffic / staff) × ATV, staff floored at 1 like
+    calculate_dynamic_revenue.
+    """
+    traffic = np.asarray(traffic, dtype=float)
+    return traffic * adjusted_conversion_rate_array(traffic / np.maximum(staff, 1.0)) * atv_dkk
+
+
+class SharingPlan:
+    """
+    Floater assignment of one cluster over the hours of a day
+
+    Attributes:
+        stores: Cluster stores (rows)
+        floaters: (stores × hours) floaters working in each store-hour (a
+                  floater arriving from another store counts for the part
+                  of the hour left after travelling)
+        moves: List of (hour index, from store, to store, travel minutes)
+        base_revenue, revenue: (stores × hours) revenue without / with floaters
+    """
+
+    def __init__(self, stores, floaters, headcount, moves, base_revenue, revenue):
+        self.stores = list(stores)
+        self.floaters = floaters
+        self.headcount = headcount  # (stores × hours) floaters present, including arrivals in transit
+        self.moves = moves
+        self.base_revenue = base_revenue
+        self.revenue = revenue
+
+    @property
+    def revenue_gain(self):
+        """Total revenue added by the floaters (DKK)"""
+        return float(self.revenue.sum() - self.base_revenue.sum())
+
+    def store_gain(self):
+        """Revenue added per store (DKK)"""
+        return dict(zip(self.stores, (self.revenue - self.base_revenue).sum(axis=1)))
+
+
+def optimize_floaters(stores, traffic, base_staff, n_floaters, travel=None, start=None,
+                      max_travel=MAX_TRAVEL_MINUTES, atv_dkk=DEFAULT_ATV_DKK):
+    """
+    Assign a pool of floaters to the stores of a cluster hour by hour
+
+    Each hour is a greedy allocation over a lazy max-heap. The conversion
+    curve goes flat beyond about 14 visitors per associate, so one more
+    floater can add nothing to a store that two or three would lift out of
+    that range: stores are therefore keyed on the best average gain of a
+    bundle of 1..n floaters, drawn from the nearest locations that still
+    have unassigned ones, and the top store gets its whole bundle.
+
+    Every store is rated in one vectorized evaluation when the hour opens.
+    A rating stays exact while every source of the store's bundle still has
+    the floaters the bundle counts on (larger bundles can only have got
+    worse), so an assignment only marks the store itself and the stores
+    whose bundle drew on a source just used as stale. Their queued average
+    is still an upper bound (a store's next bundle averages at most what its
+    best one did), so a stale store is re-rated only when it reaches the top
+    of the heap. Floaters end the hour where they worked, so the next hour's
+    travel times start there; an unassigned floater stays put.
+
+    This is a heuristic: bundles make it follow the non-concave curve, but
+    it does not guarantee the revenue-maximal assignment.
+
+    A floater moving from store k to store i works (60 − travel[k, i]) / 60
+    of its first hour there; moves longer than max_travel are not allowed.
+
+    Args:
+        stores: Cluster stores
+        traffic: (stores × hours) predicted traffic
+        base_staff: (stores × hours) rostered staff (e.g. AI staffing)
+        n_floaters: Size of the floater pool
+        travel: (stores × stores) travel minutes (default: travel_matrix(stores))
+        start: Floaters per store at opening (default: spread round robin
+               from the busiest store of the first hour)
+        max_travel: Longest allowed move in minutes
+
+    Returns:
+        SharingPlan
+    """
+    traffic = np.asarray(traffic, dtype=float)
+    base_staff = np.asarray(base_staff, dtype=float)
+    n_stores, n_hours = traffic.shape
+    travel = travel_matrix(stores) if travel is None else np.asarray(travel, dtype=float)
+
+    if start is None:
+        location = np.zeros(n_stores, dtype=np.int64)
+        if n_stores:
+            busiest = np.argsort(-traffic[:, 0], kind='stable')
+            np.add.at(location, busiest[np.arange(n_floaters) % n_stores], 1)
+    else:
+        location = np.asarray(start, dtype=np.int64).copy()
+
+    # Share of the hour a floater from k works at i, and per destination its sources by increasing travel
+    reachable = travel <= max_travel
+    contribution = np.where(reachable, (HOUR_MINUTES - travel) / HOUR_MINUTES, 0.0)
+    order = np.argsort(travel, axis=0, kind='stable').T
+    order_reachable = np.take_along_axis(reachable.T, order, axis=1)
+    sources = [order[i][order_reachable[i]].tolist() for i in range(n_stores)]
+
+    base_revenue = store_revenue(traffic, base_staff, atv_dkk)
+    revenue = base_revenue.copy()
+    floaters = np.zeros((n_stores, n_hours))
+    headcount = np.zeros((n_stores, n_hours), dtype=np.int64)
+    moves = []
+
+    for h in range(n_hours):
+        available = location.copy()
+        location = np.zeros(n_stores, dtype=np.int64)
+        staff = base_staff[:, h].copy()
+        remaining = int(available.sum())
+
+        need = np.zeros((n_stores, n_stores), dtype=np.int64)  # Floaters per source in each store's bundle
+        generation = np.zeros(n_stores, dtype=np.int64)
+        bundle_gain = np.zeros(n_stores)
+        stale = np.zeros(n_stores, dtype=bool)
+        queue = []
+
+        def rate_all():
+            """Rate every store (best bundle, one vectorized evaluation) and queue the ones worth a floater"""
+            stores_col = np.arange(n_stores)[:, None]
+            # Source rank of each store's j-th nearest unassigned floater (n_stores: none left in reach),
+            # by one searchsorted over the running counts of all rows (rows offset apart)
+            reach = np.cumsum(np.where(order_reachable, available[order], 0), axis=1)
+            row_offsets = stores_col * (remaining + 1)
+            slot = (np.searchsorted((reach + row_offsets).ravel(), (row_offsets + np.arange(remaining)).ravel(),
+                                    side='right').reshape(n_stores, remaining) - stores_col * n_stores)
+            in_reach = slot < n_stores
+            slot_sources = order[stores_col, np.minimum(slot, n_stores - 1)]
+
+            added = np.cumsum(np.where(in_reach, contribution[slot_sources, stores_col], 0.0), axis=1)
+            gains = store_revenue(traffic[:, h, None], staff[:, None] + added, atv_dkk) - revenue[:, h, None]
+            averages = np.where(in_reach, gains / np.arange(1, remaining + 1), -np.inf)
+            size = averages.argmax(axis=1)  # Ties keep the smaller bundle
+            best = averages[stores_col[:, 0], size]
+            worth = best >= MIN_GAIN_DKK
+
+            r, j = np.nonzero((np.arange(remaining) <= size[:, None]) & worth[:, None])
+            need[:] = np.bincount(r * n_stores + slot_sources[r, j], minlength=n_stores * n_stores).reshape(need.shape)
+            bundle_gain[:] = gains[stores_col[:, 0], size]
+            for i, average in zip(np.flatnonzero(worth).tolist(), best[worth].tolist()):
+                heapq.heappush(queue, (-average, i, 0))
+
+        def rerate(i):
+            """Rate one store again from the floaters left and queue it if still worth a floater"""
+            generation[i] += 1
+            stale[i] = False
+            need[i] = 0
+            counts = available.tolist()
+            taken = []
+            for k in sources[i]:
+                if counts[k]:
+                    taken.extend([k] * counts[k])
+                    if len(taken) >= remaining:
+                        break
+            if not taken:
+                return
+            taken = taken[:remaining]
+            added = np.cumsum(contribution[taken, i])
+            gains = store_revenue(traffic[i, h], staff[i] + added, atv_dkk) - revenue[i, h]
+            averages = gains / np.arange(1, len(taken) + 1)
+            size = int(averages.argmax())
+            if averages[size] >= MIN_GAIN_DKK:
+                need[i] = np.bincount(taken[:size + 1], minlength=n_stores)
+                bundle_gain[i] = gains[size]
+                heapq.heappush(queue, (-float(averages[size]), i, int(generation[i])))
+
+        if remaining and n_stores == 1:
+            rerate(0)  # A lone store: cheaper than the vectorized set-up
+        elif remaining:
+            rate_all()
+
+        while queue and remaining:
+            negative_average, i, entry_generation = heapq.heappop(queue)
+            if entry_generation != generation[i]:
+                continue  # Re-rated since it was queued
+            if stale[i]:
+                rerate(i)  # Its queued average was an upper bound
+                continue
+
+            bundle = need[i]
+            size = int(bundle.sum())
+            arriving = float(bundle @ contribution[:, i])
+            available -= bundle
+            remaining -= size
+            location[i] += size
+            headcount[i, h] += size
+            staff[i] += arriving
+            floaters[i, h] += arriving
+            revenue[i, h] += bundle_gain[i]
+            for k in np.flatnonzero(bundle).tolist():
+                if k != i:
+                    moves.extend([(h, stores[k], stores[i], float(travel[k, i]))] * int(bundle[k]))
+
+            # Bundles counting on floaters that are now gone are stale (larger bundles only got worse). The
+            # store's next bundle averages at most what its best one did, so its old average stays a bound.
+            stale |= (need > available).any(axis=1)
+            stale[i] = True
+            heapq.heappush(queue, (negative_average, i, entry_generation))
+
+        location += available  # Idle floaters stay where they are
+
+    return SharingPlan(stores, floaters, headcount, moves, base_revenue, revenue)
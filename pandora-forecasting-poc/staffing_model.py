@@ -0,0 +1,169 @@
+"""
+Staffing & Revenue Model
+Staffing rules and the Shopper-to-Associate (STA) conversion lift model shared
+by the dashboard and the analysis engines
+"""
+
+import numpy as np
+
+# ============================================================================
+# CONVERSION LIFT MODEL PARAMETERS (calibrated for Pandora jewelry stores)
+# ============================================================================
+BASELINE_STA_RATIO = 4.0        # 4 shoppers per 1 staff (optimal)
+BASELINE_CR = 0.20              # 20% baseline conversion
+CR_DECLINE_PER_POINT = 0.015    # -1.5% absolute per additional shopper per staff
+CR_GAIN_PER_POINT = 0.020       # +2.0% absolute per fewer shopper per staff
+SURVIVAL_STA_RATIO = 15.0       # Above 15:1 staff only process transactions
+SURVIVAL_PENALTY_PER_POINT = 0.025  # -2.5% absolute per point above 15:1
+MIN_CR = 0.05                   # Floor (minimum viable conversion)
+MAX_CR = 0.30                   # Ceiling
+DEFAULT_ATV_DKK = 931.25        # Average ticket value: $125 × 7.45
+
+# ============================================================================
+# STAFFING RULES
+# ============================================================================
+# Hourly AI staffing (optimal for small luxury store, aims for 4-5:1 STA ratio)
+# (max visitors/hr, staff): very quiet → 1, ~6:1 → 2, ~5:1 → 3
+HOURLY_AI_STAFFING_TIERS = ((6, 1), (12, 2), (16, 3))
+HOURLY_AI_PEAK_VISITORS_PER_STAFF = 5
+HOURLY_AI_PEAK_STAFF_RANGE = (3, 4)     # Peak periods: at least 3, capped at 4 staff
+
+# Hourly baseline staffing (legacy - understaffed, runs at 8-12:1 ratio)
+HOURLY_BASELINE_STAFFING_TIERS = ((10, 1),)
+HOURLY_BASELINE_PEAK_STAFF = 2
+
+
+def adjusted_conversion_rate_array(sta_ratio, baseline_cr=BASELINE_CR,
+                                   decline_per_point=CR_DECLINE_PER_POINT,
+                                   gain_per_point=CR_GAIN_PER_POINT,
+                                   survival_penalty=SURVIVAL_PENALTY_PER_POINT):
+    """
+    Vectorized conversion lift model
+
+    All arguments broadcast against each other, so the curve parameters can be
+    perturbed per scenario (see scenario_engine.py) while sta_ratio holds many
+    stores or time slots at once.
+
+    Args:
+        sta_ratio: Shopper-to-Associate ratio(s) (traffic / staff_count)
+        baseline_cr: Conversion rate at the 4:1 baseline ratio
+        decline_per_point: CR drop per additional shopper per staff
+        gain_per_point: CR gain per fewer shopper per staff
+        survival_penalty: Extra CR drop per point above 15:1
+
+    Returns:
+        Array of adjusted conversion rates as decimals (0.20 = 20%)
+    """
+    sta_ratio = np.asarray(sta_ratio, dtype=float)
+    ratio_difference = sta_ratio - BASELINE_STA_RATIO
+
+    # Understaffed: normal decline up to 15:1, then survival mode penalty on top
+    normal_decline = baseline_cr - ratio_difference * decline_per_point
+    survival_decline = (baseline_cr
+                        - (SURVIVAL_STA_RATIO - BASELINE_STA_RATIO) * decline_per_point
+                        - (sta_ratio - SURVIVAL_STA_RATIO) * survival_penalty)
+    understaffed_cr = np.where(sta_ratio > SURVIVAL_STA_RATIO, survival_decline, normal_decline)
+
+    # Better staffed: CR increases per fewer shopper per staff
+    overstaffed_cr = baseline_cr + np.abs(ratio_difference) * gain_per_point
+
+    adjusted_cr = np.where(ratio_difference > 0, understaffed_cr, overstaffed_cr)
+
+    # Apply ceiling of 30% and floor of 5% (minimum viable conversion)
+    return np.clip(adjusted_cr, MIN_CR, MAX_CR)
+
+
+def calculate_adjusted_conversion_rate(sta_ratio):
+    """
+    Calculate the adjusted conversion rate based on Shopper-to-Associate (STA) ratio
+    Calibrated for realistic Pandora jewelry store operations
+
+    Logic:
+    - Baseline CR: 20% at 4:1 ratio (4 shoppers per 1 staff member)
+    - For every 1 additional shopper per staff, CR drops by 1.5% absolute
+    - For every 1 fewer shopper per staff, CR increases by 2.0% absolute
+    - Maximum CR: 30% (ceiling), Minimum CR: 5% (floor)
+    - At 15:1+ ratio, enters "survival mode" with accelerated CR decline
+
+    Args:
+        sta_ratio: Shopper-to-Associate ratio (traffic / staff_count)
+
+    Returns:
+        Adjusted conversion rate as decimal (0.20 = 20%)
+    """
+    return float(adjusted_conversion_rate_array(sta_ratio))
+
+
+def calculate_dynamic_revenue(traffic, staffing, atv_dkk=DEFAULT_ATV_DKK):
+    """
+    Calculate potential revenue based on dynamic conversion rate
+
+    Args:
+        traffic: Total customer visits
+        staffing: Total staff count (number of employees)
+        atv_dkk: Average ticket value in DKK (default: 931.25 = $125 × 7.45)
+
+    Returns:
+        Dictionary with revenue details:
+        - 'revenue': Total potential revenue
+        - 'conversion_rate': Applied conversion rate
+        - 'sta_ratio': Calculated shopper-to-associate ratio
+    """
+    if staffing <= 0:
+        staffing = 1  # Avoid division by zero
+
+    # Calculate STA ratio (shoppers per staff member)
+    sta_ratio = traffic / staffing
+
+    # Get adjusted conversion rate based on STA ratio
+    adjusted_cr = calculate_adjusted_conversion_rate(sta_ratio)
+
+    # Calculate revenue
+    revenue = int(traffic * adjusted_cr * atv_dkk)
+
+    return {
+        'revenue': revenue,
+        'conversion_rate': adjusted_cr,
+        'sta_ratio': sta_ratio
+    }
+
+
+def _tiered_staffing(traffic, tiers, peak_staff):
+    """Look up staff per time slot from (max traffic, staff) tiers"""
+    traffic = np.asarray(traffic)
+    conditions = [traffic <= max_traffic for max_traffic, _ in tiers]
+    choices = [staff for _, staff in tiers]
+    return np.select(conditions, choices, default=peak_staff)
+
+
+def hourly_ai_staffing(traffic):
+    """
+    AI-recommended staff per hour (vectorized)
+
+    Args:
+        traffic: Predicted visitors per hour (scalar or array)
+
+    Returns:
+        Array of staff counts
+    """
+    traffic = np.asarray(traffic)
+    min_staff, max_staff = HOURLY_AI_PEAK_STAFF_RANGE
+    peak_staff = np.clip(traffic // HOURLY_AI_PEAK_VISITORS_PER_STAFF, min_staff, max_staff)
+    return _tiered_staffing(traffic, HOURLY_AI_STAFFING_TIERS, peak_staff)
+
+
+def hourly_baseline_staffing(traffic):
+    """Legacy staff per hour (vectorized)"""
+    return _tiered_staffing(traffic, HOURLY_BASELINE_STAFFING_TIERS, HOURLY_BASELINE_PEAK_STAFF)
+
+
+def ai_staffing_for_traffic(traffic, view_mode='hourly'):
+    """
+    AI-recommended staff for hourly traffic
+
+    There is no daily rule: daily staffing is the sum of the hourly staffing
+    (see HourlyTensor.daily_totals), so daily traffic is rejected.
+    """
+    if view_mode != 'hourly':
+        raise ValueError("Daily staffing is the sum of hourly staffing: adjust the hours of the week tensor")
+    return hourly_ai_staffing(traffic)
@@ -0,0 +1,169 @@
+"""
+Store Hierarchy
+Fleet → region → country → city → store tree with precomputed rollups, so any
+scope node resolves in constant time regardless of how many stores it covers
+"""
+
+import csv
+import os
+
+import numpy as np
+
+# ============================================================================
+# HIERARCHY DEFINITION
+# ============================================================================
+LEVELS = ('fleet', 'region', 'country', 'city', 'store')
+FLEET_NODE = "All Stores (Aggregate)"
+NODE_PREFIX = {'region': "Region: ", 'country': "Country: ", 'city': "City: "}
+LEVEL_ICONS = {'region': "🗺️", 'country': "🏳️", 'city': "🏙️", 'store': "🏬"}
+
+REGISTRY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "store_registry.csv")
+
+
+def node_id(level, name):
+    """Scope identifier: fleet label, 'Region: X' / 'Country: X' / 'City: X', or the store name"""
+    if level == 'fleet':
+        return FLEET_NODE
+    return NODE_PREFIX.get(level, "") + name
+
+
+class StoreHierarchy:
+    """
+    Store registry sorted so that every hierarchy node covers a contiguous
+    range of stores
+
+    Per-store arrays in `stores` order can then be rolled up to any level with
+    a single np.add.reduceat over that level's segment starts.
+    """
+
+    def __init__(self, records):
+        """
+        Args:
+            records: Iterable of dicts with 'store', 'city', 'country', 'region'
+
+        Raises:
+            ValueError: if two stores share a name, or a city / country name
+                        appears under two parents (node ids are display names)
+        """
+        self.records = sorted(records, key=lambda r: (r['region'], r['country'], r['city'], r['store']))
+        self.stores = [r['store'] for r in self.records]
+        self.store_index = {store: i for i, store in enumerate(self.stores)}
+        if len(self.store_index) != len(self.stores):
+            duplicates = sorted({store for store in self.stores if self.stores.count(store) > 1})
+            raise ValueError(f"Duplicate store names in the store registry: {', '.join(duplicates)}")
+
+        self.nodes = []            # Depth-first display order
+        self.level = {}            # node → level
+        self.name = {}             # node → display name
+        self.span = {}             # node → (start, end) store range
+        self.parent = {}           # node → parent node
+        self.row = {}              # node → row in rollup tables (level-major order)
+        self._level_starts = {}    # level → segment start per node of that level
+        self._level_nodes = {}     # level → nodes of that level in store order
+
+        # Segments per level: consecutive stores with the same path prefix
+        for depth, level in enumerate(LEVELS):
+            starts, nodes = [], []
+            previous_key = None
+            for i, record in enumerate(self.records):
+                key = tuple(record[l] for l in LEVELS[1:depth + 1])
+                if i == 0 or key != previous_key:
+                    name = key[-1] if key else FLEET_NODE
+                    node = node_id(level, name)
+                    if node in self.level:
+                        # Node ids are display names: one would silently overwrite the other's span and parent
+                        raise ValueError(f"{level.capitalize()} '{name}' appears under more than one parent in the "
+                                         f"store registry; give each a unique name (e.g. '{name} ({key[-2]})')")
+                    starts.append(i)
+                    nodes.append(node)
+                    self.level[node] = level
+                    self.name[node] = name
+                    self.parent[node] = None if depth == 0 else node_id(LEVELS[depth - 1], key[-2] if len(key) > 1 else FLEET_NODE)
+                    self.row[node] = len(self.row)
+                previous_key = key
+            ends = starts[1:] + [len(self.records)]
+            for node, start, end in zip(nodes, starts, ends):
+                self.span[node] = (start, end)
+            self._level_starts[level] = np.array(starts, dtype=np.int64)
+            self._level_nodes[level] = nodes
+
+        # Depth-first order for the scope selector
+        def visit(node):
+            self.nodes.append(node)
+            for child in self.children(node):
+                visit(child)
+
+        self._children = {}
+        for node, parent in self.parent.items():
+            if parent is not None:
+                self._children.setdefault(parent, []).append(node)
+        visit(FLEET_NODE)
+
+    @classmethod
+    def from_csv(cls, path=REGISTRY_PATH):
+        """Load the store registry (store, city, country, region) from a CSV file"""
+        with open(path, newline="", encoding="utf-8") as f:
+            return cls(list(csv.DictReader(f)))
+
+    def children(self, node):
+        """Direct children of a node"""
+        return self._children.get(node, [])
+
+    def is_store(self, node):
+        """True for leaf (store) nodes"""
+        return self.level.get(node) == 'store'
+
+    def stores_in(self, node):
+        """Stores under a node, in hierarchy order"""
+        start, end = self.span[node]
+        return self.stores[start:end]
+
+    def level_starts(self, level):
+        """Segment start index of every node of a level (for np.add.reduceat)"""
+        return self._level_starts[level]
+
+    def group_index(self, level):
+        """Group id per store for a level (for np.bincount style rollups)"""
+        starts = self._level_starts[level]
+        return np.repeat(np.arange(len(starts)), np.diff(np.append(starts, len(self.stores))))
+
+    def label(self, node):
+        """Indented label for the scope selector"""
+        level = self.level[node]
+        if level == 'fleet':
+            return node
+        depth = LEVELS.index(level)
+        return f"{'· ' * (depth - 1)}{LEVEL_ICONS[level]} {self.name[node]}"
+
+
+class HierarchyRollup:
+    """
+    Additive per-store metrics summed to every hierarchy node at once
+
+    Built with one np.add.reduceat per level; reading any node afterwards is a
+    single row lookup.
+    """
+
+    def __init__(self, hierarchy, metrics):
+        """
+        Args:
+            hierarchy: StoreHierarchy
+            metrics: Dictionary metric name → per-store values in hierarchy.stores order
+        """
+        self.hierarchy = hierarchy
+        self.metric_names = list(metrics)
+        self._col = {name: j for j, name in enumerate(self.metric_names)}
+
+        values = np.column_stack([np.asarray(metrics[name], dtype=float) for name in self.metric_names])
+        self._table = np.vstack([
+            np.add.reduceat(values, hierarchy.level_starts(level), axis=0) for level in LEVELS
+        ])
+
+    def get(self, node, metric):
+        """Rolled-up value of one metric for a node"""
+        return self._table[self.hierarchy.row[node], self._col[metric]]
+
+    def totals(self, node):
+        """All rolled-up metrics for a node as a dictionary"""
+        row = self._table[self.hierarchy.row[node]]
+        return {name: row[j] for j, name in enumerate(self.metric_names)}
@@ -0,0 +1,554 @@
+"""
+UI Templates
+HTML/CSS fragments for the dashboard cards, compiled once at import:
+whitespace minified, split into literal text and format fields, and rendered
+through a memo keyed on the field values, so a rerun with unchanged values
+reuses the previous string instead of rebuilding it
+"""
+
+import functools
+import re
+import string
+
+# ============================================================================
+# TEMPLATE SETTINGS
+# ============================================================================
+RENDER_CACHE_SIZE = 256         # Memoized renders kept per template
+
+_CSS_COMMENT = re.compile(r"/\*.*?\*/", re.S)
+_TAG_GAP = re.compile(r">\s*\n\s*<")
+_LINE_BREAK = re.compile(r"\s*\n\s*")
+_CSS_PUNCTUATION = re.compile(r"\s*([{};,])\s*")
+_STYLE_BLOCK = re.compile(r"<style>(.*?)</style>", re.S)
+
+
+def minify(markup):
+    """
+    Strip layout whitespace from an HTML/CSS fragment
+
+    Line breaks and their indentation are removed between tags and collapsed
+    to one space inside text; inside <style> blocks comments and the spaces
+    around braces, semicolons and commas are dropped as well.
+    """
+    markup = _STYLE_BLOCK.sub(
+        lambda m: "<style>" + _CSS_PUNCTUATION.sub(r"\1", _CSS_COMMENT.sub("", m.group(1))) + "</style>", markup
+    )
+    markup = _TAG_GAP.sub("><", markup)
+    return _LINE_BREAK.sub(" ", markup).strip()
+
+
+class Template:
+    """
+    str.format template parsed once
+
+    Renders are memoized on the tuple of field values (numbers and strings),
+    so reruns that show the same values return the cached string.
+    """
+
+    _registry = []
+
+    def __init__(self, name, source, cache_size=RENDER_CACHE_SIZE):
+        """
+        Args:
+            name: Template name (for render statistics)
+            source: Markup with str.format fields ('{traffic:,}'); literal
+                    braces doubled as in str.format
+            cache_size: Memoized renders kept
+        """
+        self.name = name
+        self.source = minify(source)
+        self._parts = []
+        fields = []
+        for literal, field, spec, conversion in string.Formatter().parse(self.source):
+            self._parts.append((literal, field, spec, conversion))
+            if field is not None and field not in fields:
+                fields.append(field)
+        self.fields = tuple(fields)
+        self._render = functools.lru_cache(maxsize=cache_size)(self._format)
+        Template._registry.append(self)
+
+    def _format(self, values):
+        lookup = dict(zip(self.fields, values))
+        out = []
+        for literal, field, spec, conversion in self._parts:
+            out.append(literal)
+            if field is None:
+                continue
+            value = lookup[field]
+            if conversion == 'r':
+                value = repr(value)
+            elif conversion == 's':
+                value = str(value)
+            out.append(format(value, spec))
+        return "".join(out)
+
+    def render(self, **values):
+        """Rendered markup (memoized on the field values)"""
+        return self._render(tuple(values[field] for field in self.fields))
+
+    def cache_info(self):
+        """functools cache statistics of this template's renders"""
+        return self._render.cache_info()
+
+
+def render_stats():
+    """Memoized render hits and misses per template"""
+    return {template.name: template.cache_info() for template in Template._registry}
+
+
+# ============================================================================
+# GLOBAL STYLES
+# ============================================================================
+APP_STYLE = minify("""
+<style>
+    @import url('https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700&display=swap');
+
+    * {
+        font-family: 'Inter', sans-serif;
+    }
+
+    .main {
+        background: linear-gradient(135deg, #FAFAFA 0%, #F5F5F5 100%);
+        padding: 1.5rem;
+    }
+
+    .stApp {
+        background: linear-gradient(135deg, #FAFAFA 0%, #F5F5F5 100%);
+    }
+
+    h1, h2, h3, h4 {
+        color: #1A1A1A;
+        font-weight: 600;
+    }
+
+    /* Grid Container */
+    .grid-container {
+        background-color: #FFFFFF;
+        border-radius: 16px;
+        padding: 24px;
+        box-shadow: 0 2px 12px rgba(0, 0, 0, 0.04);
+        margin-bottom: 20px;
+    }
+
+    /* KPI Cards - Minimalist */
+    .kpi-card {
+        background: #FFFFFF;
+        border: 1px solid #E8E8E8;
+        border-radius: 12px;
+        padding: 20px;
+        text-align: center;
+        box-shadow: 0 1px 4px rgba(0, 0, 0, 0.02);
+        min-height: 140px;
+        display: flex;
+        flex-direction: column;
+        justify-content: center;
+        transition: all 0.2s ease;
+    }
+
+    .kpi-card:hover {
+        box-shadow: 0 4px 12px rgba(242, 184, 198, 0.1);
+        border-color: #F2B8C6;
+    }
+
+    .kpi-card[title] {
+        cursor: help;
+    }
+
+    /* Tooltip styling */
+    .kpi-card-with-tooltip {
+        position: relative;
+    }
+
+    .kpi-card-with-tooltip .tooltip-text {
+        visibility: hidden;
+        width: 320px;
+        background-color: #2C2C2C;
+        color: #FFFFFF;
+        text-align: left;
+        border-radius: 8px;
+        padding: 12px 16px;
+        position: absolute;
+        z-index: 1000;
+        top: 125%;
+        left: 50%;
+        margin-left: -160px;
+        opacity: 0;
+        transition: opacity 0.3s;
+        font-size: 12px;
+        line-height: 1.5;
+        box-shadow: 0 4px 12px rgba(0, 0, 0, 0.3);
+    }
+
+    .kpi-card-with-tooltip .tooltip-text::after {
+        content: "";
+        position: absolute;
+        bottom: 100%;
+        left: 50%;
+        margin-left: -8px;
+        border-width: 8px;
+        border-style: solid;
+        border-color: transparent transparent #2C2C2C transparent;
+    }
+
+    .kpi-card-with-tooltip:hover .tooltip-text {
+        visibility: visible;
+        opacity: 1;
+    }
+
+    .kpi-title {
+        color: #6B6B6B;
+        font-size: 11px;
+        font-weight: 600;
+        text-transform: uppercase;
+        letter-spacing: 1.2px;
+        margin-bottom: 10px;
+    }
+
+    .kpi-value {
+        color: #F2B8C6;
+        font-size: 32px;
+        font-weight: 700;
+        line-height: 1;
+        margin-bottom: 6px;
+    }
+
+    .kpi-subtitle {
+        color: #999999;
+        font-size: 10px;
+        font-weight: 400;
+        line-height: 1.4;
+    }
+
+    /* Status Badges */
+    .status-badge {
+        background-color: #FAFAFA;
+        border: 1px solid #E8E8E8;
+        border-radius: 8px;
+        padding: 14px;
+        text-align: center;
+        height: 85px;
+        display: flex;
+        flex-direction: column;
+        justify-content: center;
+    }
+
+    .status-title {
+        color: #6B6B6B;
+        font-size: 10px;
+        font-weight: 600;
+        text-transform: uppercase;
+        letter-spacing: 0.8px;
+        margin-bottom: 6px;
+    }
+
+    .status-value {
+        color: #1A1A1A;
+        font-size: 14px;
+        font-weight: 600;
+    }
+
+    /* Buttons */
+    .stButton > button {
+        background-color: #F2B8C6;
+        color: #1A1A1A;
+        border: none;
+        border-radius: 8px;
+        padding: 10px 16px;
+        font-weight: 600;
+        font-size: 13px;
+        transition: all 0.2s ease;
+        box-shadow: 0 2px 6px rgba(242, 184, 198, 0.2);
+        white-space: nowrap;
+    }
+
+    .stButton > button:hover {
+        background-color: #E8A5B5;
+        transform: translateY(-1px);
+        box-shadow: 0 4px 12px rgba(242, 184, 198, 0.3);
+    }
+
+    /* Section Headers */
+    .section-header {
+        background: #FFFFFF;
+        padding: 16px 20px;
+        border-radius: 10px;
+        border-left: 4px solid #F2B8C6;
+        margin-bottom: 16px;
+        box-shadow: 0 1px 4px rgba(0, 0, 0, 0.02);
+    }
+
+    /* Remove extra padding */
+    .block-container {
+        padding-top: 1.5rem;
+        padding-bottom: 1rem;
+        max-width: 1400px;
+    }
+
+    /* Metric styling - ensure text is dark */
+    [data-testid="stMetricLabel"] {
+        color: #1A1A1A !important;
+        font-weight: 600;
+    }
+
+    [data-testid="stMetricValue"] {
+        color: #1A1A1A !important;
+        font-weight: 700;
+    }
+
+    [data-testid="stMetricDelta"] {
+        color: #1A1A1A !important;
+    }
+
+    /* Adjustment preview container */
+    .adjustment-preview {
+        background: #FFFFFF;
+        border: 1px solid #E8E8E8;
+        border-radius: 8px;
+        padding: 16px;
+        margin: 12px 0;
+        box-shadow: 0 1px 4px rgba(0, 0, 0, 0.05);
+    }
+
+    .adjustment-preview [data-testid="stMetricLabel"],
+    .adjustment-preview [data-testid="stMetricValue"],
+    .adjustment-preview [data-testid="stMetricDelta"] {
+        color: #1A1A1A !important;
+    }
+</style>
+""")
+
+# ============================================================================
+# LAYOUT
+# ============================================================================
+PAGE_HEADER = Template("page_header", """
+<div style="background: #FFFFFF;
+            padding: 24px 28px; border-radius: 14px; margin-bottom: 20px;
+            border: 1px solid #E8E8E8;
+            box-shadow: 0 2px 8px rgba(0, 0, 0, 0.03);">
+    <h1 style="color: #1A1A1A; font-size: 26px; margin: 0; font-weight: 600;">
+        💎 Pandora AI Traffic & Staffing Optimizer
+    </h1>
+    <p style="color: #6B6B6B; font-size: 13px; margin: 8px 0 0 0; font-weight: 500;">
+        {scope} • {date_label}
+    </p>
+</div>
+""")
+
+SECTION_HEADER = Template("section_header", """
+<div style="background: #FFFFFF; padding: 12px 16px; border-radius: 8px; border-left: 3px solid #F2B8C6; margin-bottom: 12px; box-shadow: 0 1px 3px rgba(0, 0, 0, 0.02);">
+    <div style="color: #1A1A1A; font-size: 13px; font-weight: 600; margin-bottom: 2px;">{title}</div>
+</div>
+""")
+
+# ============================================================================
+# KPI CARDS
+# ============================================================================
+TRAFFIC_KPI_CARD = Template("traffic_kpi_card", """
+<div class="kpi-card">
+    <div class="kpi-title">Total Predicted Traffic</div>
+    <div class="kpi-value">{traffic:,}</div>
+    <div class="kpi-subtitle">Customer Visits</div>
+</div>
+""")
+
+REVENUE_KPI_CARD = Template("revenue_kpi_card", """
+<div class="kpi-card kpi-card-with-tooltip">
+    <span class="tooltip-text"><strong>Conversion Lift Model</strong> (Calibrated for Pandora)<br><br>Dynamic CR based on Shopper-to-Associate (STA) ratio:<br><br><strong>Optimal:</strong> 20% CR at 4:1 ratio (4 shoppers per staff)<br><strong>Understaffed:</strong> CR drops 1.5% per additional shopper/staff<br><strong>Survival Mode (15:1+):</strong> CR crashes 2.5% per point (staff only process transactions, stop selling)<br><strong>Better Staffed:</strong> CR increases 2.0% per fewer shopper/staff<br><strong>Range:</strong> 5% minimum to 30% maximum<br><br>Formula: Total Visits × Adjusted CR × $125 ATV (931 kr)<br><br>Based on Pandora intensity levels: Low (0-15/hr), Moderate (16-30/hr), High (31+/hr). AI aims for 4-5:1, Baseline runs at 10:1 (understaffed).<br><br><strong>Uncertainty:</strong> P10-P90 range of the revenue impact from {n_scenarios:,} Monte Carlo scenarios (traffic noise, ticket value variance, conversion curve uncertainty).</span>
+    <div class="kpi-title">Revenue Recovery 💡</div>
+    <div class="kpi-value">{ai_revenue:,} kr</div>
+    <div class="kpi-subtitle">AI Optimized • Baseline: {baseline_revenue:,} kr<br><span style="color: {diff_color}; font-weight: 600;">{diff_symbol}{revenue_diff:,} kr</span> vs Baseline<br>P10-P90: {impact_p10:+,} to {impact_p90:+,} kr</div>
+</div>
+""")
+
+CONVERSION_KPI_CARD = Template("conversion_kpi_card", """
+<div class="kpi-card kpi-card-with-tooltip">
+    <span class="tooltip-text"><strong>Conversion Efficiency</strong><br><br>Shows the conversion rate improvement achieved through AI-optimized staffing versus baseline (legacy) staffing.<br><br><strong>Baseline Conversion:</strong> {baseline_cr_pct:.1f}% (understaffed at 10:1 STA ratio)<br><strong>AI Optimized:</strong> {ai_cr_pct:.1f}% (optimal 4-5:1 STA ratio)<br><strong>Improvement:</strong> {improvement_symbol}{conversion_improvement:.1f}%<br><br>Uses dynamic conversion lift model based on Shopper-to-Associate ratios. Better staffing = better service = higher conversion = more revenue from same traffic.</span>
+    <div class="kpi-title">Conversion Efficiency 📊</div>
+    <div class="kpi-value">{ai_cr_pct:.1f}%</div>
+    <div class="kpi-subtitle">AI Optimized • Baseline: {baseline_cr_pct:.1f}%<br><span style="color: {improvement_color}; font-weight: 600;">{improvement_symbol}{conversion_improvement:.1f}%</span> improvement</div>
+</div>
+""")
+
+# ============================================================================
+# ADJUSTMENT TOOLS
+# ============================================================================
+ADJUSTMENT_PREVIEW = Template("adjustment_preview", """
+<div style="background: #FFFFFF; border: 1px solid #E8E8E8; border-radius: 8px; padding: 20px; margin: 12px 0; box-shadow: 0 1px 4px rgba(0, 0, 0, 0.05);">
+    <div style="display: flex; justify-content: space-around; gap: 20px;">
+        <div style="text-align: center; flex: 1;">
+            <div style="color: #6B6B6B; font-size: 12px; font-weight: 600; text-transform: uppercase; margin-bottom: 8px;">Original</div>
+            <div style="color: #1A1A1A; font-size: 32px; font-weight: 700;">{original_value:,}</div>
+        </div>
+        <div style="text-align: center; flex: 1;">
+            <div style="color: #6B6B6B; font-size: 12px; font-weight: 600; text-transform: uppercase; margin-bottom: 8px;">Adjusted</div>
+            <div style="color: #1A1A1A; font-size: 32px; font-weight: 700;">{adjusted_value:,}</div>
+            <div style="color: {adjustment_color}; font-size: 14px; font-weight: 600; margin-top: 4px;">{adjustment:+d}%</div>
+        </div>
+    </div>
+    {deltas}
+</div>
+""")
+
+BULK_PREVIEW = Template("bulk_preview", """
+<div style="background: #FFFFFF; border: 1px solid #E8E8E8; border-radius: 8px; padding: 12px; margin: 8px 0;">
+    <div style="color: #6B6B6B; font-size: 11px; font-weight: 600; text-transform: uppercase;">{changed_slots} slots • {adjustment:+d}%</div>
+    {deltas}
+</div>
+""")
+
+WHATIF_DELTAS = Template("whatif_deltas", """
+<div style="display: flex; justify-content: space-around; gap: 8px; border-top: 1px solid #F0F0F0; margin-top: 12px; padding-top: 12px;">
+    <div style="text-align: center; flex: 1;">
+        <div style="color: #6B6B6B; font-size: 10px; font-weight: 600; text-transform: uppercase; margin-bottom: 4px;">AI Revenue</div>
+        <div style="color: {ai_revenue_color}; font-size: 14px; font-weight: 700;">{ai_revenue:+,} kr</div>
+    </div>
+    <div style="text-align: center; flex: 1;">
+        <div style="color: #6B6B6B; font-size: 10px; font-weight: 600; text-transform: uppercase; margin-bottom: 4px;">vs Baseline</div>
+        <div style="color: {lost_revenue_color}; font-size: 14px; font-weight: 700;">{lost_revenue:+,} kr</div>
+    </div>
+    <div style="text-align: center; flex: 1;">
+        <div style="color: #6B6B6B; font-size: 10px; font-weight: 600; text-transform: uppercase; margin-bottom: 4px;">AI Staff</div>
+        <div style="color: {ai_staffing_color}; font-size: 14px; font-weight: 700;">{ai_staffing:+,}</div>
+    </div>
+</div>
+""")
+
+DECISION_PROMPT = Template("decision_prompt", """
+<div style="background: #F0F9FF; padding: 12px; border-radius: 8px; margin: 12px 0; border-left: 3px solid #34C759;">
+    <div style="color: #1A1A1A; font-size: 12px; font-weight: 600; margin-bottom: 4px;">Today's Staffing Decision for {scope}</div>
+    <div style="color: #4A4A4A; font-size: 11px;">AI Recommendation: <strong>{ai_fte_avg:.1f} FTE/Day</strong> | Legacy System: <strong>{baseline_fte_avg:.1f} FTE/Day</strong></div>
+</div>
+""")
+
+# ============================================================================
+# STAFFING RECOMMENDATION
+# ============================================================================
+RECOMMENDATION_HEADER = Template("recommendation_header", """
+<style>
+    .recommendation-header {{
+        background: #FFFFFF;
+        padding: 12px 16px;
+        border-radius: 8px;
+        border-left: 3px solid #F2B8C6;
+        margin-bottom: 12px;
+        box-shadow: 0 1px 3px rgba(0, 0, 0, 0.02);
+        position: relative;
+    }}
+    .recommendation-title {{
+        color: #1A1A1A;
+        font-size: 13px;
+        font-weight: 600;
+        margin-bottom: 2px;
+        position: relative;
+        display: inline-block;
+    }}
+    .info-icon {{
+        display: inline-block;
+        margin-left: 6px;
+        color: #999999;
+        font-size: 11px;
+        font-weight: normal;
+        cursor: help;
+        position: relative;
+    }}
+    .info-icon .tooltip-box {{
+        display: none;
+        position: absolute;
+        width: 320px;
+        background-color: #2C2C2C;
+        color: #FFFFFF;
+        text-align: left;
+        border-radius: 8px;
+        padding: 12px 16px;
+        z-index: 9999;
+        top: 25px;
+        left: -160px;
+        font-size: 11px;
+        line-height: 1.6;
+        box-shadow: 0 4px 12px rgba(0,0,0,0.4);
+    }}
+    .info-icon:hover .tooltip-box {{
+        display: block;
+    }}
+</style>
+<div class="recommendation-header">
+    <div class="recommendation-title">
+        🎯 Staffing Recommendation
+        <span class="info-icon">
+            ⓘ
+            <div class="tooltip-box">
+                <strong style="color: #F2B8C6;">About this metric:</strong><br><br>
+                {tooltip_text}
+            </div>
+        </span>
+    </div>
+</div>
+""")
+
+RECOMMENDATION_BOX = Template("recommendation_box", """
+<div style="background: {recommendation_color}; border-radius: 12px; padding: 24px; margin-bottom: 20px; border-left: 4px solid #F2B8C6;">
+    <div style="display: grid; grid-template-columns: repeat(3, 1fr); gap: 20px; margin-bottom: 20px;">
+        <div style="text-align: center;">
+            <div style="color: #6B6B6B; font-size: 11px; font-weight: 600; text-transform: uppercase; letter-spacing: 1px; margin-bottom: 8px;">Legacy System</div>
+            <div style="color: #1A1A1A; font-size: 32px; font-weight: 700;">{baseline_fte:.1f}</div>
+            <div style="color: #999999; font-size: 12px; margin-top: 4px;">Avg FTE/Day</div>
+        </div>
+        <div style="text-align: center;">
+            <div style="color: #6B6B6B; font-size: 11px; font-weight: 600; text-transform: uppercase; letter-spacing: 1px; margin-bottom: 8px;">AI Recommended</div>
+            <div style="color: #34C759; font-size: 32px; font-weight: 700;">{ai_fte:.1f}</div>
+            <div style="color: #999999; font-size: 12px; margin-top: 4px;">Avg FTE/Day</div>
+        </div>
+        <div style="text-align: center;">
+            <div style="color: #6B6B6B; font-size: 11px; font-weight: 600; text-transform: uppercase; letter-spacing: 1px; margin-bottom: 8px;">Difference</div>
+            <div style="color: {difference_color}; font-size: 32px; font-weight: 700;">{fte_difference:+.1f}</div>
+            <div style="color: #999999; font-size: 12px; margin-top: 4px;">FTE/Day</div>
+        </div>
+    </div>
+    <div style="padding: 16px; background: #FFFFFF; border-radius: 8px; margin-bottom: 12px;">
+        <div style="color: #1A1A1A; font-size: 14px; font-weight: 600; margin-bottom: 8px;">📊 Analysis</div>
+        <div style="color: #4A4A4A; font-size: 13px; line-height: 1.6;">{recommendation_text}</div>
+    </div>
+    <div style="padding: 16px; background: #FFFFFF; border-radius: 8px;">
+        <div style="color: #1A1A1A; font-size: 14px; font-weight: 600; margin-bottom: 8px;">💰 Revenue Impact</div>
+        <div style="color: #4A4A4A; font-size: 13px; line-height: 1.6;">{impact_text}</div>
+    </div>
+</div>
+""")
+
+# ============================================================================
+# PERFORMANCE METRIC CARDS
+# ============================================================================
+METRIC_CARD = Template("metric_card", """
+<div style="background: #FFFFFF; border: 1px solid #E8E8E8; border-radius: 8px; padding: 12px; margin-bottom: 10px; box-shadow: 0 1px 3px rgba(0, 0, 0, 0.02);">
+    <div style="color: #1A1A1A; font-size: 12px; font-weight: 600; margin-bottom: 8px;">{title}</div>
+    <div style="display: grid; grid-template-columns: repeat(3, 1fr); gap: 8px; margin-bottom: 8px;">
+        <div style="text-align: center; padding: 8px; background: #FAFAFA; border-radius: 6px;">
+            <div style="color: #6B6B6B; font-size: 9px; font-weight: 600; text-transform: uppercase; margin-bottom: 3px;">Today</div>
+            <div style="color: {color_today}; font-size: 18px; font-weight: 700; line-height: 1;">{value_today}</div>
+        </div>
+        <div style="text-align: center; padding: 8px; background: #FAFAFA; border-radius: 6px;">
+            <div style="color: #6B6B6B; font-size: 9px; font-weight: 600; text-transform: uppercase; margin-bottom: 3px;">3 Days</div>
+            <div style="color: {color_3days}; font-size: 18px; font-weight: 700; line-height: 1;">{value_3days}</div>
+        </div>
+        <div style="text-align: center; padding: 8px; background: #FAFAFA; border-radius: 6px;">
+            <div style="color: #6B6B6B; font-size: 9px; font-weight: 600; text-transform: uppercase; margin-bottom: 3px;">Week</div>
+            <div style="color: {color_week}; font-size: 18px; font-weight: 700; line-height: 1;">{value_week}</div>
+        </div>
+    </div>
+    <div style="padding: 6px 8px; background: {footer_background}; border-radius: 4px; border-left: 2px solid {color_week};">
+        <div style="color: #4A4A4A; font-size: 9px; line-height: 1.4;">
+            {footer}
+        </div>
+    </div>
+</div>
+""")
+
+# ============================================================================
+# SYSTEM HEALTH
+# ============================================================================
+STATUS_BADGE = Template("status_badge", """
+<div class="status-badge" title="{detail}">
+    <div class="status-title">{title}</div>
+    <div class="status-value">{value}</div>
+</div>
+""")
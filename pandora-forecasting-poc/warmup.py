@@ -0,0 +1,183 @@
+"""
+Warm-up
+Precomputes what the first dashboard render of a fresh process needs - the
+compiled feature array, this year's event matrix, the week tensors of the
+current week and the residual history behind the prediction bands, and the
+day-ahead backtests behind the accuracy card - into on-disk caches the
+dashboard reads instead of regenerating every store
+
+Usage (from the pandora-forecasting-poc directory, e.g. in the container
+entrypoint before `streamlit run app.py`):
+    python warmup.py
+    python warmup.py --weeks 2 --workers 4
+"""
+
+import argparse
+import hashlib
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+from backtesting import ForecastCache, rolling_origins, run_backtest
+from cache_versions import CACHE_VERSIONS
+from event_calendar import EVENT_CALENDAR
+from feature_store import FEATURE_STORE
+from forecast_data import HourlyTensor, generate_store_hourly_data, week_dates
+
+# ============================================================================
+# WARM-UP SETTINGS
+# ============================================================================
+SNAPSHOT_DIR = os.environ.get(
+    "PANDORA_SNAPSHOT_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "forecast_snapshots")
+)
+SNAPSHOTS_KEPT = 32             # Newest week snapshots kept on disk
+WARMUP_WEEKS = 9                # Current week + 8 weeks of residual history (INTERVAL_WINDOW_WEEKS in app.py)
+WARMUP_BACKTEST_DAYS = 7        # Day-ahead backtests behind the accuracy card (BACKTEST_WINDOW_DAYS in app.py)
+
+
+# ============================================================================
+# WEEK TENSOR SNAPSHOTS
+# ============================================================================
+class TensorSnapshots:
+    """
+    Week tensors on disk, one .npz per week and forecast version
+
+    Keyed like the dashboard's get_week_tensor (week start, today and the
+    week's cache version, see CacheVersions.week), so a snapshot is only
+    read back for exactly the forecasts it holds.
+    """
+
+    def __init__(self, directory=SNAPSHOT_DIR, kept=SNAPSHOTS_KEPT):
+        self.directory = directory
+        self.kept = kept
+        self._lock = threading.Lock()
+
+    def path(self, week_start, today, version):
+        """Snapshot file of one week tensor"""
+        key = f"{week_start.isoformat()}|{today.isoformat()}|{version!r}"
+        return os.path.join(self.directory, hashlib.sha1(key.encode("utf-8")).hexdigest()[:20] + ".npz")
+
+    def load(self, week_start, today, version):
+        """HourlyTensor of a week, or None when there is no snapshot for this version"""
+        path = self.path(week_start, today, version)
+        if not os.path.exists(path):
+            return None
+        with np.load(path) as data:
+            return HourlyTensor(data['stores'].tolist(), week_dates(week_start), data['predicted'], data['actual'],
+                                data['baseline_staffing'], data['ai_staffing'], today)
+
+    def save(self, tensor, week_start, today, version):
+        """Write a week tensor (atomic replace) and drop the oldest snapshots beyond `kept`"""
+        path = self.path(week_start, today, version)
+        tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            np.savez(tmp_path, stores=np.array(tensor.stores), predicted=tensor.predicted, actual=tensor.actual,
+                     baseline_staffing=tensor.baseline_staffing, ai_staffing=tensor.ai_staffing)
+            os.replace(tmp_path, path)
+
+            snapshots = sorted((entry for entry in os.scandir(self.directory) if entry.name.endswith(".npz")),
+                               key=lambda entry: entry.stat().st_mtime_ns)
+            for entry in snapshots[:-self.kept]:
+                try:
+                    os.remove(entry.path)
+                except FileNotFoundError:
+                    pass  # Pruned by another process
+
+
+# ============================================================================
+# WARM-UP
+# ============================================================================
+def prepare_inputs(today=None):
+    """
+    Compile the input data before any cache version is taken
+
+    The feature CSVs and array are generated on first use; doing that here
+    keeps the data watermark (see cache_versions.py) from changing under the
+    first render. Returns True if a version changed.
+    """
+    today = datetime.now().date() if today is None else today
+    FEATURE_STORE.warm()
+    EVENT_CALENDAR.year_matrix(today.year)
+    return CACHE_VERSIONS.refresh()
+
+
+def _build_week(stores, week_start, today):
+    """Process pool task: hourly tensor of one week"""
+    return HourlyTensor.from_forecasts(stores, week_dates(week_start), generate_store_hourly_data, today)
+
+
+def warm_up(stores, weeks=WARMUP_WEEKS, backtest_days=WARMUP_BACKTEST_DAYS, workers=1,
+            snapshots=None, backtest_cache=None, now=None):
+    """
+    Fill the on-disk caches read by the first render
+
+    Args:
+        stores: Stores in registry (hierarchy) order, as the dashboard uses them
+        weeks: Week tensors built, the current week first, then earlier weeks
+        backtest_days: Day-ahead backtest origins up to yesterday
+        workers: Process pool size for the week tensors and backtests (1: this process)
+        snapshots: TensorSnapshots (default: SNAPSHOT_DIR)
+        backtest_cache: ForecastCache (default: the backtest cache directory)
+
+    Returns:
+        Dictionary step → seconds, and 'weeks_built' (snapshots that were missing)
+    """
+    now = datetime.now() if now is None else now
+    today = now.date()
+    snapshots = TensorSnapshots() if snapshots is None else snapshots
+    timings = {}
+
+    start = time.perf_counter()
+    prepare_inputs(today)
+    timings['inputs_s'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    monday = week_dates(today)[0]
+    missing = []
+    for week_start in (monday - timedelta(weeks=w) for w in range(weeks)):
+        version = CACHE_VERSIONS.week(stores, week_dates(week_start), now)
+        if not os.path.exists(snapshots.path(week_start, today, version)):
+            missing.append((week_start, version))
+    if workers == 1 or len(missing) <= 1:
+        built = [_build_week(stores, week_start, today) for week_start, _ in missing]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_build_week, stores, week_start, today) for week_start, _ in missing]
+            built = [future.result() for future in futures]
+    for (week_start, version), tensor in zip(missing, built):
+        snapshots.save(tensor, week_start, today, version)
+    timings['week_tensors_s'] = time.perf_counter() - start
+    timings['weeks_built'] = len(missing)
+
+    start = time.perf_counter()
+    origins = rolling_origins(today - timedelta(days=1), backtest_days, horizon=1)
+    run_backtest(stores, origins, horizon=1, workers=workers,
+                 cache=ForecastCache() if backtest_cache is None else backtest_cache)
+    timings['backtests_s'] = time.perf_counter() - start
+    return timings
+
+
+def main(argv=None):
+    from store_hierarchy import StoreHierarchy
+
+    parser = argparse.ArgumentParser(description="Precompute the dashboard's first render into the on-disk caches")
+    parser.add_argument("--weeks", type=int, default=WARMUP_WEEKS, help="Week tensors to build (current week first)")
+    parser.add_argument("--workers", type=int, default=1, help="Process pool size (1: no pool)")
+    args = parser.parse_args(argv)
+
+    stores = StoreHierarchy.from_csv().stores
+    timings = warm_up(stores, weeks=args.weeks, workers=args.workers)
+    print(f"{len(stores)} stores, {date.today().isoformat()}: inputs {timings['inputs_s']:.2f} s, "
+          f"{timings['weeks_built']} week tensor(s) {timings['week_tensors_s']:.2f} s, "
+          f"backtests {timings['backtests_s']:.2f} s")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,164 @@
+"""
+What-If Adjustment Sandbox
+Evaluates candidate traffic adjustments as deltas against cached baseline
+aggregates, so KPI and revenue changes show before anything is applied
+"""
+
+import numpy as np
+
+from forecast_data import SLOT_LABELS
+from staffing_model import ai_staffing_for_traffic, calculate_dynamic_revenue
+
+
+class WhatIfBaseline:
+    """
+    Slot-level forecast arrays (stores × time periods) plus per-store totals
+
+    Holds both the original forecast (adjustments are percentages of it) and
+    the currently adjusted one (the state KPIs are shown for). Built once per
+    forecast/adjustment state; every candidate is then evaluated against it
+    without touching the DataFrames.
+    """
+
+    def __init__(self, stores, time_values, original_traffic, traffic,
+                 baseline_staffing, ai_staffing, view_mode='hourly'):
+        self.stores = list(stores)
+        self.time_values = list(time_values)
+        self.store_index = {store: i for i, store in enumerate(self.stores)}
+        self.time_index = {value: i for i, value in enumerate(self.time_values)}
+        self.view_mode = view_mode
+
+        self.original_traffic = np.asarray(original_traffic, dtype=np.int64)
+        self.traffic = np.asarray(traffic, dtype=np.int64)
+        self.baseline_staffing = np.asarray(baseline_staffing, dtype=np.int64)
+        self.ai_staffing = np.asarray(ai_staffing, dtype=np.int64)
+
+        # Per-store totals: scope totals are sums of these, never of slots
+        self.store_traffic = self.traffic.sum(axis=1)
+        self.store_baseline_staffing = self.baseline_staffing.sum(axis=1)
+        self.store_ai_staffing = self.ai_staffing.sum(axis=1)
+
+    @classmethod
+    def from_forecasts(cls, original_data, adjusted_data, view_mode='hourly', time_values=None):
+        """
+        Build from the generated and the adjusted store forecasts
+
+        Args:
+            original_data: Dictionary of StoreForecast before adjustments
+            adjusted_data: Dictionary of StoreForecast after adjustments
+            view_mode: 'hourly' or 'daily'
+            time_values: Slot identifiers (default: the forecasts' hour/day labels)
+        """
+        stores = list(adjusted_data.keys())
+
+        def stack(data, field):
+            return np.vstack([getattr(data[store], field) for store in stores])
+
+        return cls(
+            stores,
+            adjusted_data[stores[0]].labels if time_values is None else time_values,
+            stack(original_data, 'predicted'),
+            stack(adjusted_data, 'predicted'),
+            stack(adjusted_data, 'baseline_staffing'),
+            stack(adjusted_data, 'ai_staffing'),
+            view_mode
+        )
+
+    @classmethod
+    def from_tensors(cls, original_tensor, adjusted_tensor):
+        """
+        Build over every hour of an HourlyTensor (e.g. the week behind the daily view)
+
+        Slots are (date ISO string, hour label) pairs, so a day-level candidate
+        is evaluated hour by hour with the hourly staffing rule, exactly as it
+        will be applied.
+        """
+        n_stores = len(adjusted_tensor.stores)
+        time_values = [(day.isoformat(), hour) for day in adjusted_tensor.dates
+                       for hour in SLOT_LABELS['hourly']]
+
+        def flat(values):
+            return values.reshape(n_stores, -1)
+
+        return cls(
+            adjusted_tensor.stores,
+            time_values,
+            flat(original_tensor.predicted),
+            flat(adjusted_tensor.predicted),
+            flat(adjusted_tensor.baseline_staffing),
+            flat(adjusted_tensor.ai_staffing),
+            'hourly'
+        )
+
+    def scope_totals(self, scope_stores):
+        """Total traffic, baseline staffing and AI staffing for a set of stores"""
+        idx = [self.store_index[store] for store in scope_stores]
+        return (int(self.store_traffic[idx].sum()),
+                int(self.store_baseline_staffing[idx].sum()),
+                int(self.store_ai_staffing[idx].sum()))
+
+
+def _scope_kpis(traffic, baseline_staffing, ai_staffing):
+    """Revenue KPIs for scope totals (same aggregation as calculate_kpis)"""
+    baseline = calculate_dynamic_revenue(traffic, baseline_staffing)
+    ai = calculate_dynamic_revenue(traffic, ai_staffing)
+    return {
+        'traffic': traffic,
+        'ai_staffing': ai_staffing,
+        'ai_revenue': ai['revenue'],
+        'baseline_revenue': baseline['revenue'],
+        'lost_revenue': ai['revenue'] - baseline['revenue'],
+        'ai_cr': ai['conversion_rate']
+    }
+
+
+def evaluate_adjustment(baseline, stores, time_values, adjustment, scope_stores=None):
+    """
+    Evaluate a candidate adjustment without applying it
+
+    The adjustment replaces any existing adjustment on the selected slots (the
+    same semantics as the sidebar slider). Only the changed slots get new
+    traffic and AI staffing; scope totals are updated by their deltas.
+
+    Args:
+        baseline: WhatIfBaseline for the current forecast state
+        stores: Stores the adjustment applies to (e.g. every store in a region)
+        time_values: Slots it applies to, as identified in the baseline (e.g. all afternoon hours)
+        adjustment: Percentage change vs the original forecast
+        scope_stores: Stores whose KPIs are reported (default: all stores)
+
+    Returns:
+        Dictionary with:
+        - 'changed_slots': Number of store × time slots affected
+        - 'before' / 'after': KPI dictionaries for the scope
+        - 'delta': after - before for every KPI
+        - 'adjustments': {store: {time_value: adjustment}} to apply
+    """
+    scope_stores = baseline.stores if scope_stores is None else list(scope_stores)
+    store_idx = np.array([baseline.store_index[store] for store in stores], dtype=int)
+    time_idx = np.array([baseline.time_index[value] for value in time_values], dtype=int)
+    block = np.ix_(store_idx, time_idx)
+
+    # Recompute only the changed slots
+    new_traffic = (baseline.original_traffic[block] * (1 + adjustment / 100)).astype(np.int64)
+    new_ai_staffing = ai_staffing_for_traffic(new_traffic, baseline.view_mode)
+
+    traffic_delta = (new_traffic - baseline.traffic[block]).sum(axis=1)
+    ai_staffing_delta = (new_ai_staffing - baseline.ai_staffing[block]).sum(axis=1)
+
+    # Only deltas of stores inside the KPI scope move the scope totals
+    in_scope = np.isin(np.array(stores, dtype=object), np.array(scope_stores, dtype=object))
+    traffic, baseline_staffing, ai_staffing = baseline.scope_totals(scope_stores)
+
+    before = _scope_kpis(traffic, baseline_staffing, ai_staffing)
+    after = _scope_kpis(traffic + int(traffic_delta[in_scope].sum()),
+                        baseline_staffing,
+                        ai_staffing + int(ai_staffing_delta[in_scope].sum()))
+
+    return {
+        'changed_slots': len(store_idx) * len(time_idx),
+        'before': before,
+        'after': after,
+        'delta': {key: after[key] - before[key] for key in before},
+        'adjustments': {store: {value: adjustment for value in time_values} for store in stores}
+    }